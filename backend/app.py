@@ -1,11 +1,31 @@
-from flask import Flask, jsonify, request, send_from_directory
-from flask_cors import CORS
+from flask import Flask, Response, jsonify, request, send_from_directory
 import sqlite3
 from datetime import datetime, timedelta
 import requests
 import os
 from dotenv import load_dotenv
+import threading
 import time
+from functools import lru_cache
+from werkzeug.exceptions import NotFound
+from services.proxy_service import ProxyService
+from services.proxy_cache import proxy_cache
+from services.upstream_scheduler import upstream_scheduler
+from services.tracing import init_tracing, span
+from services.profiling import PROFILE_HEADER, init_profiling, profile_store, profiles_readable
+from services.quest_analytics import QuestClaims
+from services.schema import ensure_schema
+from services.fleet import wallet_registry
+from services.exchange_ledger import exchange_ledger
+from services.portfolio import portfolio
+from services.sell_optimizer import sell_optimizer
+from services.dungeon_planner import HORIZON_HOURS, dungeon_planner
+from services.roi_model import sensitivity
+from services.price_history import BIRDEYE_BASE_URL, MAGIC_EDEN_BASE_URL, realized_roi
+from services.alerts import alert_engine, alert_stream
+from services.price_stream import price_stream
+from middleware.cors import CorsMiddleware
+from defi_dungeon_calculator import INITIAL_INVESTMENT
 
 app = Flask(__name__)
 
@@ -21,38 +41,27 @@ app = Flask(__name__)
 # Whitelist of allowed origins
 ALLOWED_ORIGINS = ['http://localhost:3000']
 
-# Configure CORS
-CORS(app, 
-     resources={
-         r"/*": {
-             "origins": ALLOWED_ORIGINS,
-             "methods": ["GET", "OPTIONS"], # Simplified methods
-             "allow_headers": ["Content-Type"], # Simplified headers
-             "supports_credentials": True,
-             "send_wildcard": False,
-             "max_age": 3600
-         }
-     })
-
-# Security headers middleware (Simplified CSP)
-@app.after_request
-def add_security_headers(response):
-    origin = request.headers.get('Origin')
-    if origin in ALLOWED_ORIGINS:
-        response.headers['Access-Control-Allow-Origin'] = origin
-        response.headers['Access-Control-Allow-Credentials'] = 'true'
-        if request.method == 'OPTIONS':
-            response.headers['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
-            response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
-            response.headers['Access-Control-Max-Age'] = '3600'
-    
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    response.headers['X-Frame-Options'] = 'DENY'
-    response.headers['X-XSS-Protection'] = '1; mode=block'
-    response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
-    # response.headers['Content-Security-Policy'] = "default-src 'self' http://localhost:3000" # Consider adjusting if needed
-    
-    return response
+# CORS and security headers are added at the WSGI layer; preflights from
+# allowed origins are answered there without entering Flask
+app.wsgi_app = CorsMiddleware(app.wsgi_app, ALLOWED_ORIGINS, resources={
+    # Game API proxy used by frontend/src/services/nightvaleApi.js
+    '/api/proxy/': (
+        ('GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'),
+        ('Content-Type', 'Authorization', 'x-selected-wallet-address'),
+    ),
+    '/alerts': (
+        ('GET', 'POST', 'DELETE', 'OPTIONS'),
+        ('Content-Type', 'Last-Event-ID'),
+    ),
+    '/prices/stream': (
+        ('GET', 'OPTIONS'),
+        ('Last-Event-ID',),
+    ),
+    '/fleet/wallets': (
+        ('GET', 'POST', 'DELETE', 'OPTIONS'),
+        ('Content-Type',),
+    ),
+})
 
 # Removed CSRF/origin validation functions as they aren't used with simple GET endpoints
 
@@ -62,6 +71,11 @@ load_dotenv()
 # Database path
 DB_PATH = 'defi_dungeons.db'
 
+# Constant investment amount in USD (Adjust if needed)
+TOTAL_INVESTMENT = 475
+# /roi/sensitivity results kept, one per price snapshot and query
+SENSITIVITY_CACHE_SIZE = int(os.getenv('SENSITIVITY_CACHE_SIZE', 64))
+
 # --- Price Caches ---
 PRICE_CACHE = { 'price': None, 'timestamp': None, 'cache_duration': timedelta(minutes=5) }
 NFT_PRICE_CACHE = { 'price': None, 'timestamp': None, 'cache_duration': timedelta(minutes=5) }
@@ -144,27 +158,6 @@ PREDEFINED_LOOT = {
 
 # --- Database Functions ---
 
-def check_db_exists():
-    try:
-        conn = get_db_connection()
-        if conn is None: return False
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA table_info(inventory)")
-        columns = {row[1] for row in cursor.fetchall()}
-        required_columns = {'name', 'quantity', 'rarity', 'source', 'current_price', 'weight', 'tier'}
-        if not required_columns.issubset(columns):
-            print("Inventory table missing required columns")
-            conn.close(); return False
-        required_tables = ['gold_earnings', 'price_history', 'base_loot_prices', 'base_price_history', 'gold_price_history']
-        for table in required_tables:
-            cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table}'")
-            if not cursor.fetchone():
-                print(f"{table} table not found")
-                conn.close(); return False
-        conn.close(); return True
-    except Exception as e:
-        print(f"Error checking database: {str(e)}"); return False
-
 def get_db_connection():
     try:
         conn = sqlite3.connect(DB_PATH)
@@ -175,32 +168,43 @@ def get_db_connection():
         return None
 
 def init_db():
-    conn = get_db_connection()
-    if conn is None: return False
+    """Migrate the schema and seed the base loot prices if the table is empty"""
     try:
-        cursor = conn.cursor()
-        cursor.execute(''' CREATE TABLE IF NOT EXISTS inventory (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, quantity INTEGER NOT NULL, rarity TEXT NOT NULL, source TEXT NOT NULL, current_price REAL NOT NULL, weight REAL NOT NULL DEFAULT 1.0, tier INTEGER, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP) ''')
-        cursor.execute(''' CREATE TABLE IF NOT EXISTS price_history (id INTEGER PRIMARY KEY AUTOINCREMENT, item_id INTEGER NOT NULL, price REAL NOT NULL, timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP, FOREIGN KEY (item_id) REFERENCES inventory(id)) ''')
-        cursor.execute(''' CREATE TABLE IF NOT EXISTS base_loot_prices (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, source TEXT NOT NULL, rarity TEXT NOT NULL, base_price REAL NOT NULL, weight REAL NOT NULL, tier INTEGER, last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP, UNIQUE(name, source, rarity)) ''')
-        cursor.execute(''' CREATE TABLE IF NOT EXISTS base_price_history (id INTEGER PRIMARY KEY AUTOINCREMENT, base_loot_id INTEGER NOT NULL, price REAL NOT NULL, timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP, FOREIGN KEY (base_loot_id) REFERENCES base_loot_prices(id)) ''')
-        cursor.execute(''' CREATE TABLE IF NOT EXISTS gold_earnings (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT NOT NULL, amount REAL NOT NULL, source TEXT DEFAULT 'Quest', timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP) ''')
-        cursor.execute(''' CREATE TABLE IF NOT EXISTS gold_price_history (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, price REAL NOT NULL) ''')
-        # Removed: gear, equipped_gear, base_stats
-
-        # Keep initial base loot prices insertion
-        cursor.execute('SELECT COUNT(*) FROM base_loot_prices')
-        if cursor.fetchone()[0] == 0:
-            for source, rarities in PREDEFINED_LOOT.items():
-                for rarity, items in rarities.items():
-                    for item in items:
-                        cursor.execute(''' INSERT INTO base_loot_prices (name, source, rarity, base_price, weight, tier) VALUES (?, ?, ?, ?, ?, ?) ''', (item['name'], source, rarity, item['price'], item['weight'], item.get('tier')))
-                        base_loot_id = cursor.lastrowid
-                        cursor.execute(''' INSERT INTO base_price_history (base_loot_id, price) VALUES (?, ?) ''', (base_loot_id, item['price']))
-        conn.commit(); return True
+        ensure_schema(DB_PATH)
+        conn = get_db_connection()
+        if conn is None: return False
+        try:
+            with conn:
+                if conn.execute('SELECT COUNT(*) FROM base_loot_prices').fetchone()[0] == 0:
+                    conn.executemany(''' INSERT INTO base_loot_prices (name, source, rarity, base_price, weight, tier) VALUES (?, ?, ?, ?, ?, ?) ''', [
+                        (item['name'], source, rarity, item['price'], item['weight'], item.get('tier'))
+                        for source, rarities in PREDEFINED_LOOT.items()
+                        for rarity, items in rarities.items()
+                        for item in items
+                    ])
+                    conn.execute(''' INSERT INTO base_price_history (base_loot_id, price) SELECT id, base_price FROM base_loot_prices ''')
+        finally:
+            conn.close()
+        wallet_registry.bootstrap(investment=TOTAL_INVESTMENT)
+        return True
     except Exception as e:
         print(f"Error initializing database: {str(e)}"); return False
-    finally:
-        if conn: conn.close()
+
+_db_ready = False
+_db_lock = threading.Lock()
+
+def ensure_db():
+    """Run init_db() once per process; later calls only check a flag"""
+    global _db_ready
+    if not _db_ready:
+        with _db_lock:
+            if not _db_ready:
+                _db_ready = init_db()
+    return _db_ready
+
+@app.before_request
+def _init_db_on_first_request():
+    ensure_db()
 
 # --- Cache Helper Functions ---
 # (get_cached_gold_price, update_gold_price_cache, etc. kept as is)
@@ -216,6 +220,8 @@ def update_gold_price_cache(price):
     """Update the GOLD price cache"""
     PRICE_CACHE['price'] = price
     PRICE_CACHE['timestamp'] = datetime.now()
+    alert_engine.update('gold', price)
+    price_stream.publish_price('gold', price)
 
 def get_cached_nft_price():
     """Get NFT price (SOL) from cache if valid"""
@@ -229,6 +235,8 @@ def update_nft_price_cache(price):
     """Update the NFT price (SOL) cache"""
     NFT_PRICE_CACHE['price'] = price
     NFT_PRICE_CACHE['timestamp'] = datetime.now()
+    alert_engine.update('nft', price)
+    price_stream.publish_price('nft', price)
 
 def get_cached_sol_price():
     """Get SOL price (USD) from cache if valid"""
@@ -242,6 +250,8 @@ def update_sol_price_cache(price):
     """Update the SOL price (USD) cache"""
     SOL_PRICE_CACHE['price'] = price
     SOL_PRICE_CACHE['timestamp'] = datetime.now()
+    alert_engine.update('sol', price)
+    price_stream.publish_price('sol', price)
 
 
 # --- Price Fetching Functions ---
@@ -255,9 +265,10 @@ def get_solana_price(force_refresh=False):
         api_key = os.getenv('BIRDEYE_API_KEY')
         if not api_key: return SOL_PRICE_CACHE['price'] 
         sol_address = "So11111111111111111111111111111111111111112"
-        url = f"https://public-api.birdeye.so/defi/price?address={sol_address}"
+        url = f"{BIRDEYE_BASE_URL}/defi/price?address={sol_address}"
         headers = { "accept": "application/json", "x-chain": "solana", "X-API-KEY": api_key }
-        response = requests.get(url, headers=headers, timeout=5)
+        with span('birdeye'):
+            response = requests.get(url, headers=headers, timeout=5)
         response.raise_for_status()
         data = response.json()
         if data.get('success') and data.get('data') and 'value' in data['data']:
@@ -276,9 +287,10 @@ def get_nft_floor_price(force_refresh=False):
         if not force_refresh:
             cached_price = get_cached_nft_price()
             if cached_price is not None: return cached_price
-        url = "https://api-mainnet.magiceden.dev/v2/collections/defi_dungeons/stats" 
+        url = f"{MAGIC_EDEN_BASE_URL}/v2/collections/defi_dungeons/stats" 
         headers = { 'Accept': 'application/json' }
-        response = requests.get(url, headers=headers, timeout=10)
+        with span('magic_eden'):
+            response = requests.get(url, headers=headers, timeout=10)
         response.raise_for_status() 
         data = response.json()
         if data.get('floorPrice'):
@@ -299,9 +311,10 @@ def get_gold_token_price(force_refresh=False):
         api_key = os.getenv('BIRDEYE_API_KEY')
         if not api_key: return get_db_price() or 0.1
         gold_address = "GoLDDDNBPD72mSCYbC75GoFZ1e97Uczakp8yNi7JHrK4"
-        url = f"https://public-api.birdeye.so/defi/price?address={gold_address}"
+        url = f"{BIRDEYE_BASE_URL}/defi/price?address={gold_address}"
         headers = { "accept": "application/json", "x-chain": "solana", "X-API-KEY": api_key }
-        response = requests.get(url, headers=headers, timeout=5)
+        with span('birdeye'):
+            response = requests.get(url, headers=headers, timeout=5)
         response.raise_for_status()
         data = response.json()
         if data.get('success') and data.get('data') and 'value' in data['data']:
@@ -311,9 +324,11 @@ def get_gold_token_price(force_refresh=False):
                 conn = get_db_connection()
                 if conn:
                     try:
-                        c = conn.cursor()
-                        c.execute('INSERT INTO gold_price_history (timestamp, price) VALUES (?, ?)', (datetime.now().isoformat(), price))
-                        conn.commit()
+                        with span('db'):
+                            c = conn.cursor()
+                            # UTC, matching the points written by price_backfill.py
+                            c.execute('INSERT INTO gold_price_history (timestamp, price) VALUES (?, ?)', (datetime.utcnow().isoformat(), price))
+                            conn.commit()
                     except Exception as db_err: print(f"DB Error storing GOLD price: {db_err}")
                     finally: conn.close()
                 return price
@@ -327,19 +342,27 @@ def get_db_price():
     try:
         conn = get_db_connection()
         if conn:
-            c = conn.cursor()
-            c.execute('''
-                SELECT price 
-                FROM gold_price_history 
-                ORDER BY timestamp DESC 
-                LIMIT 1
-            ''')
-            result = c.fetchone()
+            with span('db'):
+                c = conn.cursor()
+                c.execute('''
+                    SELECT price 
+                    FROM gold_price_history 
+                    ORDER BY timestamp DESC 
+                    LIMIT 1
+                ''')
+                result = c.fetchone()
             conn.close()
             if result: return result[0]
     except Exception as e: print(f"Error getting GOLD price from database: {e}")
     return None
 
+# The price stream's refresher thread polls these while clients are connected
+price_stream.configure(
+    gold=lambda: get_gold_token_price(force_refresh=True),
+    sol=lambda: get_solana_price(force_refresh=True),
+    nft=lambda: get_nft_floor_price(force_refresh=True),
+)
+
 # --- Kept Endpoints ---
 
 @app.route('/nft/price', methods=['GET'])
@@ -350,12 +373,13 @@ def nft_price():
         sol_price_usd = get_solana_price()
         if nft_price_sol is not None and sol_price_usd is not None:
             nft_price_usd = nft_price_sol * sol_price_usd
-            return jsonify({
-                'price': nft_price_usd,
-                'price_sol': nft_price_sol,
-                'sol_usd': sol_price_usd,
-                'timestamp': NFT_PRICE_CACHE['timestamp'].isoformat() if NFT_PRICE_CACHE['timestamp'] else None,
-            })
+            with span('serialize'):
+                return jsonify({
+                    'price': nft_price_usd,
+                    'price_sol': nft_price_sol,
+                    'sol_usd': sol_price_usd,
+                    'timestamp': NFT_PRICE_CACHE['timestamp'].isoformat() if NFT_PRICE_CACHE['timestamp'] else None,
+                })
         else:
             return jsonify({'error': 'Failed to calculate NFT price in USD', 'price': None}), 500
     except Exception as e:
@@ -367,11 +391,12 @@ def gold_price():
     try:
         cached_price = get_cached_gold_price()
         price = cached_price if cached_price is not None else get_gold_token_price(force_refresh=True)
-        return jsonify({
-            'price': price,
-            'timestamp': PRICE_CACHE['timestamp'].isoformat() if PRICE_CACHE['timestamp'] else datetime.now().isoformat(),
-            'cached': cached_price is not None
-        })
+        with span('serialize'):
+            return jsonify({
+                'price': price,
+                'timestamp': PRICE_CACHE['timestamp'].isoformat() if PRICE_CACHE['timestamp'] else datetime.now().isoformat(),
+                'cached': cached_price is not None
+            })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -389,6 +414,60 @@ def handle_gold_earnings():
     except Exception as e:
         print(f"Error fetching gold earnings: {e}"); return jsonify([])
 
+@app.route('/quests/analytics', methods=['GET'])
+def quest_analytics():
+    """Quest yield and GOLD/hour per day, NFT and combat level from recent claims"""
+    try:
+        with span('analytics'):
+            analytics = QuestClaims.from_files().summary()
+        with span('serialize'):
+            return jsonify(analytics)
+    except Exception as e:
+        print(f"Error computing quest analytics: {e}")
+        return jsonify({'error': 'Failed to compute quest analytics'}), 500
+
+@app.route('/exchanges/summary', methods=['GET'])
+def exchanges_summary():
+    """Loot-exchange revenue: totals, rolling 1/7/30-day sums and daily history"""
+    try:
+        with span('exchanges'):
+            summary = exchange_ledger.summary()
+        with span('serialize'):
+            return jsonify(summary)
+    except Exception as e:
+        print(f"Error building exchange summary: {e}")
+        return jsonify({'error': 'Failed to build exchange summary'}), 500
+
+@app.route('/portfolio', methods=['GET'])
+def portfolio_value():
+    """Wallet holdings valued in GOLD and USD with change since the last snapshot; ?wallet=<id> for one wallet"""
+    try:
+        wallet_id = request.args.get('wallet')
+        if wallet_id and wallet_registry.get(wallet_id) is None:
+            return jsonify({'error': f'Unknown wallet {wallet_id}'}), 404
+        gold_usd = get_gold_token_price()
+        with span('portfolio'):
+            valuation = (wallet_registry.portfolio(wallet_id) if wallet_id else portfolio).value(gold_usd)
+        with span('serialize'):
+            return jsonify(valuation)
+    except Exception as e:
+        print(f"Error valuing portfolio: {e}")
+        return jsonify({'error': 'Failed to value portfolio'}), 500
+
+@app.route('/portfolio/item-prices', methods=['POST'])
+def set_item_prices():
+    """Price equipment by metadata id: [{itemMetadataId, price, name?}] or {prices: [...]}"""
+    body = request.get_json(silent=True)
+    prices = body if isinstance(body, list) else (body or {}).get('prices') or []
+    try:
+        updated = portfolio.set_item_prices(prices)
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error setting item prices: {e}")
+        return jsonify({'error': 'Failed to set item prices'}), 500
+    return jsonify({'updated': updated})
+
 @app.route('/inventory', methods=['GET'])
 def handle_inventory():
     """Get all inventory items"""
@@ -406,13 +485,24 @@ def handle_inventory():
 
 @app.route('/roi/stats', methods=['GET'])
 def get_roi_stats():
-    """Get ROI statistics"""
+    """Get ROI statistics for the fleet, or for one wallet with ?wallet=<id>"""
     try:
+        wallet_id = request.args.get('wallet')
+        # Registry basis (investment plus NFT costs); the constant until wallets are registered
+        total_investment = wallet_registry.basis(wallet_id)
+        if wallet_id and total_investment is None:
+            return jsonify({'error': f'Unknown wallet {wallet_id}'}), 404
+        if total_investment is None:
+            total_investment = TOTAL_INVESTMENT
         conn = get_db_connection()
         if not conn: return jsonify({ 'error': 'DB connection failed for ROI stats'}), 500
-        c = conn.cursor()
-        c.execute('SELECT SUM(amount) as total, COUNT(DISTINCT date) as days, MIN(date) as start_date FROM gold_earnings')
-        result = c.fetchone()
+        with span('db'):
+            c = conn.cursor()
+            if wallet_id:
+                c.execute('SELECT SUM(amount) as total, COUNT(DISTINCT date) as days, MIN(date) as start_date FROM gold_earnings WHERE wallet_id = ?', (wallet_id,))
+            else:
+                c.execute('SELECT SUM(amount) as total, COUNT(DISTINCT date) as days, MIN(date) as start_date FROM gold_earnings')
+            result = c.fetchone()
         total_earnings = result['total'] if result['total'] else 0
         total_days = result['days'] if result['days'] else 1
         start_date = result['start_date'] if result['start_date'] else datetime.now().strftime('%Y-%m-%d')
@@ -421,7 +511,6 @@ def get_roi_stats():
         # Ensure gold price is valid before calculation
         current_gold_price_num = current_gold_price if isinstance(current_gold_price, (int, float)) else 0
         current_value_usd = total_earnings * current_gold_price_num
-        total_investment = 475 # Constant investment amount (Adjust if needed)
         roi_percentage = ((current_value_usd - total_investment) / total_investment) * 100 if total_investment > 0 else 0
         projected_monthly = daily_average * 30
         daily_average_usd = daily_average * current_gold_price_num
@@ -429,31 +518,192 @@ def get_roi_stats():
         if daily_average_usd > 0:
             remaining_value = max(0, total_investment - current_value_usd)
             days_to_roi = remaining_value / daily_average_usd
+        if not wallet_id:
+            alert_engine.update('roi', roi_percentage)
         daily_apy = 0
         apy = 0
         if total_days > 0 and total_investment > 0:
             daily_apy = (daily_average_usd / total_investment) * 100
             apy = ((1 + (daily_apy / 100)) ** 365 - 1) * 100
+        # Exchange revenue is reported alongside, not added to total_earnings: it
+        # comes from selling loot whose GOLD value quest claims already count
+        with span('exchanges'):
+            ledger = wallet_registry.ledger(wallet_id) if wallet_id else exchange_ledger
+            exchange_revenue, exchange_daily_average = ledger.revenue()
+        # Mark-to-market view: what the wallet holds now against the investment
+        with span('portfolio'):
+            # The wallet's own holdings against its own basis
+            holdings = (wallet_registry.portfolio(wallet_id) if wallet_id else portfolio).value(current_gold_price_num)
+        holdings_roi_percentage = ((holdings['total_usd'] - total_investment) / total_investment) * 100 if total_investment > 0 else 0
         if total_days >= 30: prediction_confidence = 'HIGH'
         elif total_days >= 14: prediction_confidence = 'MEDIUM'
         else: prediction_confidence = 'LOW'
         conn.close()
-        return jsonify({
-            'total_investment': total_investment,
-            'total_earnings': total_earnings, # Keep this as GOLD amount for clarity?
-            'daily_average': daily_average, # Keep as GOLD?
-            'projected_monthly': projected_monthly, # Keep as GOLD?
-            'days_to_roi': days_to_roi,
-            'roi_percentage': roi_percentage,
-            'current_value_usd': current_value_usd,
-            'prediction_confidence': prediction_confidence,
-            'daily_apy': daily_apy,
-            'apy': apy,
-        })
+        with span('serialize'):
+            return jsonify({
+                'total_investment': total_investment,
+                'total_earnings': total_earnings, # Keep this as GOLD amount for clarity?
+                'daily_average': daily_average, # Keep as GOLD?
+                'projected_monthly': projected_monthly, # Keep as GOLD?
+                'days_to_roi': days_to_roi,
+                'roi_percentage': roi_percentage,
+                'current_value_usd': current_value_usd,
+                'prediction_confidence': prediction_confidence,
+                'daily_apy': daily_apy,
+                'apy': apy,
+                'exchange_revenue': exchange_revenue,
+                'exchange_revenue_usd': exchange_revenue * current_gold_price_num,
+                'exchange_daily_average': exchange_daily_average,
+                'holdings_gold': holdings['total_gold'],
+                'holdings_usd': holdings['total_usd'],
+                'holdings_roi_percentage': holdings_roi_percentage,
+            })
     except Exception as e:
         print(f"Error calculating ROI stats: {e}")
         return jsonify({ 'error': 'Failed to calculate ROI stats'}), 500
 
+@lru_cache(maxsize=SENSITIVITY_CACHE_SIZE)
+def _roi_sensitivity(wallet_id, earnings_version, gold_price, sol_price, nft_floor, investment, nft_count, spread):
+    """Sensitivity for one price snapshot; earnings_version (MAX(id) of gold_earnings) invalidates on sync"""
+    conn = get_db_connection()
+    if not conn: raise RuntimeError('DB connection failed for ROI sensitivity')
+    try:
+        with span('db'):
+            if wallet_id:
+                row = conn.execute('SELECT SUM(amount) as total, COUNT(DISTINCT date) as days FROM gold_earnings WHERE wallet_id = ?', (wallet_id,)).fetchone()
+            else:
+                row = conn.execute('SELECT SUM(amount) as total, COUNT(DISTINCT date) as days FROM gold_earnings').fetchone()
+    finally:
+        conn.close()
+    total_earnings = row['total'] if row['total'] else 0
+    daily_average = total_earnings / (row['days'] if row['days'] else 1)
+    with span('model'):
+        return sensitivity({
+            'investment': investment,
+            'gold_price': gold_price,
+            'daily_average': daily_average,
+            'total_earnings': total_earnings,
+            'nft_floor': nft_floor,
+            'sol_price': sol_price,
+        }, nft_count=nft_count, spread=spread)
+
+@app.route('/roi/sensitivity', methods=['GET'])
+def get_roi_sensitivity():
+    """Partial derivatives and tornado ranges of days-to-breakeven and APY per ROI input.
+
+    Query: wallet, investment (defaults to the /roi/stats basis), nft_count
+    (defaults to the registered NFTs, at least 1) and spread (tornado
+    low/high as a fraction, default 0.2).
+    """
+    try:
+        wallet_id = request.args.get('wallet')
+        wallet = wallet_registry.get(wallet_id) if wallet_id else None
+        if wallet_id and wallet is None:
+            return jsonify({'error': f'Unknown wallet {wallet_id}'}), 404
+        try:
+            investment = request.args.get('investment', type=float)
+            spread = request.args.get('spread', 0.2, type=float)
+            nft_count = request.args.get('nft_count', type=int)
+            if not 0 < spread < 1:
+                raise ValueError('spread must be between 0 and 1')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        investment_source = 'query'
+        if investment is None:
+            investment = wallet_registry.basis(wallet_id)
+            investment_source = 'registry'
+        if investment is None:
+            investment, investment_source = TOTAL_INVESTMENT, 'default'
+        if nft_count is None:
+            wallets = [wallet] if wallet else wallet_registry.wallets()
+            nft_count = max(sum(len(w['nfts']) for w in wallets), 1)
+
+        conn = get_db_connection()
+        if not conn: return jsonify({'error': 'DB connection failed for ROI sensitivity'}), 500
+        try:
+            earnings_version = conn.execute('SELECT MAX(id) FROM gold_earnings').fetchone()[0]
+        finally:
+            conn.close()
+        gold_price = get_gold_token_price()
+        result = _roi_sensitivity(wallet_id, earnings_version,
+                                  float(gold_price) if isinstance(gold_price, (int, float)) else 0.0,
+                                  float(get_solana_price() or 0), float(get_nft_floor_price() or 0),
+                                  float(investment), nft_count, spread)
+        with span('serialize'):
+            return jsonify({**result, 'wallet_id': wallet_id, 'investment_source': investment_source,
+                            'calculator_investment': INITIAL_INVESTMENT})
+    except Exception as e:
+        print(f"Error calculating ROI sensitivity: {e}")
+        return jsonify({'error': 'Failed to calculate ROI sensitivity'}), 500
+
+@app.route('/fleet/wallets', methods=['GET'])
+def list_fleet_wallets():
+    """Registered wallets with their NFTs and investment basis"""
+    try:
+        include_inactive = request.args.get('all') == '1'
+        return jsonify(wallet_registry.wallets(include_inactive=include_inactive))
+    except Exception as e:
+        print(f"Error listing wallets: {e}")
+        return jsonify({'error': 'Failed to list wallets'}), 500
+
+@app.route('/fleet/wallets', methods=['POST'])
+def register_fleet_wallet():
+    """Add or update a wallet: {wallet_id, label?, investment?, nfts?: [{nft_id, label?, cost?}]}"""
+    body = request.get_json(silent=True) or {}
+    try:
+        wallet = wallet_registry.register(body.get('wallet_id'), label=body.get('label'),
+                                          investment=body.get('investment'), nfts=body.get('nfts') or ())
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error registering wallet: {e}")
+        return jsonify({'error': 'Failed to register wallet'}), 500
+    return jsonify(wallet), 201
+
+@app.route('/fleet/wallets/<wallet_id>', methods=['DELETE'])
+def remove_fleet_wallet(wallet_id):
+    """Stop syncing a wallet; its earnings stay in gold_earnings"""
+    try:
+        if not wallet_registry.deactivate(wallet_id):
+            return jsonify({'error': f'Unknown wallet {wallet_id}'}), 404
+        return jsonify({'wallet_id': wallet_id, 'active': False})
+    except Exception as e:
+        print(f"Error removing wallet: {e}")
+        return jsonify({'error': 'Failed to remove wallet'}), 500
+
+@app.route('/fleet/roi', methods=['GET'])
+def fleet_roi():
+    """Quest earnings and ROI per wallet against its own basis, with fleet-wide totals"""
+    try:
+        current_gold_price = get_gold_token_price()
+        gold_usd = current_gold_price if isinstance(current_gold_price, (int, float)) else 0
+        with span('fleet'):
+            stats = wallet_registry.roi(gold_usd)
+        with span('serialize'):
+            return jsonify(stats)
+    except Exception as e:
+        print(f"Error calculating fleet ROI: {e}")
+        return jsonify({'error': 'Failed to calculate fleet ROI'}), 500
+
+@app.route('/roi/realized', methods=['GET'])
+def get_realized_roi():
+    """Earnings valued at the GOLD price on the day earned versus today's price; ?wallet=<id> for one wallet"""
+    try:
+        wallet_id = request.args.get('wallet')
+        total_investment = wallet_registry.basis(wallet_id)
+        if wallet_id and total_investment is None:
+            return jsonify({'error': f'Unknown wallet {wallet_id}'}), 404
+        if total_investment is None:
+            total_investment = TOTAL_INVESTMENT
+        current_gold_price = get_gold_token_price()
+        with span('asof_join'):
+            stats = realized_roi(current_gold_price, total_investment, wallet_id=wallet_id)
+        with span('serialize'):
+            return jsonify(stats)
+    except Exception as e:
+        print(f"Error calculating realized ROI: {e}")
+        return jsonify({'error': 'Failed to calculate realized ROI'}), 500
+
 @app.route('/market/analysis', methods=['GET'])
 def market_analysis():
     """Get market analysis focused on loot recommendations"""
@@ -480,30 +730,164 @@ def market_analysis():
         print(f"Error in market analysis: {str(e)}")
         return jsonify({ "recommendations": [], "message": "Error fetching market analysis." })
 
+@app.route('/market/optimize', methods=['GET', 'POST'])
+def market_optimize():
+    """Choose which loot to sell within a weight (or slot) budget to maximize GOLD"""
+    try:
+        body = request.get_json(silent=True) or {}
+        budget = int(body.get('budget', request.args.get('budget', 0)))
+        budget_type = body.get('budget_type', request.args.get('budget_type', 'weight'))
+        holdings = body.get('holdings')
+        if holdings is None:
+            # Default to the tracked inventory
+            conn = get_db_connection()
+            with span('db'):
+                rows = conn.execute("SELECT name, quantity, current_price, weight FROM inventory").fetchall()
+            conn.close()
+            holdings = [{'name': r['name'], 'quantity': r['quantity'], 'price': r['current_price'], 'weight': r['weight']} for r in rows]
+        with span('optimize'):
+            plan = sell_optimizer.optimize(holdings, budget, budget_type)
+        return jsonify(plan)
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error optimizing sales: {e}")
+        return jsonify({'error': 'Failed to optimize sales'}), 500
+
+@app.route('/planner/plan', methods=['GET', 'POST'])
+def planner_plan():
+    """Quest and dungeon schedule maximizing expected GOLD/day.
+
+    Accepts combat_level, budget_hours (default 24), balances (asset id ->
+    amount, default fungible_balances.json) and loot_values (dungeon id ->
+    GOLD per kill, default the mean dungeon loot price of its tier).
+    """
+    try:
+        body = request.get_json(silent=True) or {}
+        combat_level = body.get('combat_level', request.args.get('combat_level'))
+        budget_hours = body.get('budget_hours', request.args.get('budget_hours', HORIZON_HOURS))
+        conn = get_db_connection()
+        if not conn: return jsonify({'error': 'DB connection failed for planner'}), 500
+        with span('db'):
+            rows = conn.execute("SELECT tier, AVG(base_price) AS price FROM base_loot_prices WHERE source = 'dungeon' AND tier IS NOT NULL GROUP BY tier").fetchall()
+        conn.close()
+        with span('plan'):
+            plan = dungeon_planner.plan({r['tier']: r['price'] for r in rows}, combat_level=combat_level,
+                                        budget_hours=budget_hours, balances=body.get('balances'),
+                                        loot_values=body.get('loot_values'))
+        return jsonify(plan)
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error planning dungeon runs: {e}")
+        return jsonify({'error': 'Failed to plan dungeon runs'}), 500
+
+@app.route('/alerts', methods=['GET'])
+def list_alerts():
+    """Registered price/ROI threshold alerts"""
+    return jsonify(alert_engine.list())
+
+@app.route('/alerts', methods=['POST'])
+def register_alerts():
+    """Register one alert or a list: {metric, threshold, direction, once, label}"""
+    body = request.get_json(silent=True)
+    specs = body if isinstance(body, list) else (body or {}).get('alerts', [body] if body else [])
+    try:
+        return jsonify(alert_engine.register(specs)), 201
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/alerts/<int:alert_id>', methods=['DELETE'])
+def delete_alert(alert_id):
+    if not alert_engine.remove(alert_id):
+        return jsonify({'error': 'Alert not found'}), 404
+    return jsonify({'deleted': alert_id})
+
+@app.route('/alerts/events', methods=['GET'])
+def alert_events():
+    """Recent alert events after ?since=<event id>"""
+    return jsonify(alert_stream.since(request.args.get('since', 0, type=int)))
+
+@app.route('/alerts/stream', methods=['GET'])
+def stream_alerts():
+    """Server-Sent Events feed of alert events; resumes after Last-Event-ID"""
+    last_id = request.headers.get('Last-Event-ID', type=int) or request.args.get('last_id', 0, type=int)
+    return Response(alert_stream.stream(last_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/prices/stream', methods=['GET'])
+def stream_prices():
+    """Server-Sent Events feed of GOLD/SOL/NFT price changes; resumes after Last-Event-ID"""
+    last_id = request.headers.get('Last-Event-ID', type=int) or request.args.get('last_id', type=int)
+    return Response(price_stream.subscribe(last_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/data/<path:filename>')
 def serve_data(filename):
     """Serve JSON data files from the 'data' directory"""
     try:
         base_dir = os.path.dirname(os.path.abspath(__file__))
-        data_dir = os.path.join(base_dir, '..', 'data')
+        # Written by data_fetcher.py (run from backend/)
+        data_dir = os.path.join(base_dir, 'data')
         return send_from_directory(data_dir, filename)
-    except FileNotFoundError:
+    except (FileNotFoundError, NotFound):
         print(f"File not found: {os.path.join(data_dir, filename)}")
         return jsonify({'error': f'File not found: {filename}'}), 404
     except Exception as e:
         print(f"Error serving file {filename}: {e}")
         return jsonify({'error': f'Error serving file: {filename}'}), 500
 
+@app.route('/api/proxy/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE'])
+def proxy_game_api(path):
+    """Forward a game API call, streaming the upstream body back"""
+    return ProxyService.forward_request(
+        f'/{path}',
+        method=request.method,
+        headers=request.headers,
+        data=request.get_json(silent=True),
+        params=request.args.to_dict(flat=False)
+    )
+
+@app.route('/metrics/upstream', methods=['GET'])
+def upstream_metrics():
+    """Game API queue wait times per priority lane and proxy cache counters"""
+    return jsonify({
+        'scheduler': upstream_scheduler.stats(),
+        'proxy_cache': proxy_cache.stats(),
+    })
+
+@app.route('/debug/profiles', methods=['GET'])
+def list_profiles():
+    """Recent request/call profiles, newest first; ?min_ms= filters to slow ones"""
+    if not profiles_readable(request.headers.get(PROFILE_HEADER), request.remote_addr):
+        return jsonify({'error': 'Invalid profile token'}), 403
+    return jsonify(profile_store.index(min_ms=request.args.get('min_ms', 0, type=int),
+                                       limit=request.args.get('limit', 50, type=int)))
+
+@app.route('/debug/profiles/<path:filename>', methods=['GET'])
+def download_profile(filename):
+    """One profile file (.pstats for pstats/snakeviz, .collapsed for flamegraph.pl)"""
+    if not profiles_readable(request.headers.get(PROFILE_HEADER), request.remote_addr):
+        return jsonify({'error': 'Invalid profile token'}), 403
+    return send_from_directory(os.path.abspath(profile_store.directory), filename, as_attachment=True)
+
 # --- Initialization ---
-print("Checking database...")
-if not check_db_exists():
-    print("Database not found or incomplete, initializing...")
-    if init_db():
-        print("Database initialized successfully.")
-    else:
-        print("Failed to initialize database!")
-else:
-    print("Database exists and is ready")
+def create_app(eager=False):
+    """Application factory for WSGI servers and tests (``gunicorn 'app:create_app()'``).
+
+    Importing this module registers routes and middleware without touching
+    the database or starting threads. Tracing (with its log listener) and
+    profiling are set up on the first call. The schema is migrated and
+    seeded once per process, on the first request, or immediately with
+    ``eager=True``.
+    """
+    if 'tracing' not in app.extensions:
+        init_tracing(app)
+        init_profiling(app)
+        app.extensions['tracing'] = True
+    if eager:
+        ensure_db()
+    return app
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000) 
\ No newline at end of file
+    create_app(eager=True).run(debug=True, port=5000)
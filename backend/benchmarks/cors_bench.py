@@ -0,0 +1,140 @@
+"""Micro-benchmark of per-request CORS/security-header overhead.
+
+Calls a minimal Flask app directly through WSGI (no sockets) with three
+setups and reports microseconds per request as JSON:
+
+    bare        no CORS or security headers (baseline)
+    legacy      flask_cors.CORS plus an after_request header hook, as app.py did before
+    middleware  middleware.cors.CorsMiddleware
+
+    cd backend && python -m benchmarks.cors_bench --iterations 20000
+"""
+import argparse
+import json
+import sys
+import time
+from flask import Flask, jsonify, request
+from werkzeug.test import EnvironBuilder
+from middleware.cors import CorsMiddleware, SECURITY_HEADERS
+
+ORIGIN = 'http://localhost:3000'
+PROXY_METHODS = ('GET', 'POST', 'PUT', 'DELETE', 'OPTIONS')
+PROXY_HEADERS = ('Content-Type', 'Authorization', 'x-selected-wallet-address')
+
+CASES = {
+    'get': dict(path='/api/prices', method='GET', headers={'Origin': ORIGIN}),
+    'preflight': dict(path='/api/prices', method='OPTIONS', headers={
+        'Origin': ORIGIN, 'Access-Control-Request-Method': 'GET'}),
+    'proxy_preflight': dict(path='/api/proxy/user/gold-stat/me', method='OPTIONS', headers={
+        'Origin': ORIGIN, 'Access-Control-Request-Method': 'GET',
+        'Access-Control-Request-Headers': 'x-selected-wallet-address'}),
+}
+
+
+def _base_app():
+    app = Flask(__name__)
+
+    @app.route('/api/prices')
+    def prices():
+        return jsonify({'price': 1.0})
+
+    @app.route('/api/proxy/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE'])
+    def proxy(path):
+        return jsonify({})
+
+    return app
+
+
+def build_bare():
+    return _base_app().wsgi_app
+
+
+def build_legacy():
+    from flask_cors import CORS
+
+    app = _base_app()
+    CORS(app, resources={r"/*": {
+        "origins": [ORIGIN],
+        "methods": ["GET", "OPTIONS"],
+        "allow_headers": ["Content-Type"],
+        "supports_credentials": True,
+        "send_wildcard": False,
+        "max_age": 3600,
+    }})
+
+    @app.after_request
+    def add_security_headers(response):
+        origin = request.headers.get('Origin')
+        if origin == ORIGIN:
+            response.headers['Access-Control-Allow-Origin'] = origin
+            response.headers['Access-Control-Allow-Credentials'] = 'true'
+            if request.method == 'OPTIONS':
+                if request.path.startswith('/api/proxy/'):
+                    response.headers['Access-Control-Allow-Methods'] = ', '.join(PROXY_METHODS)
+                    response.headers['Access-Control-Allow-Headers'] = ', '.join(PROXY_HEADERS)
+                else:
+                    response.headers['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
+                    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+                response.headers['Access-Control-Max-Age'] = '3600'
+        for name, value in SECURITY_HEADERS:
+            response.headers[name] = value
+        return response
+
+    return app.wsgi_app
+
+
+def build_middleware():
+    app = _base_app()
+    return CorsMiddleware(app.wsgi_app, [ORIGIN], resources={'/api/proxy/': (PROXY_METHODS, PROXY_HEADERS)})
+
+
+def _start_response(status, headers, exc_info=None):
+    return None
+
+
+def time_case(wsgi_app, case, iterations):
+    """Mean microseconds per request for one case"""
+    environ = EnvironBuilder(**case).get_environ()
+    # Warm up routing and any lazily built state
+    for _ in range(200):
+        body = wsgi_app(dict(environ), _start_response)
+        b''.join(body)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        body = wsgi_app(dict(environ), _start_response)
+        b''.join(body)
+        if hasattr(body, 'close'):
+            body.close()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CORS/security header overhead')
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    setups = {'bare': build_bare, 'middleware': build_middleware}
+    try:
+        import flask_cors  # noqa: F401
+        setups['legacy'] = build_legacy
+    except ImportError:
+        print('flask_cors not installed; skipping legacy setup', file=sys.stderr)
+
+    results = {}
+    for setup, build in setups.items():
+        wsgi_app = build()
+        results[setup] = {name: round(time_case(wsgi_app, case, args.iterations), 2) for name, case in CASES.items()}
+
+    # Overhead relative to the bare app, per case
+    for setup in results:
+        if setup != 'bare':
+            results[setup]['overhead_us'] = {
+                name: round(results[setup][name] - results['bare'][name], 2) for name in CASES
+            }
+
+    json.dump({'iterations': args.iterations, 'us_per_request': results}, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""Benchmark app.py endpoints and DefiDungeonCalculator on synthetic data.
+
+Builds seeded fixtures with benchmarks.synthetic_db, points Birdeye and Magic
+Eden at benchmarks.stub_birdeye, then times each endpoint through the Flask
+test client and each calculator method directly. Results are JSON; pass a
+previous run as --baseline to flag targets whose p50 regressed by more than
+--threshold (exit status 1):
+
+    cd backend && python -m benchmarks.endpoint_bench --scale large --fixture-dir /tmp/bench_large --output endpoint_bench.json
+    python -m benchmarks.endpoint_bench --scale large --fixture-dir /tmp/bench_large --baseline endpoint_bench.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from benchmarks.fetch_bench import _latency_summary, _peak_rss_mb
+from benchmarks.stub_birdeye import start_stub
+from benchmarks.synthetic_db import build_app_db
+from services import price_history
+
+SCALES = {
+    'small': dict(earnings=10_000, prices=50_000, inventory=500),
+    'medium': dict(earnings=100_000, prices=500_000, inventory=5_000),
+    'large': dict(earnings=1_000_000, prices=5_000_000, inventory=50_000),
+}
+ENDPOINTS = ('/roi/stats', '/market/analysis', '/gold/earnings', '/inventory', '/nft/price')
+CALCULATOR_METHODS = ('get_gold_earnings', 'get_inventory', 'calculate_current_value', 'predict_roi',
+                      'calculate_24h_change', 'get_market_analysis', 'get_sell_recommendations')
+# Methods that need the optional dungeon_strategy module
+STRATEGY_METHODS = ('get_market_analysis', 'get_sell_recommendations')
+
+
+def _time_calls(call, iterations, budget_s):
+    """Cold first call, then up to ``iterations`` more until ``budget_s`` is spent"""
+    start = time.perf_counter()
+    result = call()
+    cold = time.perf_counter() - start
+    samples = []
+    deadline = time.perf_counter() + budget_s
+    while len(samples) < iterations and time.perf_counter() < deadline:
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return result, cold, samples
+
+
+def _summary(cold, samples):
+    summary = _latency_summary(samples) if samples else {'count': 0}
+    summary['cold_ms'] = round(cold * 1000, 3)
+    return summary
+
+
+def bench_endpoints(iterations, budget_s):
+    import app as app_module
+
+    client = app_module.create_app(eager=True).test_client()
+    results = []
+    for path in ENDPOINTS:
+        response, cold, samples = _time_calls(lambda: client.get(path), iterations, budget_s)
+        results.append({'kind': 'endpoint', 'target': path, 'status': response.status_code,
+                        'response_bytes': len(response.get_data()), **_summary(cold, samples)})
+    return results
+
+
+def bench_calculator(db_path, iterations, budget_s):
+    from defi_dungeon_calculator import DefiDungeonCalculator
+
+    calculator = DefiDungeonCalculator(db_path=db_path)
+    results = []
+    for name in CALCULATOR_METHODS:
+        if name in STRATEGY_METHODS and calculator.strategy is None:
+            results.append({'kind': 'calculator', 'target': name, 'skipped': 'dungeon_strategy not installed'})
+            continue
+        _, cold, samples = _time_calls(getattr(calculator, name), iterations, budget_s)
+        results.append({'kind': 'calculator', 'target': name, **_summary(cold, samples)})
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Targets whose p50 grew by more than ``threshold`` (fraction) and ``min_delta_ms``"""
+    previous = {(r['kind'], r['target']): r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        before = previous.get((result['kind'], result['target']))
+        if not before or 'p50_ms' not in before or 'p50_ms' not in result:
+            continue
+        delta = result['p50_ms'] - before['p50_ms']
+        if delta > min_delta_ms and result['p50_ms'] > before['p50_ms'] * (1 + threshold):
+            regressions.append({'kind': result['kind'], 'target': result['target'],
+                                'baseline_p50_ms': before['p50_ms'], 'p50_ms': result['p50_ms'],
+                                'change': round(delta / before['p50_ms'], 3) if before['p50_ms'] else None})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--earnings', type=int, help='override the scale\'s gold_earnings rows')
+    parser.add_argument('--prices', type=int, help='override the scale\'s gold_price_history rows')
+    parser.add_argument('--inventory', type=int, help='override the scale\'s inventory rows')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=20, help='warm calls per target')
+    parser.add_argument('--budget-s', type=float, default=10.0, help='stop repeating a target after this long')
+    parser.add_argument('--fixture-dir', help='build fixtures here once and reuse them on later runs')
+    parser.add_argument('--target', choices=['endpoints', 'calculator', 'both'], default='both')
+    parser.add_argument('--baseline', help='previous results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed p50 slowdown as a fraction')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='ignore slowdowns smaller than this')
+    parser.add_argument('--output', help='write results JSON here as well as stdout')
+    args = parser.parse_args()
+
+    scale = dict(SCALES[args.scale])
+    scale.update({k: getattr(args, k) for k in scale if getattr(args, k) is not None})
+    workdir = os.path.abspath(args.fixture_dir) if args.fixture_dir else tempfile.mkdtemp(prefix='endpoint_bench_')
+    os.makedirs(workdir, exist_ok=True)
+    app_db = os.path.join(workdir, 'defi_dungeons.db')
+    server, state, base_url = start_stub()
+    cwd = os.getcwd()
+
+    # price_history is already imported (by the stub), so its base URLs are
+    # patched directly; app and the calculator copy them on import
+    os.environ['BIRDEYE_API_KEY'] = 'bench'
+    price_history.BIRDEYE_BASE_URL = price_history.MAGIC_EDEN_BASE_URL = base_url
+    fixture = {'dir': workdir, 'reused': os.path.exists(app_db)}
+    results = []
+    try:
+        # app.py and the services resolve defi_dungeons.db and data/ relative to the cwd
+        os.chdir(workdir)
+        with contextlib.redirect_stdout(sys.stderr):
+            start = time.perf_counter()
+            if not os.path.exists(app_db):
+                fixture['app'] = build_app_db(app_db, seed=args.seed, **scale)
+            fixture['build_time_s'] = round(time.perf_counter() - start, 2)
+
+            if args.target != 'calculator':
+                results += bench_endpoints(args.iterations, args.budget_s)
+            if args.target != 'endpoints':
+                results += bench_calculator(app_db, args.iterations, args.budget_s)
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+        if not args.fixture_dir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'config': {**vars(args), **scale},
+        'fixture': fixture,
+        'peak_rss_mb': _peak_rss_mb(),
+        'upstream_requests': state.snapshot()['requests'],
+        'results': results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['regressions'] = compare(results, json.load(f), args.threshold, args.min_delta_ms)
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    if report.get('regressions'):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
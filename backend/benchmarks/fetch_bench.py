@@ -0,0 +1,152 @@
+"""Benchmark the fetch pipeline against the local stub game API.
+
+Runs DataFetcher.fetch_all() and/or NightvaleDataFetcher.fetch_all_data()
+against benchmarks.stub_game_api and reports wall time, peak RSS, bytes
+transferred and per-endpoint latency as JSON. Each run happens in a fresh
+worker process, so its peak RSS covers that run alone and not the stub or
+earlier runs:
+
+    cd backend && python -m benchmarks.fetch_bench --records 100000 --latency-ms 20 --output fetch_bench.json
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from urllib.parse import urlsplit
+from benchmarks.stub_game_api import start_stub, load_recorded
+
+
+def _latency_summary(samples):
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p50_ms': round(ordered[len(ordered) // 2] * 1000, 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+def _peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _measure(name, run_dir, warm_cache_dir=None):
+    """Worker process: run one fetch target in ``run_dir`` and time it"""
+    os.chdir(run_dir)
+    from services.game_api import game_api
+    from data_fetcher import DataFetcher  # configures its log file inside run_dir
+    from fetch_nightvale_data import NightvaleDataFetcher
+    logging.getLogger().setLevel(logging.WARNING)
+
+    game_api.cache_dir = warm_cache_dir or os.path.join(run_dir, 'http_cache')
+    os.makedirs(game_api.cache_dir, exist_ok=True)
+
+    latencies = defaultdict(list)
+
+    def record(response, *args, **kwargs):
+        latencies[urlsplit(response.url).path].append(response.elapsed.total_seconds())
+
+    game_api.session.hooks['response'] = [record]
+
+    # Keep the fetchers' progress prints off stdout so the report stays parseable
+    with contextlib.redirect_stdout(sys.stderr):
+        start = time.perf_counter()
+        if name == 'fetch_all':
+            DataFetcher().fetch_all()
+        else:
+            NightvaleDataFetcher().fetch_all_data()
+        wall = time.perf_counter() - start
+    return {
+        'wall_time_s': round(wall, 4),
+        'peak_rss_mb': _peak_rss_mb(),
+        'endpoints': {path: _latency_summary(samples) for path, samples in sorted(latencies.items())},
+    }
+
+
+def run_target(name, workdir, state, warm_cache_dir=None):
+    """Run one fetch target in a fresh working directory and worker process and measure it"""
+    run_dir = os.path.join(workdir, name, 'backend')
+    os.makedirs(run_dir)
+    before = state.snapshot()
+    # A spawned process per run: no memory from the stub, imports or earlier runs
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+        measured = executor.submit(_measure, name, run_dir, warm_cache_dir).result()
+    after = state.snapshot()
+    return {
+        'target': name,
+        'wall_time_s': measured['wall_time_s'],
+        'peak_rss_mb': measured['peak_rss_mb'],
+        'bytes_transferred': after['total_bytes'] - before['total_bytes'],
+        'requests': sum(after['requests'].values()) - sum(before['requests'].values()),
+        'errors': sum(after['errors'].values()) - sum(before['errors'].values()),
+        'endpoints': measured['endpoints'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', choices=['fetch_all', 'nightvale', 'both'], default='both')
+    parser.add_argument('--records', type=int, default=0, help='records synthesized per scaled feed')
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--warm', action='store_true', help='reuse the HTTP cache between repeats')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results JSON here as well as stdout')
+    args = parser.parse_args()
+
+    server, state, base_url = start_stub(records=args.records, latency_ms=args.latency_ms,
+                                         error_rate=args.error_rate, seed=args.seed)
+    wallet = next((claim['walletId'] for claim in load_recorded('recent_quest_claims.json')), '')
+    workdir = tempfile.mkdtemp(prefix='fetch_bench_')
+    cwd = os.getcwd()
+
+    # Inherited by the worker processes, which import the fetch modules
+    os.environ.update({
+        'GAME_API_BASE_URL': base_url,
+        'GAME_API_CACHE_DIR': os.path.join(workdir, 'http_cache'),
+        'GAME_API_RATE': '100000',
+        'GAME_API_BURST': '100000',
+        'NIGHTVALE_WALLET_ADDRESS': wallet,
+        'NIGHTVALE_BEARER_TOKEN': 'bench',
+    })
+    os.chdir(workdir)
+
+    targets = ['fetch_all', 'nightvale'] if args.target == 'both' else [args.target]
+    results = []
+    try:
+        for repeat in range(args.repeat):
+            for target in targets:
+                warm_dir = os.path.join(workdir, f'warm_cache_{target}') if args.warm else None
+                result = run_target(target, os.path.join(workdir, f'run{repeat}'), state, warm_dir)
+                result['repeat'] = repeat
+                results.append(result)
+    finally:
+        os.chdir(cwd)
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'config': vars(args),
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+
+if __name__ == '__main__':
+    main()
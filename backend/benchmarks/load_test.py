@@ -0,0 +1,242 @@
+"""Concurrent load test replaying the frontend's mix of backend calls.
+
+Sends a weighted mix of /roi/stats, price, /data/* and game API proxy requests
+at a fixed rate (open loop, so latency includes time queued behind slow
+requests) or as fast as --concurrency workers allow (--rate 0). Reports
+throughput, latency percentiles, status and error counts per endpoint, and
+how often SQLite reported "database is locked".
+
+By default the backend runs in-process on a synthetic database with Birdeye,
+Magic Eden and the game API stubbed, so lock errors printed by the app are
+counted too. --base-url targets a backend that is already running instead
+(lock errors are then only seen in response bodies):
+
+    cd backend && python -m benchmarks.load_test --concurrency 32 --rate 200 --duration 30 --price-cache-ttl 1
+    python -m benchmarks.load_test --base-url http://localhost:5000 --concurrency 8 --rate 20
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+import numpy as np
+import requests
+
+# (path, weight): roughly what the dashboard, gold tracker and loot pages poll
+MIX = (
+    ('/roi/stats', 20),
+    ('/gold/price', 20),
+    ('/nft/price', 10),
+    ('/inventory', 10),
+    ('/exchanges/summary', 5),
+    ('/data/achievement_stats.json', 5),
+    ('/data/inventory_items.json', 5),
+    ('/data/dungeon_definitions.json', 5),
+    ('/api/proxy/user/achievement-stat/me', 10),
+    ('/api/proxy/inventory/items', 10),
+)
+PROXY_HEADERS = {'Authorization': 'Bearer load-test', 'x-selected-wallet-address': 'LoadTestWallet'}
+LOCKED = 'database is locked'
+REQUEST_TIMEOUT = 30
+
+
+class _LockCounter(io.TextIOBase):
+    """Stdout replacement counting the app's printed 'database is locked' errors"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        if LOCKED in text:
+            with self._lock:
+                self.count += text.count(LOCKED)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def _percentiles(samples):
+    if not samples:
+        return {'count': 0}
+    values = np.array(samples) * 1000
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {
+        'count': len(values),
+        'mean_ms': round(float(values.mean()), 3),
+        'p50_ms': round(float(p50), 3),
+        'p90_ms': round(float(p90), 3),
+        'p99_ms': round(float(p99), 3),
+        'max_ms': round(float(values.max()), 3),
+    }
+
+
+@contextlib.contextmanager
+def local_backend(scale, seed, price_cache_ttl):
+    """Run app.py on a threaded server over a synthetic database; yields (base_url, upstream stats)"""
+    from werkzeug.serving import make_server
+    from benchmarks import stub_birdeye, stub_game_api
+    from benchmarks.synthetic_db import build_app_db
+    from services import price_history
+
+    workdir = tempfile.mkdtemp(prefix='load_test_')
+    cwd = os.getcwd()
+    birdeye, birdeye_state, birdeye_url = stub_birdeye.start_stub()
+    game, game_state, game_url = stub_game_api.start_stub()
+    # Must be set before app (and services.game_api) are imported
+    os.environ.update({
+        'GAME_API_BASE_URL': game_url,
+        'GAME_API_CACHE_DIR': os.path.join(workdir, 'http_cache'),
+        'BIRDEYE_API_KEY': 'load-test',
+        'TRACE_LOG_FILE': os.path.join(workdir, 'traces.log'),
+    })
+    price_history.BIRDEYE_BASE_URL = price_history.MAGIC_EDEN_BASE_URL = birdeye_url
+    server = None
+    try:
+        os.chdir(workdir)
+        build_app_db('defi_dungeons.db', seed=seed, **scale)
+        with contextlib.redirect_stdout(sys.stderr):
+            import app as app_module
+        if price_cache_ttl is not None:
+            # Short TTLs make price refreshes (and their history inserts) race the readers
+            for cache in (app_module.PRICE_CACHE, app_module.NFT_PRICE_CACHE, app_module.SOL_PRICE_CACHE):
+                cache['cache_duration'] = timedelta(seconds=price_cache_ttl)
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        server = make_server('127.0.0.1', 0, app_module.create_app(eager=True), threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        yield f'http://127.0.0.1:{server.server_port}', lambda: {
+            'birdeye': birdeye_state.snapshot()['requests'],
+            'game_api': game_state.snapshot()['requests'],
+        }
+    finally:
+        if server is not None:
+            server.shutdown()
+        birdeye.shutdown()
+        game.shutdown()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_load(base_url, concurrency, rate, duration, seed=0):
+    """Drive the mix for ``duration`` seconds; returns per-path results"""
+    paths = [p for p, _ in MIX]
+    weights = [w for _, w in MIX]
+    rng = random.Random(seed)
+    jobs = queue.Queue(maxsize=concurrency if not rate else 0)
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    locked = Counter()
+    lock = threading.Lock()
+
+    def worker():
+        session = requests.Session()
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            path, scheduled = job
+            if scheduled is None:
+                scheduled = time.perf_counter()
+            headers = PROXY_HEADERS if path.startswith('/api/proxy/') else None
+            try:
+                response = session.get(base_url + path, headers=headers, timeout=REQUEST_TIMEOUT)
+                status, body = response.status_code, response.text
+            except requests.RequestException as e:
+                status, body = type(e).__name__, ''
+            # Measured from the scheduled send time so queueing delay counts
+            elapsed = time.perf_counter() - scheduled
+            with lock:
+                latencies[path].append(elapsed)
+                statuses[path][status] += 1
+                if LOCKED in body:
+                    locked[path] += 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+
+    start = time.perf_counter()
+    sent = 0
+    while True:
+        now = time.perf_counter()
+        if now - start >= duration:
+            break
+        if rate:
+            scheduled = start + sent / rate
+            if scheduled > now:
+                time.sleep(scheduled - now)
+        else:
+            # Closed loop: the bounded queue blocks until a worker is free,
+            # and the request is timed from when that worker picks it up
+            scheduled = None
+        jobs.put((rng.choices(paths, weights)[0], scheduled))
+        sent += 1
+    for _ in threads:
+        jobs.put(None)
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    every = [s for samples in latencies.values() for s in samples]
+    errors = sum(n for counts in statuses.values() for status, n in counts.items()
+                 if not isinstance(status, int) or status >= 400)
+    return {
+        'requests': len(every),
+        'wall_time_s': round(wall, 3),
+        'throughput_rps': round(len(every) / wall, 2) if wall else 0,
+        'error_rate': round(errors / len(every), 4) if every else 0,
+        'locked_responses': sum(locked.values()),
+        'latency': _percentiles(every),
+        'endpoints': {
+            path: {**_percentiles(latencies[path]), 'statuses': {str(k): v for k, v in statuses[path].items()},
+                   'locked_responses': locked[path]}
+            for path in paths if latencies[path]
+        },
+    }
+
+
+def main():
+    from benchmarks.endpoint_bench import SCALES
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-url', help='load an already running backend instead of an in-process one')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--rate', type=float, default=50.0, help='requests per second; 0 for closed loop')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small', help='synthetic database size (in-process only)')
+    parser.add_argument('--price-cache-ttl', type=float, help='seconds; shorten the app price caches (in-process only)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write results JSON here as well as stdout')
+    args = parser.parse_args()
+
+    report = {'config': vars(args)}
+    if args.base_url:
+        report['results'] = run_load(args.base_url, args.concurrency, args.rate, args.duration, args.seed)
+    else:
+        counter = _LockCounter(sys.stderr)
+        with local_backend(SCALES[args.scale], args.seed, args.price_cache_ttl) as (base_url, upstream):
+            with contextlib.redirect_stdout(counter):
+                report['results'] = run_load(base_url, args.concurrency, args.rate, args.duration, args.seed)
+            report['results']['locked_errors_logged'] = counter.count
+            report['upstream_requests'] = upstream()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+
+if __name__ == '__main__':
+    main()
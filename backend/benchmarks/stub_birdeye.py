@@ -0,0 +1,122 @@
+"""Local stand-in for public-api.birdeye.so serving synthetic price series.
+
+Prices are a deterministic function of token and time, so any range can be
+requested repeatedly and always returns the same candles. The Magic Eden
+collection stats endpoint is served too, so BIRDEYE_BASE_URL and
+MAGIC_EDEN_BASE_URL can both point here:
+
+    python -m benchmarks.stub_birdeye --port 8900
+    BIRDEYE_BASE_URL=http://127.0.0.1:8900 python price_backfill.py --days 30
+"""
+import argparse
+import json
+import math
+import threading
+import time
+from collections import defaultdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from price_backfill import CHUNK_POINTS, INTERVAL_SECONDS
+from services.price_history import GOLD_ADDRESS, SOL_ADDRESS
+
+# Rough USD levels the synthetic series oscillate around
+BASE_PRICES = {GOLD_ADDRESS: 0.05, SOL_ADDRESS: 140.0}
+# NFT floor in SOL
+BASE_FLOOR_SOL = 2.5
+
+
+def synthetic_price(address, unix_time):
+    base = BASE_PRICES.get(address, 1.0)
+    days = unix_time / 86400
+    return round(base * (1 + 0.25 * math.sin(days / 30 * 2 * math.pi) + 0.02 * math.sin(unix_time / 3600)), 8)
+
+
+class StubState:
+    def __init__(self, latency_ms=0.0, error_rate=0.0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.points = 0
+
+    def snapshot(self):
+        with self.lock:
+            return {'requests': dict(self.requests), 'points': self.points}
+
+
+def make_handler(state):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, payload, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            with state.lock:
+                state.requests[url.path] += 1
+                count = state.requests[url.path]
+            if state.latency_ms:
+                time.sleep(state.latency_ms / 1000.0)
+            # Deterministic injected errors: every 1/error_rate-th request
+            if state.error_rate and count % max(1, round(1 / state.error_rate)) == 0:
+                return self._send(429, {'success': False, 'message': 'Too many requests'}, {'Retry-After': '0'})
+
+            address = query.get('address', '')
+            if url.path in ('/defi/price', '/public/price'):
+                return self._send(200, {'success': True, 'data': {'value': synthetic_price(address, time.time())}})
+            if url.path == '/defi/history_price':
+                step = INTERVAL_SECONDS.get(query.get('type', '1m'), 60)
+                time_from, time_to = int(query.get('time_from', 0)), int(query.get('time_to', 0))
+                first = -(-time_from // step) * step
+                times = range(first, time_to + 1, step)[:CHUNK_POINTS]
+                items = [{'unixTime': t, 'value': synthetic_price(address, t)} for t in times]
+                with state.lock:
+                    state.points += len(items)
+                return self._send(200, {'success': True, 'data': {'items': items}})
+            if url.path.startswith('/v2/collections/') and url.path.endswith('/stats'):
+                floor_sol = BASE_FLOOR_SOL * synthetic_price(address, time.time()) / BASE_PRICES.get(address, 1.0)
+                return self._send(200, {'symbol': url.path.split('/')[3], 'floorPrice': int(floor_sol * 1e9)})
+            return self._send(404, {'success': False, 'message': 'Not Found'})
+
+    return StubHandler
+
+
+def start_stub(port=0, **options):
+    """Start the stub in a background thread; returns (server, state, base_url)"""
+    state = StubState(**options)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f'http://127.0.0.1:{server.server_port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 429')
+    args = parser.parse_args()
+
+    server, state, base_url = start_stub(args.port, latency_ms=args.latency_ms, error_rate=args.error_rate)
+    print(f"Stub Birdeye API listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(json.dumps(state.snapshot(), indent=2))
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
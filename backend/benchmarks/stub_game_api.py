@@ -0,0 +1,206 @@
+"""Local stand-in for api-production.defidungeons.gg that replays recorded payloads.
+
+Payloads come from backend/data/*.json and can be scaled up by cloning records,
+so the fetchers can be benchmarked without touching production:
+
+    python -m benchmarks.stub_game_api --port 8800 --records 100000 --latency-ms 50
+"""
+import argparse
+import copy
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+# Endpoint -> recorded file replayed for it
+ROUTES = {
+    '/user/achievement-stat/me': 'achievement_stats.json',
+    '/fungible-asset/my-balances': 'fungible_balances.json',
+    '/dungeon': 'dungeon_definitions.json',
+    '/item/get-all-items': 'inventory_items.json',
+    '/quest/recent-claims': 'recent_quest_claims.json',
+    '/trip/recent-rewards': 'recent_trip_rewards.json',
+    '/loot-exchange/recent-exchanges': 'recent_exchanges.json',
+    # NightvaleDataFetcher endpoints
+    '/inventory/items': 'inventory_items.json',
+    '/quest/claims': 'recent_quest_claims.json',
+    '/trip/rewards': 'recent_trip_rewards.json',
+    '/marketplace/nfts': None,
+    '/tavern-staking/recent-stakings': None,
+}
+
+# Feeds that are synthesized up to the requested record count
+SCALED_FEEDS = {'recent_quest_claims.json', 'recent_exchanges.json', 'inventory_items.json', 'fungible_balances.json'}
+
+
+def load_recorded(filename):
+    """Return the 'data' section of a recorded payload"""
+    with open(os.path.join(DATA_DIR, filename)) as f:
+        return json.load(f).get('data')
+
+
+def _shift_timestamp(value, minutes):
+    try:
+        ts = datetime.fromisoformat(value.replace('Z', '+00:00')) - timedelta(minutes=minutes)
+    except (AttributeError, ValueError):
+        return value
+    return ts.isoformat().replace('+00:00', 'Z')
+
+
+def synthesize(records, count, seed=0):
+    """Clone recorded list items until there are ``count`` of them.
+
+    Clones get unique ids and older timestamps so they look like history.
+    """
+    if not records or count <= len(records):
+        return records[:count] if records else []
+    rng = random.Random(seed)
+    out = list(records)
+    i = 0
+    while len(out) < count:
+        template = records[i % len(records)]
+        clone = copy.deepcopy(template)
+        i += 1
+        offset = i * 7
+        if isinstance(clone.get('id'), int):
+            clone['id'] = 1_000_000 + i
+        elif 'id' in clone:
+            clone['id'] = f'{clone["id"][:24]}{i:012d}'
+        for field in ('createdAt', 'startedAt', 'claimedAt'):
+            if field in clone:
+                clone[field] = _shift_timestamp(clone[field], offset)
+        if 'amount' in clone:
+            clone['amount'] = str(round(rng.uniform(0, 50), 2))
+        out.append(clone)
+    return out
+
+
+def drop_table(inventory):
+    """Synthesize a base-item drop table from recorded item metadata"""
+    return [{'itemMetadata': item['itemMetadata'], 'chance': 0.01 + 0.001 * n} for n, item in enumerate(inventory or [])]
+
+
+class StubState:
+    """Serialized payloads plus request/byte counters for one stub instance"""
+
+    def __init__(self, records=0, latency_ms=0.0, error_rate=0.0, seed=0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.bytes_sent = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.payloads = {}
+        for endpoint, filename in ROUTES.items():
+            data = load_recorded(filename) if filename else []
+            if filename in SCALED_FEEDS and records:
+                data = synthesize(data, records, seed)
+            self.payloads[endpoint] = data
+        self.payloads['/dungeon/base-item-drop-chances'] = {'data': drop_table(load_recorded('inventory_items.json'))}
+        self._encoded = {}
+
+    def body(self, endpoint, limit=None):
+        """Encoded body and ETag for an endpoint, cached per limit"""
+        key = (endpoint, limit)
+        if key not in self._encoded:
+            data = self.payloads[endpoint]
+            if limit is not None and isinstance(data, list):
+                data = data[:limit]
+            encoded = json.dumps(data).encode()
+            self._encoded[key] = (encoded, '"%s"' % hashlib.md5(encoded).hexdigest())
+        return self._encoded[key]
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'requests': dict(self.requests),
+                'bytes_sent': dict(self.bytes_sent),
+                'errors': dict(self.errors),
+                'total_bytes': sum(self.bytes_sent.values()),
+            }
+
+
+def make_handler(state):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=b'', headers=None):
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+            return len(body)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            endpoint = url.path.rstrip('/') or '/'
+            if state.latency_ms:
+                time.sleep(state.rng.expovariate(1.0 / state.latency_ms) / 1000.0)
+
+            if endpoint not in state.payloads:
+                sent = self._send(404, b'{"message":"Not Found"}', {'Content-Type': 'application/json'})
+            elif state.error_rate and state.rng.random() < state.error_rate:
+                status = state.rng.choice([429, 500, 503])
+                with state.lock:
+                    state.errors[endpoint] += 1
+                sent = self._send(status, b'{"message":"injected error"}', {'Content-Type': 'application/json', 'Retry-After': '0'})
+            else:
+                limit = parse_qs(url.query).get('limit', [None])[0]
+                body, etag = state.body(endpoint, int(limit) if limit else None)
+                if self.headers.get('If-None-Match') == etag:
+                    sent = self._send(304, headers={'ETag': etag})
+                else:
+                    sent = self._send(200, body, {'Content-Type': 'application/json', 'ETag': etag})
+
+            with state.lock:
+                state.requests[endpoint] += 1
+                state.bytes_sent[endpoint] += sent
+
+    return StubHandler
+
+
+def start_stub(port=0, **options):
+    """Start the stub in a background thread; returns (server, state, base_url)"""
+    state = StubState(**options)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f'http://127.0.0.1:{server.server_port}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--records', type=int, default=0, help='synthesize this many records per scaled feed')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='mean injected latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 429/5xx')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server, state, base_url = start_stub(args.port, records=args.records, latency_ms=args.latency_ms,
+                                         error_rate=args.error_rate, seed=args.seed)
+    print(f"Stub game API listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(json.dumps(state.snapshot(), indent=2))
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Seeded synthetic SQLite fixtures for benchmarking at scale.
+
+Builds a defi_dungeons.db in the schema app.py and DefiDungeonCalculator
+share (services.schema). The same seed always produces the same rows:
+
+    cd backend && python -m benchmarks.synthetic_db --earnings 1000000 --prices 5000000 --inventory 50000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+import numpy as np
+from services.schema import migrate
+
+CHUNK_ROWS = 100_000
+RARITIES = ('grey', 'green', 'blue', 'purple', 'gold')
+RARITY_WEIGHTS = np.array([1, 2, 4, 8, 16], dtype=np.float64)
+SOURCES = ('quest', 'dungeon')
+
+
+def _insert(conn, sql, columns):
+    """executemany ``sql`` over parallel numpy/list columns in CHUNK_ROWS batches"""
+    total = len(columns[0])
+    for start in range(0, total, CHUNK_ROWS):
+        rows = zip(*(c[start:start + CHUNK_ROWS].tolist() if hasattr(c, 'tolist') else c[start:start + CHUNK_ROWS]
+                     for c in columns))
+        with conn:
+            conn.executemany(sql, rows)
+
+
+def _minute_prices(rng, count, base=0.05):
+    """``count`` minute timestamps ending now with a smooth noisy GOLD price walk"""
+    now = np.datetime64('now', 'm')
+    minutes = now - np.arange(count, dtype=np.int64)[::-1].astype('timedelta64[m]')
+    t = np.arange(count, dtype=np.float64)
+    prices = base * (1 + 0.25 * np.sin(t / (30 * 1440) * 2 * np.pi) + 0.02 * rng.standard_normal(count))
+    return minutes.astype('datetime64[s]'), np.round(np.maximum(prices, base / 10), 8)
+
+
+def _inventory(rng, count):
+    rarity = rng.integers(0, len(RARITIES), count)
+    source = rng.integers(0, len(SOURCES), count)
+    weight = RARITY_WEIGHTS[rarity]
+    price = np.round(weight * rng.lognormal(2.5, 0.6, count), 2)
+    tier = np.where(source == 1, rng.integers(1, 6, count), 0)
+    return {
+        'name': [f'Synthetic {RARITIES[r].title()} {i}' for i, r in enumerate(rarity.tolist())],
+        'rarity': [RARITIES[r] for r in rarity.tolist()],
+        'source': [SOURCES[s] for s in source.tolist()],
+        'quantity': rng.integers(1, 50, count),
+        'price': price,
+        'weight': weight,
+        'tier': [t or None for t in tier.tolist()],
+    }
+
+
+def build_app_db(path, earnings=10_000, prices=50_000, inventory=500, days=1095, seed=0):
+    """Fill gold_earnings, gold_price_history and inventory.
+
+    app.init_db() seeds the base loot prices on the first request.
+    """
+    rng = np.random.default_rng(seed)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute('PRAGMA synchronous = OFF')
+        migrate(conn)
+
+        today = np.datetime64('today', 'D')
+        dates = (today - rng.integers(0, days, earnings).astype('timedelta64[D]')).astype(str)
+        amounts = np.round(rng.gamma(2.0, 50.0, earnings), 2)
+        sources = ['Quest Claims' if q else 'Manual' for q in (rng.random(earnings) < 0.9).tolist()]
+        _insert(conn, 'INSERT INTO gold_earnings (date, amount, source) VALUES (?, ?, ?)', (dates, amounts, sources))
+
+        timestamps, gold = _minute_prices(rng, prices)
+        _insert(conn, 'INSERT INTO gold_price_history (timestamp, price) VALUES (?, ?)', (timestamps.astype(str), gold))
+
+        inv = _inventory(rng, inventory)
+        _insert(conn, 'INSERT INTO inventory (name, quantity, rarity, source, current_price, weight, tier) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (inv['name'], inv['quantity'], inv['rarity'], inv['source'], inv['price'], inv['weight'], inv['tier']))
+    finally:
+        conn.close()
+    return {'gold_earnings': earnings, 'gold_price_history': prices, 'inventory': inventory}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--earnings', type=int, default=10_000, help='gold_earnings rows')
+    parser.add_argument('--prices', type=int, default=50_000, help='minute-level gold_price_history rows')
+    parser.add_argument('--inventory', type=int, default=500, help='inventory rows')
+    parser.add_argument('--days', type=int, default=1095, help='days the earnings are spread over')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='defi_dungeons.db')
+    args = parser.parse_args()
+
+    if os.path.exists(args.output):
+        parser.error(f'{args.output} already exists')
+    report = {'config': vars(args)}
+    start = time.perf_counter()
+    report['app'] = build_app_db(args.output, args.earnings, args.prices, args.inventory, args.days, args.seed)
+    report['build_time_s'] = round(time.perf_counter() - start, 2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -8,8 +8,11 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Subdirectories of data/ published alongside the raw files
+SUBDIRS = ['views']
+
 def copy_data_files():
-    """Copy data files from backend/data to frontend/public/data"""
+    """Copy data files (and the precomputed views) from backend/data to frontend/public/data"""
     source_dir = 'data'
     target_dir = '../frontend/public/data'
     
@@ -19,10 +22,13 @@ def copy_data_files():
     try:
         # Get list of JSON files in source directory
         json_files = [f for f in os.listdir(source_dir) if f.endswith('.json')]
+        json_files += [os.path.join(d, f) for d in SUBDIRS if os.path.isdir(os.path.join(source_dir, d))
+                       for f in os.listdir(os.path.join(source_dir, d)) if f.endswith('.json')]
         
         for file in json_files:
             source_path = os.path.join(source_dir, file)
             target_path = os.path.join(target_dir, file)
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
             
             # Copy file
             shutil.copy2(source_path, target_path)
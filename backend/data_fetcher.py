@@ -1,12 +1,21 @@
-import requests
 import json
 import os
+import sys
 from dotenv import load_dotenv
 import time
 from datetime import datetime
 import logging
 import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from copy_data import copy_data_files
+from services.game_api import WALLET_HEADER, game_api
+from services.fleet import FLEET_SYNC_WORKERS, demux, wallet_dir, wallet_registry
+from services.portfolio import PortfolioValuation
+from services.profiling import profile_calls
+from services.upstream_scheduler import UpstreamBusy
+from services.views import build_views
+from services.quest_analytics import QuestClaims, gold_prices, load_feed, sync_gold_earnings
 
 # Set up logging
 logging.basicConfig(
@@ -18,10 +27,26 @@ logging.basicConfig(
     ]
 )
 
+REQUEST_TIMEOUT = 30
+
+# Drop tables change rarely; refetch each dungeon/class table at most this often
+DROP_CHANCES_TTL = int(os.getenv('DROP_CHANCES_TTL', 6 * 60 * 60))
+DROP_CHANCES_TIMEOUT = 10
+DROP_CHANCES_WORKERS = 8
+
+DUNGEON_IDS = {
+    'CrimsonHall': 'Crimson Hall',
+    'FrostboundKeep': 'Frostbound Keep',
+    'AncientTombs': 'Ancient Tombs',
+    'ThievesDen': 'Thieves Den',
+    'ForgottenCrossroads': 'Forgotten Grove'
+}
+NFT_CLASSES = ['Warrior', 'Mage', 'Marksman']
+
 class DataFetcher:
     def __init__(self):
         load_dotenv()
-        self.base_url = 'https://api-production.defidungeons.gg'
+        self.base_url = game_api.base_url
         self.token = os.getenv('NIGHTVALE_BEARER_TOKEN')
         self.wallet_address = os.getenv('NIGHTVALE_WALLET_ADDRESS')
         self.headers = {
@@ -34,40 +59,64 @@ class DataFetcher:
         }
         self.data_dir = 'data'
         self.frontend_data_dir = '../frontend/public/data'
+        self.cache_dir = os.path.join(self.data_dir, 'cache')
+        self.drop_cache_path = os.path.join(self.cache_dir, 'drop_chances_index.json')
+        # Content hash of each file's data as last saved, to tell syncs that changed nothing
+        self._saved_hashes = {}
         os.makedirs(self.data_dir, exist_ok=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
         os.makedirs(self.frontend_data_dir, exist_ok=True)
 
+    def _get(self, endpoint, params=None, timeout=REQUEST_TIMEOUT):
+        """GET an endpoint through the shared caching client and return its JSON"""
+        response = game_api.get(endpoint, params=params, headers=self.headers, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
     def _make_request(self, endpoint, params=None):
-        """Make a request to the API"""
+        """Make a request to the API.
+
+        Errors are logged and re-raised, so the caller keeps the last saved
+        file and the scheduler backs the feed off.
+        """
         try:
-            response = requests.get(
-                f'{self.base_url}{endpoint}',
-                headers=self.headers,
-                params=params,
-                verify=True,  # SSL verification
-                allow_redirects=True
-            )
-            response.raise_for_status()
-            return response.json()
+            return self._get(endpoint, params)
+        except UpstreamBusy:
+            # Shed in favour of interactive traffic; keep the last saved file
+            raise
         except Exception as e:
             logging.error(f"Error making request to {endpoint}: {str(e)}")
-            return None
+            raise
 
-    def _save_data(self, filename, data, default_data=None):
-        """Save data to JSON file with timestamp"""
+    def _content_hash(self, filepath, data=None):
+        """Hash of ``data``, or of the data saved at ``filepath`` when omitted"""
+        if data is None:
+            try:
+                with open(filepath) as f:
+                    data = json.load(f).get('data')
+            except (OSError, ValueError, AttributeError):
+                return None
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+    def _save_data(self, filename, data, default_data=None, data_dir=None):
+        """Save data to JSON file with timestamp; returns True when the data differs from the last save"""
         if data is None and default_data is not None:
             data = default_data
         elif data is None:
             data = []
 
-        filepath = os.path.join(self.data_dir, filename)
+        filepath = os.path.join(data_dir or self.data_dir, filename)
+        previous = self._saved_hashes[filepath] if filepath in self._saved_hashes else self._content_hash(filepath)
+        content_hash = self._content_hash(filepath, data)
         with open(filepath, 'w') as f:
             json.dump({
                 'timestamp': datetime.now().isoformat(),
                 'data': data
             }, f, indent=2)
+        self._saved_hashes[filepath] = content_hash
         
         logging.info(f"Saved {filename}")
+        return content_hash != previous
 
     def _filter_by_wallet(self, data, wallet_field='walletId'):
         """Filter data to only include entries matching the user's wallet address"""
@@ -78,131 +127,170 @@ class DataFetcher:
     def fetch_fungible_balances(self):
         """Fetch fungible asset balances"""
         data = self._make_request('/fungible-asset/my-balances')
-        self._save_data('fungible_balances.json', data, default_data=[])
+        changed = self._save_data('fungible_balances.json', data, default_data=[])
+        self._record_portfolio(self.data_dir)
+        return changed
+
+    def _record_portfolio(self, data_dir, wallet_id=''):
+        """Snapshot the valued holdings so /portfolio can report the change since this sync"""
+        try:
+            PortfolioValuation(data_dir=data_dir, wallet_id=wallet_id).record()
+        except Exception as e:
+            logging.error(f"Error recording portfolio snapshot: {str(e)}")
 
     def fetch_dungeon_definitions(self):
         """Fetch dungeon definitions"""
         data = self._make_request('/dungeon')
-        self._save_data('dungeon_definitions.json', data, default_data=[])
+        return self._save_data('dungeon_definitions.json', data, default_data=[])
 
     def fetch_inventory_items(self):
         """Fetch all inventory items"""
         data = self._make_request('/item/get-all-items')
-        self._save_data('inventory_items.json', data, default_data=[])
+        return self._save_data('inventory_items.json', data, default_data=[])
 
     def fetch_recent_quest_claims(self):
         """Fetch recent quest claims (last 100000)"""
         data = self._make_request('/quest/recent-claims', {'limit': 100000})
         filtered_data = self._filter_by_wallet(data)
-        self._save_data('recent_quest_claims.json', filtered_data, default_data=[])
+        changed = self._save_data('recent_quest_claims.json', filtered_data, default_data=[])
+        if filtered_data:
+            self._sync_quest_earnings(filtered_data)
+        return changed
+
+    def _sync_quest_earnings(self, claims, wallet_id=None, data_dir=None):
+        """Derive daily quest GOLD from the claims and upsert it into the wallet's gold_earnings"""
+        try:
+            prices = gold_prices(load_feed('fungible_balances.json', data_dir or self.data_dir))
+            sync_gold_earnings(QuestClaims(claims, prices), wallet_id=wallet_id or self.wallet_address)
+        except Exception as e:
+            logging.error(f"Error syncing quest earnings: {str(e)}")
 
     def fetch_recent_trip_rewards(self):
         """Fetch recent trip rewards (last 100000)"""
         data = self._make_request('/trip/recent-rewards', {'limit': 100000})
         filtered_data = self._filter_by_wallet(data)
-        self._save_data('recent_trip_rewards.json', filtered_data, default_data=[])
+        return self._save_data('recent_trip_rewards.json', filtered_data, default_data=[])
 
     def fetch_recent_exchanges(self):
         """Fetch recent loot exchanges"""
+        data = self._make_request('/loot-exchange/recent-exchanges', {'limit': 100000})
+        filtered_data = self._filter_by_wallet(data)
+        return self._save_data('recent_exchanges.json', filtered_data, default_data=[])
+
+    def _fetch_drop_table(self, dungeon_id, nft_class):
+        """Fetch the base item drop table for one dungeon/class combination"""
+        params = {
+            'dungeonId': dungeon_id,
+            'nftClass': nft_class
+        }
+        drops = self._get('/dungeon/base-item-drop-chances', params, timeout=DROP_CHANCES_TIMEOUT)
+        if drops and 'data' in drops and drops['data']:
+            return drops['data']
+        return []
+
+    def _load_drop_cache(self):
+        """Load the drop table cache index (fetch time and content hash per table)"""
         try:
-            response = requests.get(
-                f'{self.base_url}/loot-exchange/recent-exchanges',
-                headers=self.headers,
-                params={'limit': 100000},
-                verify=True
-            )
-            response.raise_for_status()
-            data = response.json()
-            filtered_data = self._filter_by_wallet(data)
-        except Exception as e:
-            logging.error(f"Error fetching recent exchanges: {str(e)}")
-            filtered_data = None
-        
-        self._save_data('recent_exchanges.json', filtered_data, default_data=[])
+            with open(self.drop_cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_drop_cache(self, cache):
+        """Persist the drop table cache index"""
+        with open(self.drop_cache_path, 'w') as f:
+            json.dump(cache, f, indent=2)
 
-    def fetch_drop_chances(self):
-        """Fetch base item drop chances for each dungeon"""
+    def _load_drop_chances(self):
+        """Load the previously saved drop chances file"""
         try:
-            # Initialize data structure
-            all_drops = {
-                'timestamp': datetime.now().isoformat(),
-                'dungeon_specific': {}
+            with open(os.path.join(self.data_dir, 'drop_chances.json')) as f:
+                return json.load(f).get('dungeon_specific', {})
+        except (OSError, ValueError):
+            return {}
+
+    def fetch_drop_chances(self, force_refresh=False):
+        """Fetch base item drop chances for every dungeon and NFT class.
+
+        All dungeon/class combinations are requested concurrently. Tables
+        fetched within ``DROP_CHANCES_TTL`` seconds are skipped, and the output
+        file is only rewritten when a table's content hash changed. Returns
+        True when drop_chances.json was rewritten.
+        """
+        cache = self._load_drop_cache()
+        previous = self._load_drop_chances()
+        now = time.time()
+
+        tables = {}
+        stale = []
+        for dungeon_id in DUNGEON_IDS:
+            for nft_class in NFT_CLASSES:
+                key = f'{dungeon_id}:{nft_class}'
+                entry = cache.get(key)
+                cached_drops = previous.get(dungeon_id, {}).get('classes', {}).get(nft_class)
+                if (not force_refresh and entry and cached_drops is not None
+                        and now - entry['fetched_at'] < DROP_CHANCES_TTL):
+                    tables[key] = cached_drops
+                else:
+                    stale.append((dungeon_id, nft_class))
+
+        if not stale:
+            logging.info("Drop chances are fresh, skipping fetch")
+            return False
+
+        logging.info(f"Fetching {len(stale)} drop tables")
+        changed = False
+        failed = 0
+        with ThreadPoolExecutor(max_workers=DROP_CHANCES_WORKERS) as executor:
+            futures = {
+                executor.submit(self._fetch_drop_table, dungeon_id, nft_class): (dungeon_id, nft_class)
+                for dungeon_id, nft_class in stale
             }
+            for future in as_completed(futures):
+                dungeon_id, nft_class = futures[future]
+                key = f'{dungeon_id}:{nft_class}'
+                try:
+                    drops = future.result()
+                except Exception as e:
+                    logging.error(f"Error fetching drops for {DUNGEON_IDS[dungeon_id]} with {nft_class}: {str(e)}")
+                    # Keep serving the last known table for this combination; it stays stale for the next run
+                    tables[key] = previous.get(dungeon_id, {}).get('classes', {}).get(nft_class, [])
+                    failed += 1
+                    continue
 
-            # Define dungeons and classes
-            dungeon_ids = {
-                'CrimsonHall': 'Crimson Hall',
-                'FrostboundKeep': 'Frostbound Keep',
-                'AncientTombs': 'Ancient Tombs',
-                'ThievesDen': 'Thieves Den',
-                'ForgottenCrossroads': 'Forgotten Grove'
+                content_hash = hashlib.sha256(json.dumps(drops, sort_keys=True).encode()).hexdigest()
+                if cache.get(key, {}).get('hash') != content_hash:
+                    changed = True
+                    logging.info(f"Drop table changed for {DUNGEON_IDS[dungeon_id]} with {nft_class} ({len(drops)} drops)")
+                cache[key] = {'fetched_at': now, 'hash': content_hash}
+                tables[key] = drops
+
+        self._save_drop_cache(cache)
+        if failed == len(stale):
+            raise RuntimeError(f"All {failed} drop table fetches failed")
+        if not changed and previous:
+            logging.info("Drop tables unchanged, keeping existing drop_chances.json")
+            return False
+
+        all_drops = {
+            'timestamp': datetime.now().isoformat(),
+            'dungeon_specific': {}
+        }
+        for dungeon_id, dungeon_name in DUNGEON_IDS.items():
+            classes = {nft_class: tables.get(f'{dungeon_id}:{nft_class}', []) for nft_class in NFT_CLASSES}
+            all_drops['dungeon_specific'][dungeon_id] = {
+                'name': dungeon_name,
+                # First non-empty class table, kept for existing consumers
+                'drops': next((drops for drops in classes.values() if drops), []),
+                'classes': classes
             }
-            nft_classes = ['Warrior', 'Mage', 'Marksman']
-
-            # Fetch drops for each dungeon
-            for dungeon_id, dungeon_name in dungeon_ids.items():
-                logging.info(f"Fetching drops for {dungeon_name}")
-                
-                all_drops['dungeon_specific'][dungeon_id] = {
-                    'name': dungeon_name,
-                    'drops': []
-                }
-                
-                # Try each class to find drops
-                for nft_class in nft_classes:
-                    try:
-                        params = {
-                            'dungeonId': dungeon_id,
-                            'nftClass': nft_class
-                        }
-                        
-                        # Make the request with all required parameters
-                        response = requests.get(
-                            f'{self.base_url}/dungeon/base-item-drop-chances',
-                            headers=self.headers,
-                            params=params,
-                            verify=True,
-                            allow_redirects=True
-                        )
-                        
-                        # Log the full request URL for debugging
-                        logging.info(f"Request URL: {response.url}")
-                        
-                        response.raise_for_status()
-                        drops = response.json()
-                        
-                        if drops and 'data' in drops and drops['data']:
-                            all_drops['dungeon_specific'][dungeon_id]['drops'] = drops['data']
-                            logging.info(f"Fetched {len(drops['data'])} drops for {dungeon_name} with {nft_class}")
-                            
-                            # Log some sample drops for debugging
-                            sample_drops = drops['data'][:3]  # First 3 drops
-                            for drop in sample_drops:
-                                item = drop['itemMetadata']
-                                logging.info(f"Sample drop: {item['name']} ({item['type']}, {item['rarity']}) - {drop['chance']*100:.4f}%")
-                            break  # Stop trying other classes if we found drops
-                        else:
-                            logging.warning(f"No drops found for {dungeon_name} with {nft_class}")
-                            
-                    except Exception as e:
-                        logging.error(f"Error fetching drops for {dungeon_name} with {nft_class}: {str(e)}")
-                        logging.error(f"Response status: {response.status_code if 'response' in locals() else 'No response'}")
-                        logging.error(f"Response text: {response.text if 'response' in locals() else 'No response'}")
-
-            # Save the combined data
-            filepath = os.path.join(self.data_dir, 'drop_chances.json')
-            with open(filepath, 'w') as f:
-                json.dump(all_drops, f, indent=2)
-
-            logging.info("Successfully saved all drop chances")
-            
-        except Exception as e:
-            logging.error(f"Error fetching drop chances: {str(e)}")
-            # Save empty structure on error
-            self._save_data('drop_chances.json', {
-                'timestamp': datetime.now().isoformat(),
-                'dungeon_specific': {}
-            })
+
+        filepath = os.path.join(self.data_dir, 'drop_chances.json')
+        with open(filepath, 'w') as f:
+            json.dump(all_drops, f, indent=2)
+
+        logging.info("Successfully saved all drop chances")
+        return True
 
     def fetch_achievement_stats(self):
         """Fetch achievement stats"""
@@ -213,36 +301,163 @@ class DataFetcher:
             "totalRaidBossesKilled": 0,
             "totalGoldEarned": 0
         }
-        self._save_data('achievement_stats.json', data, default_data=default_stats)
+        return self._save_data('achievement_stats.json', data, default_data=default_stats)
 
+    # Samples every thread: the drop-table fetches run in a worker pool
+    @profile_calls('fetch_all', all_threads=True)
     def fetch_all(self):
         """Fetch all data once"""
         logging.info("Starting data fetch")
-        self.fetch_achievement_stats()
-        self.fetch_fungible_balances()
-        self.fetch_dungeon_definitions()
-        self.fetch_inventory_items()
-        self.fetch_recent_quest_claims()
-        self.fetch_recent_trip_rewards()
-        self.fetch_recent_exchanges()
-        self.fetch_drop_chances()
+        changed = self._run_fetches(
+            self.fetch_achievement_stats, self.fetch_fungible_balances, self.fetch_dungeon_definitions,
+            self.fetch_inventory_items, self.fetch_recent_quest_claims, self.fetch_recent_trip_rewards,
+            self.fetch_recent_exchanges, self.fetch_drop_chances)
         logging.info("Completed data fetch")
-        
-        # Copy data files to frontend
-        copy_data_files()
+        self.publish(changed)
 
     def fetch_dungeon_data(self):
         """Fetch only dungeon-related data"""
         logging.info("Starting dungeon data fetch")
-        self.fetch_dungeon_definitions()
-        self.fetch_drop_chances()
+        changed = self._run_fetches(self.fetch_dungeon_definitions, self.fetch_drop_chances)
         logging.info("Completed dungeon data fetch")
-        
-        # Copy data files to frontend
+        self.publish(changed)
+
+    def _run_fetches(self, *fetches):
+        """Run each fetch, keeping the last saved data for any that fail; True if any changed"""
+        changed = False
+        for fetch in fetches:
+            try:
+                changed |= bool(fetch())
+            except UpstreamBusy:
+                logging.warning(f"Deferred {fetch.__name__}: game API busy with interactive requests")
+            except Exception as e:
+                logging.error(f"{fetch.__name__} failed, keeping the last saved data: {str(e)}")
+        return changed
+
+    def publish(self, changed):
+        """Precompute the frontend views, then copy data files to frontend, when a feed changed"""
+        if not changed:
+            logging.info("No feed changed, keeping existing views")
+            return
+        build_views(self.data_dir)
         copy_data_files()
 
+class FleetFetcher(DataFetcher):
+    """DataFetcher for every active wallet in the registry.
+
+    The recent-claims, trip-reward and exchange feeds cover all wallets, so
+    each is fetched once and split by walletId in one pass. Balances and
+    achievement stats are per wallet and fetched with that wallet selected,
+    FLEET_SYNC_WORKERS at a time. Per-wallet files go to data/wallets/<id>/;
+    the top-level files keep serving the primary wallet.
+    """
+
+    def __init__(self, registry=wallet_registry):
+        super().__init__()
+        self.registry = registry
+        registry.bootstrap(self.wallet_address)
+
+    def _wallets(self):
+        wallet_ids = self.registry.wallet_ids()
+        for wallet_id in wallet_ids:
+            os.makedirs(wallet_dir(wallet_id, self.data_dir), exist_ok=True)
+        return wallet_ids
+
+    def _fetch_global(self, endpoint, filename):
+        """Fetch a feed covering every wallet once and save each wallet's share.
+
+        Returns (buckets, changed).
+        """
+        data = self._make_request(endpoint, {'limit': 100000})
+        buckets = demux(data, self._wallets())
+        changed = False
+        for wallet_id, items in buckets.items():
+            changed |= self._save_data(filename, items, default_data=[], data_dir=wallet_dir(wallet_id, self.data_dir))
+        if self.wallet_address:
+            changed |= self._save_data(filename, buckets.get(self.wallet_address) or self._filter_by_wallet(data),
+                                       default_data=[])
+        return buckets, changed
+
+    def _for_each_wallet(self, fetch):
+        """Run ``fetch(wallet_id)`` for every wallet with bounded concurrency; True if any wallet's data changed.
+
+        Raises after the batch when every wallet failed, so the scheduler backs the feed off.
+        """
+        wallet_ids = self._wallets()
+        changed = False
+        failed = 0
+        with ThreadPoolExecutor(max_workers=FLEET_SYNC_WORKERS) as executor:
+            futures = {executor.submit(fetch, wallet_id): wallet_id for wallet_id in wallet_ids}
+            for future in as_completed(futures):
+                try:
+                    changed |= bool(future.result())
+                except UpstreamBusy:
+                    logging.warning(f"Deferred sync of wallet {futures[future]}: game API busy")
+                except Exception as e:
+                    failed += 1
+                    logging.error(f"Error syncing wallet {futures[future]}: {str(e)}")
+        if wallet_ids and failed == len(wallet_ids):
+            raise RuntimeError(f"Sync failed for all {failed} wallets")
+        return changed
+
+    def _fetch_for_wallet(self, wallet_id, endpoint, filename, default_data):
+        headers = {**self.headers, WALLET_HEADER: wallet_id}
+        # Errors propagate so the wallet's last saved file is kept
+        response = game_api.get(endpoint, headers=headers, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        data = response.json()
+        changed = self._save_data(filename, data, default_data=default_data, data_dir=wallet_dir(wallet_id, self.data_dir))
+        if wallet_id == self.wallet_address:
+            changed |= self._save_data(filename, data, default_data=default_data)
+        return changed
+
+    def fetch_fungible_balances(self):
+        """Fetch fungible asset balances for every wallet and snapshot each portfolio"""
+        def fetch(wallet_id):
+            changed = self._fetch_for_wallet(wallet_id, '/fungible-asset/my-balances', 'fungible_balances.json', [])
+            self._record_portfolio(wallet_dir(wallet_id, self.data_dir), wallet_id)
+            if wallet_id == self.wallet_address:
+                self._record_portfolio(self.data_dir)
+            return changed
+        return self._for_each_wallet(fetch)
+
+    def fetch_achievement_stats(self):
+        """Fetch achievement stats for every wallet"""
+        default_stats = {
+            "totalQuestCompleted": 0,
+            "totalDungeonsCompleted": 0,
+            "totalRaidBossesKilled": 0,
+            "totalGoldEarned": 0
+        }
+        return self._for_each_wallet(lambda wallet_id: self._fetch_for_wallet(
+            wallet_id, '/user/achievement-stat/me', 'achievement_stats.json', default_stats))
+
+    def fetch_recent_quest_claims(self):
+        """Fetch recent quest claims once and sync each wallet's quest earnings"""
+        buckets, changed = self._fetch_global('/quest/recent-claims', 'recent_quest_claims.json')
+        for wallet_id, claims in buckets.items():
+            if claims:
+                self._sync_quest_earnings(claims, wallet_id, wallet_dir(wallet_id, self.data_dir))
+        return changed
+
+    def fetch_recent_trip_rewards(self):
+        """Fetch recent trip rewards once for all wallets"""
+        return self._fetch_global('/trip/recent-rewards', 'recent_trip_rewards.json')[1]
+
+    def fetch_recent_exchanges(self):
+        """Fetch recent loot exchanges once for all wallets"""
+        return self._fetch_global('/loot-exchange/recent-exchanges', 'recent_exchanges.json')[1]
+
+
 def main():
-    fetcher = DataFetcher()
+    fleet = '--fleet' in sys.argv
+    if '--schedule' in sys.argv:
+        # Long-running mode with per-feed refresh intervals
+        from fetch_scheduler import main as run_scheduler
+        run_scheduler(FleetFetcher() if fleet else None)
+        return
+
+    fetcher = FleetFetcher() if fleet else DataFetcher()
     try:
         # Fetch all data
         fetcher.fetch_all()
@@ -4,65 +4,36 @@ from datetime import datetime, timedelta
 import os
 import sqlite3
 import time
-from dungeon_strategy import DungeonStrategy
+from services.price_history import BIRDEYE_BASE_URL, MAGIC_EDEN_BASE_URL
+from services.profiling import profile_methods
+from services.schema import ensure_schema
 
+try:
+    from dungeon_strategy import DungeonStrategy
+except ImportError:
+    # Strategy module is optional; market analysis and sell recommendations need it
+    DungeonStrategy = None
+
+INITIAL_INVESTMENT = 425  # USDC
+
+@profile_methods('calculator')
 class DefiDungeonCalculator:
-    def __init__(self):
+    def __init__(self, db_path='defi_dungeons.db'):
         self.gold_earnings = []
         self.price_cache = {
             'gold': {'price': 0, 'timestamp': None},
             'nft': {'price': 0, 'timestamp': None}
         }
-        self.initial_investment = 425  # USDC
-        self.db_path = 'defi_dungeons.db'
+        self.initial_investment = INITIAL_INVESTMENT
+        self.db_path = db_path
         self.birdeye_api_key = os.getenv('BIRDEYE_API_KEY', '')
         self.magic_eden_api_key = os.getenv('MAGIC_EDEN_API_KEY', '')
-        self.strategy = DungeonStrategy()  # Initialize with default stats
+        self.strategy = DungeonStrategy() if DungeonStrategy else None  # Initialize with default stats
         self.setup_database()
         
     def setup_database(self):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        # Create tables if they don't exist
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS gold_earnings (
-                date TEXT PRIMARY KEY,
-                gold_amount REAL,
-                source TEXT
-            )
-        ''')
-        
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS inventory (
-                name TEXT,
-                rarity TEXT,
-                tier INTEGER,
-                quantity INTEGER,
-                current_price REAL,
-                PRIMARY KEY (name, tier)
-            )
-        ''')
-        
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS price_history (
-                timestamp TEXT PRIMARY KEY,
-                gold_price REAL,
-                nft_price REAL
-            )
-        ''')
-        
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS gear (
-                slot TEXT PRIMARY KEY,
-                name TEXT,
-                rarity TEXT,
-                tier INTEGER
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        # Same schema as app.py; migrated once per process per database file
+        ensure_schema(self.db_path)
 
     def get_gold_token_price(self):
         try:
@@ -72,7 +43,7 @@ class DefiDungeonCalculator:
                 return self.price_cache['gold']['price']
 
             # Try Birdeye API
-            url = "https://public-api.birdeye.so/public/price?address=GLDuCvYo2Qf9qQ4QyPEyR8yD7YXJeNRGk6RKTnkdXZz4"
+            url = f"{BIRDEYE_BASE_URL}/public/price?address=GLDuCvYo2Qf9qQ4QyPEyR8yD7YXJeNRGk6RKTnkdXZz4"
             headers = {
                 'X-API-KEY': self.birdeye_api_key,
                 'Accept': 'application/json'
@@ -104,7 +75,7 @@ class DefiDungeonCalculator:
                 return self.price_cache['nft']['price']
 
             # Try Magic Eden API
-            url = "https://api-mainnet.magiceden.dev/v2/collections/defi-dungeons/stats"
+            url = f"{MAGIC_EDEN_BASE_URL}/v2/collections/defi-dungeons/stats"
             headers = {
                 'Authorization': f'Bearer {self.magic_eden_api_key}',
                 'Accept': 'application/json'
@@ -132,8 +103,10 @@ class DefiDungeonCalculator:
         c = conn.cursor()
         
         try:
+            # One row per date and source, replacing any earlier entry
+            c.execute('DELETE FROM gold_earnings WHERE date = ? AND source = ?', (date, source))
             c.execute('''
-                INSERT OR REPLACE INTO gold_earnings (date, gold_amount, source)
+                INSERT INTO gold_earnings (date, amount, source)
                 VALUES (?, ?, ?)
             ''', (date, gold_amount, source))
             conn.commit()
@@ -147,7 +120,8 @@ class DefiDungeonCalculator:
         c = conn.cursor()
         
         try:
-            c.execute('SELECT date, gold_amount, source FROM gold_earnings ORDER BY date DESC')
+            # One entry per day, newest first
+            c.execute('SELECT date, SUM(amount), GROUP_CONCAT(DISTINCT source) FROM gold_earnings GROUP BY date ORDER BY date DESC')
             rows = c.fetchall()
             return [{'date': row[0], 'gold_amount': row[1], 'source': row[2]} for row in rows]
         except Exception as e:
@@ -200,8 +174,8 @@ class DefiDungeonCalculator:
             
             # Get price from 24 hours ago
             c.execute('''
-                SELECT gold_price FROM price_history
-                WHERE timestamp < datetime('now', '-24 hours')
+                SELECT price FROM gold_price_history
+                WHERE timestamp < strftime('%Y-%m-%dT%H:%M:%S', 'now', '-24 hours')
                 ORDER BY timestamp DESC
                 LIMIT 1
             ''')
@@ -227,9 +201,15 @@ class DefiDungeonCalculator:
         
         try:
             c.execute('''
-                INSERT OR REPLACE INTO inventory (name, rarity, tier, quantity, current_price)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (name, rarity, tier, quantity, current_price))
+                UPDATE inventory SET rarity = ?, quantity = ?, current_price = ?
+                WHERE name = ? AND tier IS ?
+            ''', (rarity, quantity, current_price, name, tier))
+            if c.rowcount == 0:
+                # Only dungeon loot is tiered
+                c.execute('''
+                    INSERT INTO inventory (name, rarity, tier, quantity, current_price, source)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (name, rarity, tier, quantity, current_price, 'dungeon' if tier else 'quest'))
             conn.commit()
         except Exception as e:
             print(f"Error updating inventory: {e}")
@@ -1,15 +1,15 @@
-import requests
 import json
 import os
 from datetime import datetime
 from dotenv import load_dotenv
+from services.game_api import game_api
 
 # Load environment variables
 load_dotenv()
 
 class NightvaleDataFetcher:
     def __init__(self):
-        self.base_url = 'https://api-production.defidungeons.gg'
+        self.base_url = game_api.base_url
         self.bearer_token = os.getenv('NIGHTVALE_BEARER_TOKEN')
         self.wallet_address = os.getenv('NIGHTVALE_WALLET_ADDRESS')
         self.data_dir = 'data'
@@ -28,10 +28,11 @@ class NightvaleDataFetcher:
     def fetch_and_save(self, endpoint, filename, params=None):
         print(f"\nFetching data from {endpoint}...")
         try:
-            response = requests.get(
-                f'{self.base_url}{endpoint}',
+            response = game_api.get(
+                endpoint,
+                params=params,
                 headers=self.get_headers(),
-                params=params
+                timeout=30
             )
             response.raise_for_status()
             data = response.json()
@@ -0,0 +1,104 @@
+import heapq
+import logging
+import os
+import random
+import signal
+import threading
+import time
+from data_fetcher import DataFetcher
+from services.rate_limiter import game_api_limiter
+
+# (feed name, DataFetcher method, refresh interval in seconds, jitter in seconds)
+FEEDS = [
+    ('recent_quest_claims', 'fetch_recent_quest_claims', 60, 10),
+    ('recent_trip_rewards', 'fetch_recent_trip_rewards', 60, 10),
+    ('recent_exchanges', 'fetch_recent_exchanges', 120, 15),
+    ('fungible_balances', 'fetch_fungible_balances', 120, 15),
+    ('achievement_stats', 'fetch_achievement_stats', 300, 30),
+    ('inventory_items', 'fetch_inventory_items', 600, 60),
+    ('dungeon_definitions', 'fetch_dungeon_definitions', 3600, 300),
+    ('drop_chances', 'fetch_drop_chances', 3600, 300),
+]
+
+# Longest a failing feed is pushed back before it is retried; feeds that
+# normally run less often than this back off to at most twice their interval
+MAX_FEED_BACKOFF = 1800
+
+
+class FetchScheduler:
+    """Long-running fetch loop where every feed has its own interval and jitter.
+
+    All requests share ``game_api_limiter``, which throttles the request rate
+    and pauses on 429/5xx. A feed that raises is retried with exponential
+    backoff instead of its normal interval.
+    """
+
+    def __init__(self, fetcher=None, feeds=FEEDS):
+        self.fetcher = fetcher or DataFetcher()
+        self.feeds = {name: (method, interval, jitter) for name, method, interval, jitter in feeds}
+        self.failures = {name: 0 for name in self.feeds}
+        self._stop = threading.Event()
+        self._queue = []
+
+    def _next_delay(self, name):
+        method, interval, jitter = self.feeds[name]
+        if self.failures[name]:
+            # Never retry sooner than the feed's normal schedule
+            return min(max(MAX_FEED_BACKOFF, 2 * interval), interval * 2 ** self.failures[name])
+        return interval + random.uniform(-jitter, jitter)
+
+    def _run_feed(self, name):
+        """Run one feed; True when it changed the saved data"""
+        method = self.feeds[name][0]
+        try:
+            changed = getattr(self.fetcher, method)()
+            self.failures[name] = 0
+            return bool(changed)
+        except Exception as e:
+            self.failures[name] += 1
+            logging.error(f"Feed {name} failed ({self.failures[name]} in a row): {str(e)}")
+            return False
+
+    def stop(self, *_):
+        """Ask the loop to exit after the feed currently running"""
+        logging.info("Stopping fetch scheduler...")
+        self._stop.set()
+
+    def run(self):
+        """Run feeds until stop() is called"""
+        now = time.monotonic()
+        # Spread the first run of each feed over its jitter window
+        for name, (method, interval, jitter) in self.feeds.items():
+            heapq.heappush(self._queue, (now + random.uniform(0, jitter), name))
+
+        logging.info(f"Fetch scheduler started with {len(self.feeds)} feeds")
+        while not self._stop.is_set():
+            due_at, name = self._queue[0]
+            wait = due_at - time.monotonic()
+            if wait > 0:
+                self._stop.wait(wait)
+                continue
+
+            ran, changed = [], False
+            while self._queue and self._queue[0][0] <= time.monotonic() and not self._stop.is_set():
+                _, name = heapq.heappop(self._queue)
+                changed |= self._run_feed(name)
+                ran.append(name)
+                heapq.heappush(self._queue, (time.monotonic() + self._next_delay(name), name))
+
+            if ran:
+                logging.info(f"Refreshed {', '.join(ran)}")
+                if game_api_limiter.paused_for:
+                    logging.warning(f"Game API backing off for {game_api_limiter.paused_for:.0f}s")
+                self.fetcher.publish(changed)
+        logging.info("Fetch scheduler stopped")
+
+
+def main(fetcher=None):
+    scheduler = FetchScheduler(fetcher)
+    signal.signal(signal.SIGINT, scheduler.stop)
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    scheduler.run()
+
+if __name__ == "__main__":
+    main()
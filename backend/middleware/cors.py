@@ -1,34 +1,73 @@
-from flask import request, make_response
-from functools import wraps
-
-def cors_middleware(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        # Get the response from the route
-        response = f(*args, **kwargs)
-        
-        # Add CORS headers
-        headers = {
-            'Access-Control-Allow-Origin': 'http://localhost:3000',
-            'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-            'Access-Control-Allow-Headers': 'Content-Type, Authorization, x-selected-wallet-address',
-            'Access-Control-Allow-Credentials': 'true'
-        }
-        
-        # If it's a Response object, add headers
-        if hasattr(response, 'headers'):
-            for key, value in headers.items():
-                response.headers[key] = value
-        
-        return response
-    return decorated_function
-
-def handle_preflight():
-    if request.method == 'OPTIONS':
-        response = make_response()
-        response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
-        response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization, x-selected-wallet-address')
-        response.headers.add('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
-        response.headers.add('Access-Control-Allow-Credentials', 'true')
-        return response
-    return None 
\ No newline at end of file
+"""CORS and security headers applied at the WSGI layer.
+
+Every header set is built once at start-up. Preflights from allowed origins
+are answered without entering Flask, and normal responses get the frozen
+security headers (plus CORS headers for allowed origins) appended.
+"""
+
+SECURITY_HEADERS = (
+    ('X-Content-Type-Options', 'nosniff'),
+    ('X-Frame-Options', 'DENY'),
+    ('X-XSS-Protection', '1; mode=block'),
+    ('Strict-Transport-Security', 'max-age=31536000; includeSubDomains'),
+)
+
+DEFAULT_METHODS = ('GET', 'OPTIONS')
+DEFAULT_HEADERS = ('Content-Type',)
+PREFLIGHT_MAX_AGE = 3600
+
+
+class CorsMiddleware:
+    """WSGI middleware that owns CORS and security headers for the backend.
+
+    ``resources`` maps a path prefix to the (methods, headers) allowed for it;
+    the longest matching prefix wins and unmatched paths use the defaults.
+    """
+
+    def __init__(self, app, allowed_origins, resources=None, max_age=PREFLIGHT_MAX_AGE):
+        self.app = app
+        self.allowed_origins = frozenset(allowed_origins)
+        rules = dict(resources or {})
+        rules.setdefault('', (DEFAULT_METHODS, DEFAULT_HEADERS))
+        # Longest prefix first so the most specific rule matches
+        self._prefixes = tuple(sorted(rules, key=len, reverse=True))
+
+        self._preflight = {}
+        self._simple = {}
+        for origin in self.allowed_origins:
+            cors = (
+                ('Access-Control-Allow-Origin', origin),
+                ('Access-Control-Allow-Credentials', 'true'),
+                ('Vary', 'Origin'),
+            )
+            self._simple[origin] = cors + SECURITY_HEADERS
+            for prefix in self._prefixes:
+                methods, headers = rules[prefix]
+                self._preflight[origin, prefix] = cors + (
+                    ('Access-Control-Allow-Methods', ', '.join(methods)),
+                    ('Access-Control-Allow-Headers', ', '.join(headers)),
+                    ('Access-Control-Max-Age', str(max_age)),
+                    ('Content-Length', '0'),
+                ) + SECURITY_HEADERS
+
+    def _match(self, path):
+        for prefix in self._prefixes:
+            if path.startswith(prefix):
+                return prefix
+        return ''
+
+    def __call__(self, environ, start_response):
+        origin = environ.get('HTTP_ORIGIN')
+        if origin not in self.allowed_origins:
+            extra = SECURITY_HEADERS
+        elif environ['REQUEST_METHOD'] == 'OPTIONS' and 'HTTP_ACCESS_CONTROL_REQUEST_METHOD' in environ:
+            start_response('200 OK', list(self._preflight[origin, self._match(environ.get('PATH_INFO', ''))]))
+            return [b'']
+        else:
+            extra = self._simple[origin]
+
+        def start_with_headers(status, headers, exc_info=None):
+            headers.extend(extra)
+            return start_response(status, headers, exc_info)
+
+        return self.app(environ, start_with_headers)
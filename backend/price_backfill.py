@@ -0,0 +1,143 @@
+"""Backfill GOLD and SOL USD price history from Birdeye.
+
+Pulls /defi/history_price in chunks of CHUNK_POINTS candles and appends them
+to gold_price_history / sol_price_history. The covered time range is stored
+per series and interval, so an interrupted run resumes where it stopped and
+reruns only fetch points outside it (older ones too when --days grows):
+
+    python price_backfill.py --days 365 --interval 1m
+    BIRDEYE_BASE_URL=http://127.0.0.1:8900 python price_backfill.py --days 30
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+import requests
+from dotenv import load_dotenv
+from services.price_history import BIRDEYE_BASE_URL, PRICE_SERIES
+from services.quest_analytics import DB_PATH
+from services.rate_limiter import BACKOFF_STATUSES, birdeye_limiter
+from services.schema import ensure_schema
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+# Birdeye returns at most ~1000 candles per history request
+CHUNK_POINTS = 1000
+INTERVAL_SECONDS = {'1m': 60, '5m': 300, '15m': 900, '1H': 3600, '4H': 14400, '1D': 86400}
+MAX_ATTEMPTS = 4
+REQUEST_TIMEOUT = 15
+
+
+class PriceBackfill:
+    """Chunked, resumable Birdeye history backfill into the price history tables"""
+
+    def __init__(self, db_path=DB_PATH, base_url=BIRDEYE_BASE_URL, api_key=None, limiter=birdeye_limiter):
+        load_dotenv()
+        self.db_path = db_path
+        self.base_url = base_url
+        self.limiter = limiter
+        self.session = requests.Session()
+        self.session.headers.update({
+            'accept': 'application/json',
+            'x-chain': 'solana',
+            'X-API-KEY': api_key or os.getenv('BIRDEYE_API_KEY', ''),
+        })
+
+    def _fetch_chunk(self, address, interval, time_from, time_to):
+        """[(unix_time, price)] for one chunk, retrying 429/5xx through the limiter backoff"""
+        params = {'address': address, 'address_type': 'token', 'type': interval,
+                  'time_from': time_from, 'time_to': time_to}
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            self.limiter.acquire()
+            response = self.session.get(f'{self.base_url}/defi/history_price', params=params, timeout=REQUEST_TIMEOUT)
+            delay = self.limiter.report(response.status_code, response.headers.get('Retry-After'))
+            if response.status_code in BACKOFF_STATUSES and attempt < MAX_ATTEMPTS:
+                logging.warning(f"Birdeye returned {response.status_code}; retrying in {delay:.0f}s")
+                continue
+            response.raise_for_status()
+            items = (response.json().get('data') or {}).get('items') or []
+            return [(int(item['unixTime']), float(item['value'])) for item in items if item.get('value')]
+        return []
+
+    def _covered(self, conn, series, interval, table):
+        """(first_time, last_time) already backfilled for ``series`` at ``interval``, or None"""
+        conn.execute(''' CREATE TABLE IF NOT EXISTS price_backfill_state (series TEXT NOT NULL, interval TEXT NOT NULL, first_time INTEGER, last_time INTEGER NOT NULL, PRIMARY KEY (series, interval)) ''')
+        if 'first_time' not in {row[1] for row in conn.execute('PRAGMA table_info(price_backfill_state)')}:
+            conn.execute('ALTER TABLE price_backfill_state ADD COLUMN first_time INTEGER')
+        row = conn.execute('SELECT first_time, last_time FROM price_backfill_state WHERE series = ? AND interval = ?',
+                           (series, interval)).fetchone()
+        if row is None or row[0] is not None:
+            return row
+        # Progress saved before first_time was tracked: that run began at its oldest stored point
+        oldest = conn.execute(f'SELECT MIN(timestamp) FROM {table}').fetchone()[0]
+        if oldest is None:
+            return None
+        return int(datetime.fromisoformat(oldest).replace(tzinfo=timezone.utc).timestamp()), row[1]
+
+    def _store(self, conn, series, interval, table, points, first_time, last_time):
+        """Insert one chunk's points and the covered range in one transaction; returns points added"""
+        with conn:
+            cursor = conn.executemany(f'INSERT OR IGNORE INTO {table} (timestamp, price) VALUES (?, ?)', [
+                (datetime.fromtimestamp(t, timezone.utc).replace(tzinfo=None).isoformat(), price)
+                for t, price in points
+            ])
+            # Commit progress with each chunk so an interrupted run resumes here
+            conn.execute('INSERT OR REPLACE INTO price_backfill_state (series, interval, first_time, last_time) '
+                         'VALUES (?, ?, ?, ?)', (series, interval, first_time, last_time))
+        return cursor.rowcount
+
+    def backfill(self, series='gold', days=30, interval='1m'):
+        """Fetch ``series`` history for the last ``days`` days; returns points stored.
+
+        Only time outside the range already covered is requested: a longer
+        ``days`` than before fills the older gap, newest chunk first so the
+        covered range stays contiguous, before newer points are appended.
+        """
+        address, table = PRICE_SERIES[series]
+        step = INTERVAL_SECONDS[interval]
+        span = CHUNK_POINTS * step
+        now = int(time.time())
+        since = now - days * 86400
+        ensure_schema(self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            first_time, last_time = self._covered(conn, series, interval, table) or (since, since - 1)
+            stored = 0
+            for chunk_end in range(first_time - 1, since - 1, -span):
+                first_time = max(since, chunk_end - span + 1)
+                points = self._fetch_chunk(address, interval, first_time, chunk_end)
+                stored += self._store(conn, series, interval, table, points, first_time, last_time)
+            for chunk_start in range(max(since, last_time + 1), now, span):
+                last_time = min(now, chunk_start + span - 1)
+                points = self._fetch_chunk(address, interval, chunk_start, last_time)
+                stored += self._store(conn, series, interval, table, points, first_time, last_time)
+            logging.info(f"Backfilled {stored} {series} price points into {table}")
+            return stored
+        finally:
+            conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill GOLD/SOL price history from Birdeye')
+    parser.add_argument('--series', nargs='+', choices=sorted(PRICE_SERIES), default=sorted(PRICE_SERIES))
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--interval', choices=list(INTERVAL_SECONDS), default='1m')
+    args = parser.parse_args()
+
+    backfill = PriceBackfill()
+    for series in args.series:
+        try:
+            backfill.backfill(series, days=args.days, interval=args.interval)
+        except KeyboardInterrupt:
+            logging.info("Backfill interrupted; progress saved")
+            return
+        except Exception as e:
+            logging.error(f"Error backfilling {series} prices: {str(e)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""Evaluate batches of what-if ROI scenarios in parallel.
+
+Reads scenarios from CSV (one per row), JSON (a list, or {"scenarios": [...]})
+or TOML ([[scenario]] tables). Each may set investment, horizon_days,
+gold_price, gold_drift, gold_volatility, price_path (drift or history),
+daily_yield, include_history, nft_count, nft_floor, sol_price, paths and
+seed; anything unset comes from the database snapshot (DefiDungeonCalculator's
+investment, latest prices, 7-day average yield, registered NFT count).
+
+Earnings and price history are read once and handed to each worker process
+when it starts, so scenarios never query SQLite. Results are streamed to
+--output (.csv or .ndjson, NDJSON on stdout otherwise) as they complete, and
+a throughput summary is printed to stderr:
+
+    python scenario_runner.py scenarios.csv --output results.ndjson
+    python scenario_runner.py nightly.toml --workers 8 --output results.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from defi_dungeon_calculator import INITIAL_INVESTMENT
+from services.quest_analytics import DB_PATH
+from services.roi_model import PRICE_PATHS, Snapshot, evaluate
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+
+def _flag(value):
+    if isinstance(value, str):
+        return value.strip().lower() not in ('0', 'false', 'no', 'off')
+    return bool(value)
+
+
+def _price_path(value):
+    if value not in PRICE_PATHS:
+        raise ValueError(f"price_path must be one of {', '.join(PRICE_PATHS)}")
+    return value
+
+
+# Scenario field -> parser; CSV cells arrive as strings
+FIELDS = {
+    'name': str,
+    'investment': float,
+    'horizon_days': int,
+    'gold_price': float,
+    'gold_drift': float,
+    'gold_volatility': float,
+    'price_path': _price_path,
+    'daily_yield': float,
+    'include_history': _flag,
+    'nft_count': float,
+    'nft_floor': float,
+    'sol_price': float,
+    'paths': int,
+    'seed': int,
+}
+RESULT_FIELDS = ('name', 'investment', 'horizon_days', 'paths', 'current_value_usd', 'breakeven_days',
+                 'breakeven_days_p10', 'breakeven_days_p90', 'breakeven_probability', 'final_value_usd',
+                 'final_value_usd_p10', 'final_value_usd_p90', 'roi_percentage', 'apy', 'error')
+# Futures kept in flight per worker, so huge files are not submitted all at once
+INFLIGHT_PER_WORKER = 4
+
+
+def parse_scenario(raw, index):
+    """Typed scenario dict; blank values fall back to the snapshot defaults"""
+    unknown = set(raw) - set(FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown scenario fields: {', '.join(sorted(unknown))}")
+    scenario = {key: FIELDS[key](value) for key, value in raw.items() if value not in (None, '')}
+    scenario.setdefault('name', f'scenario-{index + 1}')
+    if scenario.get('horizon_days', 1) < 1 or scenario.get('paths', 1) < 1:
+        raise ValueError('horizon_days and paths must be at least 1')
+    return scenario
+
+
+def load_scenarios(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        with open(path, newline='') as f:
+            return list(csv.DictReader(f))
+    if ext == '.json':
+        with open(path) as f:
+            data = json.load(f)
+        return data['scenarios'] if isinstance(data, dict) else data
+    if ext == '.toml':
+        if tomllib is None:
+            raise SystemExit('TOML scenarios need Python 3.11+ (tomllib)')
+        with open(path, 'rb') as f:
+            return tomllib.load(f).get('scenario', [])
+    raise SystemExit(f'Unsupported scenario file {path}: use .csv, .json or .toml')
+
+
+_snapshot = None
+_investment = None
+
+
+def _init_worker(snapshot, investment):
+    global _snapshot, _investment
+    _snapshot, _investment = snapshot, investment
+
+
+def _run(index, raw):
+    try:
+        return index, evaluate(_snapshot, parse_scenario(raw, index), _investment)
+    except Exception as e:
+        name = raw.get('name') if isinstance(raw, dict) else None
+        return index, {'name': name or f'scenario-{index + 1}', 'error': f'{type(e).__name__}: {e}'}
+
+
+class ResultWriter:
+    """CSV or NDJSON rows written and flushed as each result arrives"""
+
+    def __init__(self, path=None):
+        self.file = open(path, 'w', newline='') if path else sys.stdout
+        self.csv = None
+        if path and path.lower().endswith('.csv'):
+            self.csv = csv.DictWriter(self.file, fieldnames=RESULT_FIELDS, extrasaction='ignore')
+            self.csv.writeheader()
+
+    def write(self, result):
+        if self.csv:
+            self.csv.writerow(result)
+        else:
+            self.file.write(json.dumps(result) + '\n')
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+def run(scenarios, snapshot, writer, workers, investment=INITIAL_INVESTMENT):
+    """Evaluate ``scenarios`` over ``workers`` processes (0: in this process); returns counts"""
+    failed = 0
+    if workers == 0:
+        _init_worker(snapshot, investment)
+        for index, raw in enumerate(scenarios):
+            result = _run(index, raw)[1]
+            failed += 'error' in result
+            writer.write(result)
+        return len(scenarios), failed
+
+    pending = set()
+    items = iter(enumerate(scenarios))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(snapshot, investment)) as executor:
+        while True:
+            for index, raw in items:
+                pending.add(executor.submit(_run, index, raw))
+                if len(pending) >= workers * INFLIGHT_PER_WORKER:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()[1]
+                failed += 'error' in result
+                writer.write(result)
+    return len(scenarios), failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scenarios', help='scenario file (.csv, .json or .toml)')
+    parser.add_argument('--output', help='results file (.csv or .ndjson); NDJSON on stdout if omitted')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='worker processes; 0 runs inline')
+    parser.add_argument('--db', default=DB_PATH, help='database to snapshot')
+    parser.add_argument('--investment', type=float, default=INITIAL_INVESTMENT,
+                        help='investment for scenarios that do not set one')
+    args = parser.parse_args()
+
+    scenarios = load_scenarios(args.scenarios)
+    start = time.perf_counter()
+    snapshot = Snapshot.load(args.db)
+    snapshot_s = time.perf_counter() - start
+    writer = ResultWriter(args.output)
+    try:
+        total, failed = run(scenarios, snapshot, writer, args.workers, args.investment)
+    finally:
+        writer.close()
+    wall = time.perf_counter() - start
+    print(json.dumps({
+        'scenarios': total,
+        'failed': failed,
+        'workers': args.workers,
+        'snapshot': snapshot.summary(),
+        'snapshot_load_s': round(snapshot_s, 3),
+        'wall_time_s': round(wall, 3),
+        'scenarios_per_s': round(total / wall, 2) if wall else 0,
+    }, indent=2), file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+import requests
+from services.price_stream import Broadcaster
+from services.quest_analytics import DB_PATH
+
+# gold/sol are USD prices, nft is the floor in SOL, roi is the ROI percentage
+METRICS = ('gold', 'sol', 'nft', 'roi')
+DIRECTIONS = ('above', 'below', 'cross')
+
+ALERT_WEBHOOK_URL = os.getenv('ALERT_WEBHOOK_URL')
+ALERT_WEBHOOK_TIMEOUT = 5
+# Recent events kept for /alerts/events and SSE reconnects
+ALERT_EVENT_HISTORY = 500
+
+logger = logging.getLogger('alerts')
+
+
+class ThresholdIndex:
+    """Thresholds for one metric and crossing direction, kept sorted for bisect"""
+
+    def __init__(self):
+        self.values = []
+        self.ids = []
+
+    def add(self, value, alert_id):
+        i = bisect_right(self.values, value)
+        self.values.insert(i, value)
+        self.ids.insert(i, alert_id)
+
+    def remove(self, value, alert_id):
+        i = bisect_left(self.values, value)
+        while i < len(self.values) and self.values[i] == value:
+            if self.ids[i] == alert_id:
+                del self.values[i], self.ids[i]
+                return
+            i += 1
+
+    def crossed_up(self, old, new):
+        """Ids with old < threshold <= new"""
+        return self.ids[bisect_right(self.values, old):bisect_right(self.values, new)]
+
+    def crossed_down(self, old, new):
+        """Ids with new <= threshold < old"""
+        return self.ids[bisect_left(self.values, new):bisect_left(self.values, old)]
+
+
+class LogSink:
+    def send(self, event):
+        logger.info(f"Alert {event['alert_id']}: {event['metric']} crossed {event['threshold']} "
+                    f"{event['direction']} ({event['previous']} -> {event['value']})")
+
+
+class WebhookSink:
+    """POSTs each event as JSON from a background thread so price updates never wait on it"""
+
+    def __init__(self, url, timeout=ALERT_WEBHOOK_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+        self._queue = queue.SimpleQueue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def send(self, event):
+        self._queue.put(event)
+
+    def _run(self):
+        session = requests.Session()
+        while True:
+            event = self._queue.get()
+            try:
+                session.post(self.url, json=event, timeout=self.timeout).raise_for_status()
+            except Exception as e:
+                logger.error(f"Error delivering alert {event['id']} to webhook: {str(e)}")
+
+
+class SseSink:
+    """Publishes events to Server-Sent Events subscribers, keeping recent ones for replay"""
+
+    def __init__(self, history=ALERT_EVENT_HISTORY):
+        self.broadcaster = Broadcaster(history=history)
+
+    def send(self, event):
+        self.broadcaster.publish('alert', event, event_id=event['id'])
+
+    def since(self, last_id):
+        return self.broadcaster.since(last_id)
+
+    def stream(self, last_id=0):
+        """SSE frames for events after ``last_id``, with comment heartbeats"""
+        return self.broadcaster.subscribe(last_id)
+
+
+class AlertEngine:
+    """Price/ROI threshold alerts evaluated on each tick.
+
+    Thresholds live in sorted arrays per metric and direction. A tick from
+    ``old`` to ``new`` bisects for the slice of thresholds between them, so
+    its cost depends on the crossings rather than on how many alerts exist.
+    Alerts are stored in price_alerts and loaded on first use; ``once``
+    alerts are retired after they fire.
+    """
+
+    def __init__(self, db_path=DB_PATH, sinks=None):
+        self.db_path = db_path
+        self.sinks = sinks if sinks is not None else [LogSink()]
+        self.alerts = {}
+        self.last = {}
+        self._up = {m: ThresholdIndex() for m in METRICS}
+        self._down = {m: ThresholdIndex() for m in METRICS}
+        # Seeded from the clock so event ids keep increasing across restarts (for Last-Event-ID)
+        self._seq = int(time.time() * 1000)
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute(''' CREATE TABLE IF NOT EXISTS price_alerts (id INTEGER PRIMARY KEY AUTOINCREMENT, metric TEXT NOT NULL, threshold REAL NOT NULL, direction TEXT NOT NULL DEFAULT 'cross', once INTEGER NOT NULL DEFAULT 0, label TEXT, active INTEGER NOT NULL DEFAULT 1, triggered_at TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP) ''')
+        return conn
+
+    def _index(self, alert):
+        if alert['direction'] in ('above', 'cross'):
+            self._up[alert['metric']].add(alert['threshold'], alert['id'])
+        if alert['direction'] in ('below', 'cross'):
+            self._down[alert['metric']].add(alert['threshold'], alert['id'])
+
+    def _unindex(self, alert):
+        self._up[alert['metric']].remove(alert['threshold'], alert['id'])
+        self._down[alert['metric']].remove(alert['threshold'], alert['id'])
+
+    def _load(self):
+        if self._loaded:
+            return
+        conn = self._connect()
+        try:
+            rows = conn.execute('SELECT id, metric, threshold, direction, once, label FROM price_alerts WHERE active = 1').fetchall()
+        finally:
+            conn.close()
+        for row in rows:
+            alert = dict(row)
+            alert['once'] = bool(alert['once'])
+            self.alerts[alert['id']] = alert
+            self._index(alert)
+        self._loaded = True
+
+    def register(self, specs):
+        """Add alerts from dicts with metric, threshold, direction, once, label"""
+        alerts = []
+        for spec in specs:
+            metric = spec.get('metric')
+            direction = spec.get('direction', 'cross')
+            if metric not in METRICS:
+                raise ValueError(f"metric must be one of {', '.join(METRICS)}")
+            if direction not in DIRECTIONS:
+                raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+            alerts.append({'metric': metric, 'threshold': float(spec['threshold']), 'direction': direction,
+                           'once': bool(spec.get('once', False)), 'label': spec.get('label')})
+        with self._lock:
+            self._load()
+            conn = self._connect()
+            try:
+                with conn:
+                    for alert in alerts:
+                        cursor = conn.execute('INSERT INTO price_alerts (metric, threshold, direction, once, label) VALUES (?, ?, ?, ?, ?)',
+                                              (alert['metric'], alert['threshold'], alert['direction'], int(alert['once']), alert['label']))
+                        alert['id'] = cursor.lastrowid
+            finally:
+                conn.close()
+            for alert in alerts:
+                self.alerts[alert['id']] = alert
+                self._index(alert)
+        return alerts
+
+    def remove(self, alert_id):
+        with self._lock:
+            self._load()
+            alert = self.alerts.pop(alert_id, None)
+            if alert is None:
+                return False
+            self._unindex(alert)
+            self._deactivate([alert_id])
+            return True
+
+    def _deactivate(self, alert_ids, triggered=False):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany('UPDATE price_alerts SET active = 0, triggered_at = ? WHERE id = ?',
+                                 [(datetime.now().isoformat() if triggered else None, i) for i in alert_ids])
+        finally:
+            conn.close()
+
+    def list(self):
+        with self._lock:
+            self._load()
+            return sorted(self.alerts.values(), key=lambda a: (a['metric'], a['threshold']))
+
+    def update(self, metric, value):
+        """Record a new value for ``metric`` and emit an event per threshold crossed"""
+        if value is None:
+            return []
+        with self._lock:
+            self._load()
+            previous = self.last.get(metric)
+            self.last[metric] = value
+            if previous is None or value == previous:
+                return []
+            if value > previous:
+                crossed, direction = self._up[metric].crossed_up(previous, value), 'up'
+            else:
+                crossed, direction = self._down[metric].crossed_down(previous, value), 'down'
+            events, retired = [], []
+            timestamp = datetime.now().isoformat()
+            for alert_id in crossed:
+                alert = self.alerts[alert_id]
+                self._seq += 1
+                events.append({'id': self._seq, 'alert_id': alert_id, 'metric': metric, 'label': alert['label'],
+                               'threshold': alert['threshold'], 'direction': direction,
+                               'previous': previous, 'value': value, 'timestamp': timestamp})
+                if alert['once']:
+                    retired.append(alert)
+            for alert in retired:
+                del self.alerts[alert['id']]
+                self._unindex(alert)
+        if retired:
+            self._deactivate([a['id'] for a in retired], triggered=True)
+        for event in events:
+            for sink in self.sinks:
+                try:
+                    sink.send(event)
+                except Exception as e:
+                    logger.error(f"Error delivering alert {event['id']}: {str(e)}")
+        return events
+
+
+alert_stream = SseSink()
+alert_engine = AlertEngine(sinks=[LogSink(), alert_stream] + ([WebhookSink(ALERT_WEBHOOK_URL)] if ALERT_WEBHOOK_URL else []))
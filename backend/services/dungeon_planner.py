@@ -0,0 +1,289 @@
+import math
+import threading
+from collections import OrderedDict
+import numpy as np
+from services.quest_analytics import DATA_DIR, gold_prices, load_feed
+
+# Planning resolution; every dungeon currently runs in 900 s, one slot per run
+SLOT_SECONDS = 900
+HORIZON_HOURS = 24
+# Longest budget a plan can be asked for
+MAX_HOURS = 7 * 24
+# Solved tables kept for reuse; a table is tied to exact dungeon values, quests and keys
+TABLE_CACHE_SIZE = 32
+# Kill chance bonus per level over the recommended combat level, as DungeonCalculator.js scales it
+LEVEL_SCALING = {
+    'ForgottenCrossroads': 0.0175,
+    'ThievesDen': 0.01,
+    'AncientTombs': 0.0075,
+    'FrostboundKeep': 0.005,
+    'CrimsonHall': 0.00275,
+}
+DEFAULT_LEVEL_SCALING = 0.01
+MAX_LEVEL_BONUS = 0.25
+UNDERLEVEL_PENALTY = 0.03
+
+
+def kill_chance(dungeon, combat_level):
+    """Boss kill chance at ``combat_level``: the level terms of DungeonCalculator's success chance"""
+    chance = float(dungeon.get('dungeonBossKillChance') or 0)
+    difference = combat_level - (dungeon.get('recommendedCombatLevel') or 0)
+    if difference > 0:
+        chance += min(MAX_LEVEL_BONUS, difference * LEVEL_SCALING.get(dungeon.get('id'), DEFAULT_LEVEL_SCALING))
+    else:
+        chance += difference * UNDERLEVEL_PENALTY
+    return min(max(chance, 0.0), 1.0)
+
+
+def _slots(seconds, slot_seconds):
+    return max(1, math.ceil(float(seconds) / slot_seconds))
+
+
+def tier_loot_values(definitions, tier_values):
+    """Dungeon id -> GOLD per kill from per-tier loot values; tier 1 is the lowest recommended level"""
+    ranked = sorted((d for d in definitions or [] if d.get('id')), key=lambda d: d.get('recommendedCombatLevel') or 0)
+    return {d['id']: float(tier_values.get(tier) or 0) for tier, d in enumerate(ranked, start=1)}
+
+
+def dungeon_options(definitions, combat_level, loot_values, balances, slot_seconds=SLOT_SECONDS):
+    """Expected GOLD per run of each dungeon and the keys held for it.
+
+    A run spends one key and pays the dungeon's loot value when the boss
+    dies. ``loot_values`` maps dungeon id to GOLD per kill.
+    """
+    options = []
+    for dungeon in definitions or []:
+        if not dungeon.get('id') or not dungeon.get('keyFungibleAssetId'):
+            continue
+        chance = kill_chance(dungeon, combat_level)
+        loot = float(loot_values.get(dungeon['id']) or 0)
+        options.append({
+            'id': dungeon['id'],
+            'name': dungeon.get('name'),
+            'key': dungeon['keyFungibleAssetId'],
+            'slots': _slots(dungeon.get('durationInSeconds') or slot_seconds, slot_seconds),
+            'kill_chance': round(chance, 4),
+            'loot_value': loot,
+            'value': round(chance * loot, 4),
+            'keys': int(balances.get(dungeon['keyFungibleAssetId'], 0)),
+        })
+    return options
+
+
+def quest_templates(claims, prices, key_ids, combat_level, slot_seconds=SLOT_SECONDS):
+    """Quests as observed in the claims, grouped by the keys they grant.
+
+    Only claims made at or below ``combat_level`` are used (all of them if
+    there are none). Each template takes the median observed duration and
+    the mean GOLD value of its non-key rewards.
+    """
+    claims = [c for c in claims if c.get('startedAt') and c.get('claimedAt')]
+    eligible = [c for c in claims if (c.get('nftCombatLevel') or 0) <= combat_level] or claims
+    if not eligible:
+        return []
+    started = np.array([c['startedAt'].rstrip('Z') for c in eligible], dtype='datetime64[ms]')
+    claimed = np.array([c['claimedAt'].rstrip('Z') for c in eligible], dtype='datetime64[ms]')
+    seconds = (claimed - started).astype(np.float64) / 1000
+
+    groups = {}
+    for claim, duration in zip(eligible, seconds):
+        keys, gold = {}, 0.0
+        for reward in claim.get('rewards') or ():
+            asset, amount = reward.get('fungibleAssetId'), float(reward.get('amount') or 0)
+            if asset in key_ids:
+                keys[asset] = keys.get(asset, 0) + int(amount)
+            else:
+                gold += amount * prices.get(asset, 0.0)
+        group = groups.setdefault(tuple(sorted(keys.items())), ([], []))
+        group[0].append(duration)
+        group[1].append(gold)
+    return [{
+        'keys': dict(shape),
+        'claims': len(durations),
+        'slots': _slots(np.median(durations), slot_seconds),
+        'gold': round(float(np.mean(golds)), 4),
+    } for shape, (durations, golds) in sorted(groups.items())]
+
+
+class _Table:
+    """Best expected GOLD for every slot budget up to ``capacity``.
+
+    Quests are unbounded: each is a bundle of the quest plus 0..k runs with
+    each key it grants (keys are fungible, so a quest's keys never need to
+    wait for another quest's). Bundles fill an unbounded knapsack over time
+    slots; keys already held then enter as one bounded layer per dungeon,
+    taking r runs of that dungeon for r up to its key count.
+    """
+
+    def __init__(self, dungeons, quests, capacity):
+        self.dungeons = dungeons
+        self.capacity = capacity
+        by_key = {d['key']: i for i, d in enumerate(dungeons) if d['value'] > 0}
+        self.bundles = []
+        for q, quest in enumerate(quests):
+            choices = [()]
+            for key, count in quest['keys'].items():
+                if key in by_key:
+                    choices = [c + ((by_key[key], runs),) for c in choices for runs in range(count + 1)]
+            for runs in choices:
+                slots = quest['slots'] + sum(n * dungeons[d]['slots'] for d, n in runs)
+                value = quest['gold'] + sum(n * dungeons[d]['value'] for d, n in runs)
+                if slots <= capacity and value > 0:
+                    self.bundles.append((q, runs, slots, value))
+
+        best = [0.0] * (capacity + 1)
+        self.bundle_choice = [-1] * (capacity + 1)
+        for t in range(1, capacity + 1):
+            best[t] = best[t - 1]
+            for b, (_, _, slots, value) in enumerate(self.bundles):
+                if slots <= t and best[t - slots] + value > best[t]:
+                    best[t] = best[t - slots] + value
+                    self.bundle_choice[t] = b
+
+        best = np.array(best)
+        self.layers = []
+        for d, dungeon in enumerate(dungeons):
+            limit = min(dungeon['keys'], capacity // dungeon['slots'])
+            if dungeon['value'] <= 0 or limit <= 0:
+                continue
+            runs = np.zeros(capacity + 1, dtype=np.int64)
+            layer = best.copy()
+            for r in range(1, limit + 1):
+                cost = r * dungeon['slots']
+                candidate = best[:-cost] + r * dungeon['value']
+                improved = candidate > layer[cost:]
+                layer[cost:] = np.where(improved, candidate, layer[cost:])
+                runs[cost:] = np.where(improved, r, runs[cost:])
+            self.layers.append((d, runs))
+            best = layer
+        self.best = best
+
+    def solve(self, budget):
+        """(expected GOLD, runs from held keys per dungeon, bundles) for ``budget`` slots"""
+        t = min(budget, self.capacity)
+        value = float(self.best[t])
+        held = {}
+        for d, runs in reversed(self.layers):
+            if runs[t]:
+                held[d] = int(runs[t])
+                t -= held[d] * self.dungeons[d]['slots']
+        bundles = []
+        while t > 0:
+            b = self.bundle_choice[t]
+            if b < 0:
+                t -= 1
+                continue
+            bundles.append(self.bundles[b])
+            t -= self.bundles[b][2]
+        return value, held, bundles
+
+
+class DungeonPlanner:
+    """Schedules quests and dungeon runs to maximize expected GOLD per day.
+
+    The NFT does one thing at a time, so a plan is a set of quests and runs
+    that fits the time budget, with each run spending a held or quest-earned
+    key. Tables are solved for every budget up to the horizon at once and
+    memoized on the exact dungeon values, quest templates and key balances;
+    a new combat level, price or balance produces a new key and a new table.
+    """
+
+    def __init__(self, slot_seconds=SLOT_SECONDS, cache_size=TABLE_CACHE_SIZE):
+        self.slot_seconds = slot_seconds
+        self.cache_size = cache_size
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _table(self, dungeons, quests, capacity):
+        key = (capacity,
+               tuple((d['id'], d['key'], d['slots'], d['value'], d['keys']) for d in dungeons),
+               tuple((tuple(sorted(q['keys'].items())), q['slots'], q['gold']) for q in quests))
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                self.hits += 1
+                return table
+            self.misses += 1
+        table = _Table(dungeons, quests, capacity)
+        with self._lock:
+            self._tables[key] = table
+            while len(self._tables) > self.cache_size:
+                self._tables.popitem(last=False)
+        return table
+
+    def plan(self, tier_values, combat_level=None, budget_hours=HORIZON_HOURS, balances=None, loot_values=None,
+             data_dir=DATA_DIR):
+        """Best schedule for ``budget_hours`` from the fetcher's saved feeds.
+
+        A kill pays its tier's entry in ``tier_values`` unless ``loot_values``
+        (dungeon id -> GOLD) overrides it. ``combat_level`` defaults to the NFT's level on its latest quest claim
+        and ``balances`` (asset id -> amount) to fungible_balances.json.
+        """
+        budget_hours = float(budget_hours)
+        if not 0 < budget_hours <= MAX_HOURS:
+            raise ValueError(f'budget_hours must be between 0 and {MAX_HOURS}')
+        definitions = load_feed('dungeon_definitions.json', data_dir)
+        claims = load_feed('recent_quest_claims.json', data_dir)
+        feed_balances = load_feed('fungible_balances.json', data_dir)
+        if combat_level is None:
+            latest = max((c for c in claims if c.get('claimedAt')), key=lambda c: c['claimedAt'], default={})
+            combat_level = latest.get('nftCombatLevel') or 0
+        combat_level = int(combat_level)
+        if balances is None:
+            balances = {b['fungibleAssetId']: float(b.get('amount') or 0) for b in feed_balances if b.get('fungibleAssetId')}
+
+        values = {**tier_loot_values(definitions, tier_values), **(loot_values or {})}
+        dungeons = dungeon_options(definitions, combat_level, values, balances, self.slot_seconds)
+        quests = quest_templates(claims, gold_prices(feed_balances), {d['key'] for d in dungeons}, combat_level,
+                                 self.slot_seconds)
+        budget = int(budget_hours * 3600 // self.slot_seconds)
+        capacity = max(budget, int(HORIZON_HOURS * 3600 // self.slot_seconds))
+        value, held, bundles = self._table(dungeons, quests, capacity).solve(budget)
+
+        schedule, used = [], 0
+        for d, runs in sorted(held.items()):
+            dungeon = dungeons[d]
+            schedule.append(self._runs(dungeon, runs, 'held', used))
+            used += runs * dungeon['slots']
+        # Repeats of the same bundle are listed once with a count
+        counts = OrderedDict()
+        for q, runs, _, _ in sorted(bundles, key=lambda b: (b[0], b[1])):
+            counts[(q, runs)] = counts.get((q, runs), 0) + 1
+        for (q, runs), times in counts.items():
+            quest = quests[q]
+            schedule.append({'action': 'quest', 'count': times, 'keys': quest['keys'],
+                             'start_minutes': used * self.slot_seconds // 60,
+                             'minutes': times * quest['slots'] * self.slot_seconds // 60,
+                             'expected_gold': round(times * quest['gold'], 4)})
+            used += times * quest['slots']
+            for d, count in runs:
+                if count:
+                    schedule.append(self._runs(dungeons[d], times * count, 'quest', used))
+                    used += times * count * dungeons[d]['slots']
+        return {
+            'combat_level': combat_level,
+            'budget_hours': budget_hours,
+            'slot_minutes': self.slot_seconds / 60,
+            'expected_gold': round(value, 4),
+            'gold_per_day': round(value * 24 / budget_hours, 4),
+            'minutes_used': used * self.slot_seconds // 60,
+            'schedule': schedule,
+            'dungeons': dungeons,
+            'quests': quests,
+        }
+
+    def _runs(self, dungeon, runs, key_source, start):
+        return {'action': 'dungeon', 'dungeon_id': dungeon['id'], 'name': dungeon['name'], 'runs': runs,
+                'key_source': key_source, 'start_minutes': start * self.slot_seconds // 60,
+                'minutes': runs * dungeon['slots'] * self.slot_seconds // 60,
+                'expected_gold': round(runs * dungeon['value'], 4)}
+
+    def stats(self):
+        with self._lock:
+            return {'tables': len(self._tables), 'hits': self.hits, 'misses': self.misses}
+
+
+dungeon_planner = DungeonPlanner()
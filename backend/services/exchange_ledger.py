@@ -0,0 +1,170 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+EXCHANGES_FILE = os.path.join('data', 'recent_exchanges.json')
+
+# Trailing windows in UTC calendar days (1 = today so far)
+WINDOWS = (1, 7, 30)
+FIELDS = ('exchanges', 'offer_count', 'offer_price_total', 'earned', 'staking_reward')
+COUNT_FIELDS = {'exchanges', 'offer_count'}
+EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+
+
+def _day(timestamp):
+    """UTC day number of an ISO timestamp"""
+    return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).astimezone(timezone.utc).toordinal() - EPOCH_ORDINAL
+
+
+def _today():
+    return datetime.now(timezone.utc).toordinal() - EPOCH_ORDINAL
+
+
+def _date(day):
+    return datetime.fromordinal(day + EPOCH_ORDINAL).strftime('%Y-%m-%d')
+
+
+def _values(exchange):
+    return (
+        1.0,
+        float(exchange.get('offerCount') or 0),
+        float(exchange.get('offerPriceTotal') or 0),
+        float(exchange.get('totalEarned') or 0),
+        float(exchange.get('stakingReward') or 0),
+    )
+
+
+def _as_dict(values):
+    return {name: int(round(value)) if name in COUNT_FIELDS else round(value, 4) for name, value in zip(FIELDS, values)}
+
+
+class RollingWindows:
+    """Ring buffer of daily buckets with running sums over trailing windows.
+
+    Adding a record updates its bucket and every window it falls in; moving
+    to a new day subtracts only the bucket that leaves each window, so both
+    are O(len(windows)) regardless of history length.
+    """
+
+    def __init__(self, width, windows=WINDOWS):
+        self.width = width
+        self.windows = windows
+        self.size = max(windows)
+        self.ring = [[0.0] * width for _ in range(self.size)]
+        self.sums = {w: [0.0] * width for w in windows}
+        self.head = None
+
+    def advance(self, day):
+        """Move the newest bucket forward to ``day``"""
+        if self.head is None:
+            self.head = day
+            return
+        if day - self.head >= self.size:
+            # Everything in the ring has aged out
+            self.ring = [[0.0] * self.width for _ in range(self.size)]
+            self.sums = {w: [0.0] * self.width for w in self.windows}
+            self.head = day
+            return
+        while self.head < day:
+            self.head += 1
+            for w, total in self.sums.items():
+                leaving = self.ring[(self.head - w) % self.size]
+                for i, value in enumerate(leaving):
+                    total[i] -= value
+            self.ring[self.head % self.size] = [0.0] * self.width
+
+    def add(self, day, values):
+        self.advance(max(day, self.head if self.head is not None else day))
+        age = self.head - day
+        if age >= self.size:
+            return
+        bucket = self.ring[day % self.size]
+        for i, value in enumerate(values):
+            bucket[i] += value
+        for w, total in self.sums.items():
+            if age < w:
+                for i, value in enumerate(values):
+                    total[i] += value
+
+
+class ExchangeLedger:
+    """Loot-exchange revenue ledger built incrementally from recent_exchanges.json.
+
+    Exchanges are ingested once by id; the per-day history, all-time totals
+    and the rolling 1/7/30-day window sums are updated in place, so a summary
+    never rescans the feed.
+    """
+
+    def __init__(self, path=EXCHANGES_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._seen = set()
+        self.daily = {}
+        self.totals = [0.0] * len(FIELDS)
+        self.windows = RollingWindows(len(FIELDS))
+        self.last_exchange_at = None
+
+    def ingest(self, exchanges):
+        """Add exchanges not seen before; returns how many were new"""
+        added = 0
+        with self._lock:
+            for exchange in exchanges:
+                key = exchange.get('id')
+                if key is None or key in self._seen or not exchange.get('createdAt'):
+                    continue
+                self._seen.add(key)
+                day = _day(exchange['createdAt'])
+                values = _values(exchange)
+                bucket = self.daily.setdefault(day, [0.0] * len(FIELDS))
+                for i, value in enumerate(values):
+                    bucket[i] += value
+                    self.totals[i] += value
+                self.windows.add(day, values)
+                if self.last_exchange_at is None or exchange['createdAt'] > self.last_exchange_at:
+                    self.last_exchange_at = exchange['createdAt']
+                added += 1
+        return added
+
+    def refresh(self):
+        """Ingest the feed file if it changed since the last call"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return 0
+        if mtime == self._mtime:
+            return 0
+        with open(self.path) as f:
+            exchanges = json.load(f).get('data') or []
+        self._mtime = mtime
+        return self.ingest(exchanges)
+
+    def rolling(self):
+        """Window sums as of today"""
+        with self._lock:
+            self.windows.advance(max(_today(), self.windows.head if self.windows.head is not None else 0))
+            return {f'{w}d': _as_dict(total) for w, total in self.windows.sums.items()}
+
+    def summary(self):
+        self.refresh()
+        windows = self.rolling()
+        with self._lock:
+            return {
+                'totals': _as_dict(self.totals),
+                'windows': windows,
+                'daily': [dict(date=_date(day), **_as_dict(values))
+                          for day, values in sorted(self.daily.items(), reverse=True)],
+                'last_exchange_at': self.last_exchange_at,
+            }
+
+    def revenue(self):
+        """GOLD earned from exchanges: all-time total and 7-day daily average"""
+        self.refresh()
+        earned = FIELDS.index('earned')
+        windows = self.rolling()
+        with self._lock:
+            return self.totals[earned], windows['7d']['earned'] / 7
+
+
+exchange_ledger = ExchangeLedger()
@@ -0,0 +1,247 @@
+import os
+import re
+import sqlite3
+import threading
+from services.exchange_ledger import ExchangeLedger
+from services.portfolio import PortfolioValuation
+from services.quest_analytics import DATA_DIR, DB_PATH, ensure_gold_earnings
+
+# Wallets synced at once; every request still goes through game_api_limiter
+FLEET_SYNC_WORKERS = int(os.getenv('FLEET_SYNC_WORKERS', 4))
+# Investment basis given to the env wallet when the registry is first created
+DEFAULT_INVESTMENT = float(os.getenv('TOTAL_INVESTMENT', 475))
+
+# Wallet ids name per-wallet directories, so keep them path-safe
+_WALLET_ID_RE = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def wallet_dir(wallet_id, data_dir=DATA_DIR):
+    """Directory holding one wallet's copies of the per-wallet feeds"""
+    return os.path.join(data_dir, 'wallets', wallet_id)
+
+
+def demux(items, wallet_ids, field='walletId'):
+    """Split one global feed into per-wallet lists in a single pass.
+
+    Entries for wallets outside ``wallet_ids`` are dropped; every wallet gets
+    a list, empty if the feed had nothing for it.
+    """
+    buckets = {wallet_id: [] for wallet_id in wallet_ids}
+    if not items or not isinstance(items, list):
+        return buckets
+    for item in items:
+        bucket = buckets.get(item.get(field))
+        if bucket is not None:
+            bucket.append(item)
+    return buckets
+
+
+def _validate(wallet_id):
+    if not isinstance(wallet_id, str) or not _WALLET_ID_RE.match(wallet_id):
+        raise ValueError(f'Invalid wallet id: {wallet_id!r}')
+    return wallet_id
+
+
+class WalletRegistry:
+    """Tracked wallets, the NFTs each one holds, and their investment basis.
+
+    A wallet's basis is its own investment plus the cost of its NFTs. The
+    registry lives in the app database next to the gold_earnings rows it
+    partitions; deactivated wallets keep their history but drop out of syncs
+    and fleet rollups.
+    """
+
+    def __init__(self, db_path=DB_PATH, data_dir=DATA_DIR):
+        self.db_path = db_path
+        self.data_dir = data_dir
+        self._lock = threading.Lock()
+        self._ledgers = {}
+        self._portfolios = {}
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute(''' CREATE TABLE IF NOT EXISTS wallets (wallet_id TEXT PRIMARY KEY, label TEXT, investment REAL NOT NULL DEFAULT 0, active INTEGER NOT NULL DEFAULT 1, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP) ''')
+        conn.execute(''' CREATE TABLE IF NOT EXISTS wallet_nfts (nft_id TEXT PRIMARY KEY, wallet_id TEXT NOT NULL, label TEXT, cost REAL NOT NULL DEFAULT 0, FOREIGN KEY (wallet_id) REFERENCES wallets(wallet_id)) ''')
+        return conn
+
+    def bootstrap(self, wallet_id=None, investment=DEFAULT_INVESTMENT):
+        """Seed an empty registry with the single NIGHTVALE_WALLET_ADDRESS wallet"""
+        wallet_id = wallet_id or os.getenv('NIGHTVALE_WALLET_ADDRESS')
+        if not wallet_id or not _WALLET_ID_RE.match(wallet_id):
+            return False
+        conn = self._connect()
+        try:
+            with conn:
+                if conn.execute('SELECT COUNT(*) FROM wallets').fetchone()[0]:
+                    return False
+                conn.execute('INSERT INTO wallets (wallet_id, label, investment) VALUES (?, ?, ?)',
+                             (wallet_id, 'Primary', investment))
+            return True
+        finally:
+            conn.close()
+
+    def wallets(self, include_inactive=False):
+        """Registered wallets with their NFTs and basis"""
+        conn = self._connect()
+        try:
+            rows = conn.execute('SELECT wallet_id, label, investment, active, created_at FROM wallets'
+                                + ('' if include_inactive else ' WHERE active = 1') + ' ORDER BY created_at, wallet_id').fetchall()
+            nfts = {}
+            for nft in conn.execute('SELECT nft_id, wallet_id, label, cost FROM wallet_nfts ORDER BY nft_id'):
+                nfts.setdefault(nft['wallet_id'], []).append({'nft_id': nft['nft_id'], 'label': nft['label'], 'cost': nft['cost']})
+        finally:
+            conn.close()
+        return [{
+            'wallet_id': row['wallet_id'],
+            'label': row['label'],
+            'investment': row['investment'],
+            'active': bool(row['active']),
+            'created_at': row['created_at'],
+            'nfts': nfts.get(row['wallet_id'], []),
+            'basis': row['investment'] + sum(n['cost'] for n in nfts.get(row['wallet_id'], [])),
+        } for row in rows]
+
+    def wallet_ids(self):
+        return [w['wallet_id'] for w in self.wallets()]
+
+    def get(self, wallet_id):
+        return next((w for w in self.wallets(include_inactive=True) if w['wallet_id'] == wallet_id), None)
+
+    def register(self, wallet_id, label=None, investment=None, nfts=()):
+        """Add or update a wallet (reactivating it) and upsert its NFTs.
+
+        ``nfts`` are dicts with nft_id and optional label and cost; an NFT
+        already registered to another wallet moves to this one.
+        """
+        _validate(wallet_id)
+        if investment is not None and float(investment) < 0:
+            raise ValueError('investment must not be negative')
+        rows = []
+        for nft in nfts:
+            if not nft.get('nft_id'):
+                raise ValueError('Every NFT needs an nft_id')
+            cost = float(nft.get('cost') or 0)
+            if cost < 0:
+                raise ValueError('NFT cost must not be negative')
+            rows.append((str(nft['nft_id']), wallet_id, nft.get('label'), cost))
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(''' INSERT INTO wallets (wallet_id, label, investment) VALUES (?, ?, ?)
+                                 ON CONFLICT(wallet_id) DO UPDATE SET label = COALESCE(excluded.label, label),
+                                 investment = CASE WHEN ? IS NULL THEN investment ELSE excluded.investment END, active = 1 ''',
+                             (wallet_id, label, float(investment or 0), investment))
+                conn.executemany(''' INSERT INTO wallet_nfts (nft_id, wallet_id, label, cost) VALUES (?, ?, ?, ?)
+                                     ON CONFLICT(nft_id) DO UPDATE SET wallet_id = excluded.wallet_id,
+                                     label = COALESCE(excluded.label, label), cost = excluded.cost ''', rows)
+        finally:
+            conn.close()
+        return self.get(wallet_id)
+
+    def deactivate(self, wallet_id):
+        """Stop syncing a wallet; its earnings history is kept. Returns False if unknown"""
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute('UPDATE wallets SET active = 0 WHERE wallet_id = ?', (wallet_id,)).rowcount > 0
+        finally:
+            conn.close()
+
+    def basis(self, wallet_id=None):
+        """Investment basis of one wallet, or of every active wallet (None if none registered)"""
+        if wallet_id is not None:
+            wallet = self.get(wallet_id)
+            return wallet['basis'] if wallet else None
+        wallets = self.wallets()
+        return sum(w['basis'] for w in wallets) if wallets else None
+
+    def ledger(self, wallet_id):
+        """Exchange ledger over the wallet's own recent_exchanges.json"""
+        with self._lock:
+            ledger = self._ledgers.get(wallet_id)
+            if ledger is None:
+                ledger = ExchangeLedger(os.path.join(wallet_dir(wallet_id, self.data_dir), 'recent_exchanges.json'))
+                self._ledgers[wallet_id] = ledger
+            return ledger
+
+    def portfolio(self, wallet_id):
+        """Valuation of the wallet's own balances and inventory files"""
+        with self._lock:
+            valuation = self._portfolios.get(wallet_id)
+            if valuation is None:
+                valuation = PortfolioValuation(self.db_path, wallet_dir(wallet_id, self.data_dir), wallet_id)
+                self._portfolios[wallet_id] = valuation
+            return valuation
+
+    def roi(self, gold_usd):
+        """Per-wallet quest earnings and ROI against each basis, plus fleet-wide totals.
+
+        One GROUP BY over gold_earnings serves every wallet. days_to_roi is
+        None when a wallet earns nothing.
+        """
+        wallets = self.wallets()
+        conn = self._connect()
+        try:
+            ensure_gold_earnings(conn)
+            conn.commit()
+            earned = {row['wallet_id']: row for row in conn.execute(
+                'SELECT wallet_id, SUM(amount) AS total, COUNT(DISTINCT date) AS days, MIN(date) AS start_date '
+                'FROM gold_earnings WHERE wallet_id IS NOT NULL GROUP BY wallet_id')}
+        finally:
+            conn.close()
+
+        per_wallet = []
+        fleet = {'total_earnings': 0.0, 'daily_average': 0.0, 'exchange_revenue': 0.0, 'exchange_daily_average': 0.0}
+        for wallet in wallets:
+            row = earned.get(wallet['wallet_id'])
+            total = row['total'] if row and row['total'] else 0
+            days = row['days'] if row and row['days'] else 1
+            exchange_revenue, exchange_daily_average = self.ledger(wallet['wallet_id']).revenue()
+            figures = _roi_figures(total, total / days, gold_usd, wallet['basis'])
+            per_wallet.append({
+                'wallet_id': wallet['wallet_id'],
+                'label': wallet['label'],
+                'nfts': len(wallet['nfts']),
+                'start_date': row['start_date'] if row else None,
+                'days': row['days'] if row else 0,
+                **figures,
+                'exchange_revenue': exchange_revenue,
+                'exchange_daily_average': exchange_daily_average,
+            })
+            fleet['total_earnings'] += total
+            fleet['daily_average'] += total / days
+            fleet['exchange_revenue'] += exchange_revenue
+            fleet['exchange_daily_average'] += exchange_daily_average
+
+        basis = sum(w['basis'] for w in wallets)
+        return {
+            'gold_price_usd': gold_usd,
+            'wallets': per_wallet,
+            'fleet': {
+                'wallets': len(wallets),
+                'nfts': sum(len(w['nfts']) for w in wallets),
+                **_roi_figures(fleet['total_earnings'], fleet['daily_average'], gold_usd, basis),
+                'exchange_revenue': fleet['exchange_revenue'],
+                'exchange_daily_average': fleet['exchange_daily_average'],
+            },
+        }
+
+
+def _roi_figures(total_earnings, daily_average, gold_usd, investment):
+    """The /roi/stats figures for one basis"""
+    current_value_usd = total_earnings * gold_usd
+    daily_average_usd = daily_average * gold_usd
+    roi_percentage = ((current_value_usd - investment) / investment) * 100 if investment > 0 else 0
+    days_to_roi = max(0, investment - current_value_usd) / daily_average_usd if daily_average_usd > 0 else None
+    return {
+        'total_investment': investment,
+        'total_earnings': round(total_earnings, 4),
+        'daily_average': round(daily_average, 4),
+        'current_value_usd': round(current_value_usd, 4),
+        'roi_percentage': round(roi_percentage, 4),
+        'days_to_roi': round(days_to_roi, 2) if days_to_roi is not None else None,
+    }
+
+
+wallet_registry = WalletRegistry()
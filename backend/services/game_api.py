@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import requests
+from services.rate_limiter import game_api_limiter
+from services.upstream_scheduler import upstream_scheduler, BACKGROUND, INTERACTIVE, UpstreamBusy
+from services.tracing import current_trace, instrument_adapter, span
+
+GAME_API_BASE_URL = os.getenv('GAME_API_BASE_URL', 'https://api-production.defidungeons.gg')
+
+# On-disk response cache shared by the fetchers and the proxy
+CACHE_DIR = os.getenv(
+    'GAME_API_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cache', 'http')
+)
+
+# Seconds a cached response is served without revalidating, per endpoint.
+# Anything not listed is revalidated on every request (unless the upstream
+# sends Cache-Control: max-age). The proxy's memory cache uses the same
+# windows for these paths, so both caches agree on how stale a response may be.
+FRESHNESS_RULES = {
+    '/dungeon': 3600,
+    '/dungeon/base-item-drop-chances': 6 * 3600,
+    '/item/get-all-items': 300,
+    '/user/achievement-stat/me': 15,
+    '/fungible-asset/my-balances': 30,
+    '/quest/recent-claims': 30,
+    '/trip/recent-rewards': 30,
+    '/loot-exchange/recent-exchanges': 60,
+}
+
+WALLET_HEADER = 'x-selected-wallet-address'
+# Content-Encodings requests decodes into response.content
+DECODED_ENCODINGS = ('identity', 'gzip', 'deflate', 'x-gzip')
+MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+# Keep-alive connection pool shared by every request to the game API
+POOL_CONNECTIONS = int(os.getenv('GAME_API_POOL_CONNECTIONS', 4))
+POOL_MAXSIZE = int(os.getenv('GAME_API_POOL_MAXSIZE', 32))
+
+
+class ApiResponse:
+    """Minimal response object returned by GameApiClient (cached or live)"""
+
+    def __init__(self, status_code, headers, content, url, from_cache=False, revalidated=False):
+        self.status_code = status_code
+        self.headers = requests.structures.CaseInsensitiveDict(headers)
+        self.content = content
+        self.url = url
+        self.from_cache = from_cache
+        self.revalidated = revalidated
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+def freshness_for(path):
+    """Configured freshness in seconds for an endpoint path, or None"""
+    return FRESHNESS_RULES.get(path.split('?', 1)[0].rstrip('/') or '/')
+
+
+class GameApiClient:
+    """Caching HTTP client for the DeFi Dungeons game API.
+
+    GET responses are stored on disk keyed by method, URL, params, wallet and
+    a hash of the Authorization header, so a response is only served back to
+    the credentials it was fetched with. Within their freshness window they
+    are served straight from disk; after that they are revalidated with
+    If-None-Match / If-Modified-Since so an unchanged endpoint costs a 304
+    instead of a full body. Every upstream call goes through the shared
+    rate limiter.
+    """
+
+    def __init__(self, base_url=GAME_API_BASE_URL, cache_dir=CACHE_DIR, limiter=game_api_limiter,
+                 scheduler=upstream_scheduler):
+        self.base_url = base_url
+        self.cache_dir = cache_dir
+        self.limiter = limiter
+        self.scheduler = scheduler
+        self.session = requests.Session()
+        adapter = instrument_adapter(
+            requests.adapters.HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _cache_key(self, method, url, params, wallet, authorization=None):
+        params_key = json.dumps(sorted((params or {}).items()), default=str)
+        auth = hashlib.sha256(authorization.strip().encode()).hexdigest() if authorization else ''
+        raw = '\n'.join([method.upper(), url, params_key, wallet or '', auth])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return base + '.meta.json', base + '.body'
+
+    def _load(self, key):
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                meta['body'] = f.read()
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key, meta, body=None):
+        # Created on first write, so importing the shared client touches no files
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta_path, body_path = self._paths(key)
+        if body is not None:
+            with open(body_path + '.tmp', 'wb') as f:
+                f.write(body)
+            os.replace(body_path + '.tmp', body_path)
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def _freshness(self, path, meta, override):
+        if override is not None:
+            return override
+        configured = freshness_for(path)
+        if configured is not None:
+            return configured
+        match = MAX_AGE_RE.search(meta.get('headers', {}).get('Cache-Control', ''))
+        return int(match.group(1)) if match else 0
+
+    def _send(self, method, url, headers, params, json_body, timeout, stream=False, priority=BACKGROUND):
+        trace = current_trace()
+        mark = len(trace.spans) if trace is not None else 0
+        # Take a rate token before a concurrency slot, so no slot is held while
+        # sleeping on the bucket. Interactive requests may use the limiter's
+        # reserved tokens and give up rather than wait out a long backoff.
+        interactive = priority == INTERACTIVE
+        with span('queue'):
+            timeout = self.scheduler.interactive_max_wait if interactive else None
+            if not self.limiter.acquire(timeout=timeout, priority=interactive):
+                raise UpstreamBusy(f'no game API rate token within {timeout:.0f}s')
+            lease = self.scheduler.acquire(priority)
+        try:
+            start = time.perf_counter()
+            response = self.session.request(
+                method=method,
+                url=url,
+                headers=headers,
+                params=params,
+                json=json_body,
+                verify=True,
+                allow_redirects=True,
+                timeout=timeout,
+                stream=stream
+            )
+        except BaseException:
+            self.scheduler.release(lease)
+            raise
+        if stream:
+            # The connection stays busy until the caller has drained the body
+            self._release_on_close(response, lease)
+        else:
+            self.scheduler.release(lease)
+        if trace is not None:
+            # elapsed runs from send to parsed headers and includes any new connection's setup
+            elapsed = response.elapsed.total_seconds()
+            connect = sum(ms for name, ms in trace.spans[mark:] if name == 'connect') / 1000
+            trace.add('ttfb', max(0.0, elapsed - connect))
+            if not stream:
+                trace.add('download', max(0.0, time.perf_counter() - start - elapsed))
+        self.limiter.report(response.status_code, response.headers.get('Retry-After'))
+        return response
+
+    def _release_on_close(self, response, lease):
+        """Hold the scheduler slot until ``response`` is closed, exactly once"""
+        close = response.close
+        released = threading.Lock()
+
+        def close_and_release():
+            try:
+                close()
+            finally:
+                if released.acquire(blocking=False):
+                    self.scheduler.release(lease)
+
+        response.close = close_and_release
+
+    def request(self, method, path, params=None, headers=None, json=None, timeout=30, freshness=None,
+                priority=BACKGROUND):
+        """Send a request to the game API, using the disk cache for GETs"""
+        url = f'{self.base_url}{path}'
+        headers = dict(headers or {})
+        if method.upper() != 'GET':
+            response = self._send(method, url, headers, params, json, timeout, priority=priority)
+            return ApiResponse(response.status_code, response.headers, response.content, response.url)
+
+        wallet = next((v for k, v in headers.items() if k.lower() == WALLET_HEADER), None)
+        authorization = next((v for k, v in headers.items() if k.lower() == 'authorization'), None)
+        key = self._cache_key(method, url, params, wallet, authorization)
+        cached = self._load(key)
+
+        if cached is not None:
+            if time.time() - cached['stored_at'] < self._freshness(path, cached, freshness):
+                return ApiResponse(cached['status'], cached['headers'], cached['body'], url, from_cache=True)
+            if cached['headers'].get('ETag'):
+                headers['If-None-Match'] = cached['headers']['ETag']
+            if cached['headers'].get('Last-Modified'):
+                headers['If-Modified-Since'] = cached['headers']['Last-Modified']
+
+        response = self._send(method, url, headers, params, None, timeout, priority=priority)
+
+        if response.status_code == 304 and cached is not None:
+            cached['stored_at'] = time.time()
+            body = cached.pop('body')
+            self._store(key, cached)
+            return ApiResponse(cached['status'], cached['headers'], body, url, from_cache=True, revalidated=True)
+
+        # A body requests could not decode (e.g. br) is still compressed; never cache it
+        decoded = response.headers.get('Content-Encoding', 'identity').lower() in DECODED_ENCODINGS
+        if response.status_code == 200 and decoded and 'no-store' not in response.headers.get('Cache-Control', ''):
+            kept_headers = {
+                name: response.headers[name]
+                for name in ('Content-Type', 'ETag', 'Last-Modified', 'Cache-Control')
+                if name in response.headers
+            }
+            self._store(key, {
+                'status': response.status_code,
+                'headers': kept_headers,
+                'stored_at': time.time(),
+                'url': url,
+            }, response.content)
+
+        return ApiResponse(response.status_code, response.headers, response.content, response.url)
+
+    def stream(self, method, path, params=None, headers=None, json=None, timeout=30, priority=BACKGROUND):
+        """Send an uncached request and return the live ``requests`` response.
+
+        The body is not read; callers iterate ``response.raw`` and must close
+        the response to hand the connection back to the pool and release the
+        upstream slot, which is held until then.
+        """
+        return self._send(method, f'{self.base_url}{path}', dict(headers or {}), params, json, timeout,
+                          stream=True, priority=priority)
+
+    def get(self, path, params=None, headers=None, **kwargs):
+        """GET an endpoint through the cache"""
+        return self.request('GET', path, params=params, headers=headers, **kwargs)
+
+
+# Shared client so every tool in this process reuses one session and cache
+game_api = GameApiClient()
@@ -0,0 +1,227 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+import numpy as np
+from services.quest_analytics import DATA_DIR, DB_PATH, GOLD_ASSET
+from services.schema import ensure_schema
+
+# Balances are held as int64 micro-units so summing never accumulates float error
+AMOUNT_SCALE = 10 ** 6
+_NAME_RE = re.compile(r'[^a-z0-9]')
+
+
+def normalize_name(name):
+    """Join key shared by asset ids ('KingsDiamond') and display names ("King's Diamond")"""
+    return _NAME_RE.sub('', (name or '').lower())
+
+
+def to_fixed(amount):
+    """Decimal string to int micro-units (0 when unparsable)"""
+    try:
+        return int((Decimal(str(amount)) * AMOUNT_SCALE).to_integral_value())
+    except (InvalidOperation, ValueError):
+        return 0
+
+
+def _load_snapshot(filename, data_dir):
+    try:
+        with open(os.path.join(data_dir, filename)) as f:
+            saved = json.load(f)
+        return saved.get('timestamp'), saved.get('data') or []
+    except (OSError, ValueError):
+        return None, []
+
+
+class PriceIndex:
+    """GOLD prices for one price snapshot: fungible assets by id, equipment by itemMetadataId.
+
+    Live exchange offer prices win; assets without one fall back to the
+    base_loot_prices entry with the same normalized name. Equipment is
+    priced from item_prices, keyed on the item's metadata id.
+    """
+
+    def __init__(self, balances, base_prices, item_prices=None):
+        self.prices = {}
+        self.sources = {}
+        for name, price in base_prices.items():
+            self.prices[name] = price
+            self.sources[name] = 'base_loot_prices'
+        for balance in balances:
+            asset = balance.get('fungibleAssetId')
+            offer = float(balance.get('offerPrice') or 0)
+            if asset and offer > 0:
+                self.prices[normalize_name(asset)] = offer
+                self.sources[normalize_name(asset)] = 'offer'
+        self.prices[normalize_name(GOLD_ASSET)] = 1.0
+        self.sources[normalize_name(GOLD_ASSET)] = 'gold'
+        self.item_prices = dict(item_prices or {})
+
+    def vector(self, names):
+        keys = [normalize_name(n) for n in names]
+        return (np.array([self.prices.get(k, 0.0) for k in keys], dtype=np.float64),
+                [self.sources.get(k) for k in keys])
+
+    def item_vector(self, item_ids):
+        return np.array([self.item_prices.get(i, 0.0) for i in item_ids], dtype=np.float64)
+
+
+class PortfolioValuation:
+    """Values fungible balances and inventory items in GOLD and USD.
+
+    The price index is rebuilt only when the balances file, base_loot_prices
+    or item_prices change. Valuing is read-only: the sync calls ``record()``
+    after each balances fetch, and valuations report the change since the
+    last recorded snapshot. ``wallet_id`` scopes the snapshots ('' for the
+    primary wallet's top-level files).
+    """
+
+    def __init__(self, db_path=DB_PATH, data_dir=DATA_DIR, wallet_id=''):
+        self.db_path = db_path
+        self.data_dir = data_dir
+        self.wallet_id = wallet_id
+        self._lock = threading.Lock()
+        self._index = None
+        self._index_version = None
+
+    def _connect(self):
+        ensure_schema(self.db_path)
+        return sqlite3.connect(self.db_path)
+
+    def _price_index(self, conn, balances_timestamp, balances):
+        version = (balances_timestamp,
+                   conn.execute('SELECT COUNT(*), MAX(last_updated) FROM base_loot_prices').fetchone(),
+                   conn.execute('SELECT COUNT(*), MAX(updated_at) FROM item_prices').fetchone())
+        with self._lock:
+            if self._index is not None and self._index_version == version:
+                return self._index
+        base_rows = conn.execute('SELECT name, base_price FROM base_loot_prices').fetchall()
+        item_rows = conn.execute('SELECT item_metadata_id, price FROM item_prices').fetchall()
+        index = PriceIndex(balances, {normalize_name(name): price for name, price in base_rows}, dict(item_rows))
+        with self._lock:
+            self._index, self._index_version = index, version
+        return index
+
+    def _holdings(self, conn):
+        """Price the saved balances and inventory in one vectorized pass"""
+        balances_timestamp, balances = _load_snapshot('fungible_balances.json', self.data_dir)
+        _, items = _load_snapshot('inventory_items.json', self.data_dir)
+        index = self._price_index(conn, balances_timestamp, balances)
+
+        assets = [b.get('fungibleAssetId') for b in balances]
+        amounts = np.array([to_fixed(b.get('amount')) for b in balances], dtype=np.int64)
+        prices, sources = index.vector(assets)
+        values = amounts / AMOUNT_SCALE * prices
+
+        item_ids = [i.get('itemMetadataId') or (i.get('itemMetadata') or {}).get('id')
+                    for i in items if not i.get('isDeleted')]
+        item_prices = index.item_vector(item_ids)
+        holdings = {
+            asset: round(float(value), 4)
+            for asset, amount, value in zip(assets, amounts.tolist(), values.tolist()) if amount
+        }
+        return {
+            'timestamp': balances_timestamp,
+            'assets': assets,
+            'amounts': amounts,
+            'prices': prices,
+            'sources': sources,
+            'values': values,
+            'holdings': holdings,
+            'item_ids': item_ids,
+            'item_prices': item_prices,
+            'total_gold': float(values.sum() + item_prices.sum()),
+        }
+
+    def record(self):
+        """Store the current balances snapshot once; the sync calls this after each balances fetch"""
+        conn = self._connect()
+        try:
+            current = self._holdings(conn)
+            if not current['timestamp']:
+                return False
+            with conn:
+                return conn.execute(
+                    'INSERT OR IGNORE INTO portfolio_snapshots (wallet_id, source_timestamp, total_gold, holdings) VALUES (?, ?, ?, ?)',
+                    (self.wallet_id, current['timestamp'], round(current['total_gold'], 4),
+                     json.dumps(current['holdings']))).rowcount > 0
+        finally:
+            conn.close()
+
+    def _previous(self, conn, balances_timestamp):
+        """The last snapshot recorded before ``balances_timestamp``"""
+        previous = conn.execute(
+            'SELECT source_timestamp, total_gold, holdings FROM portfolio_snapshots '
+            'WHERE wallet_id = ? AND source_timestamp < ? ORDER BY source_timestamp DESC LIMIT 1',
+            (self.wallet_id, balances_timestamp or datetime.max.isoformat())).fetchone()
+        if previous is None:
+            return None
+        return {'timestamp': previous[0], 'total_gold': previous[1], 'holdings': json.loads(previous[2])}
+
+    def value(self, gold_usd=0):
+        gold_usd = gold_usd if isinstance(gold_usd, (int, float)) else 0
+        conn = self._connect()
+        try:
+            current = self._holdings(conn)
+            previous = self._previous(conn, current['timestamp'])
+        finally:
+            conn.close()
+
+        total_gold = current['total_gold']
+        breakdown = [
+            {
+                'asset': asset,
+                'amount': amount / AMOUNT_SCALE,
+                'price': float(price),
+                'price_source': source,
+                'value_gold': round(float(value), 4),
+                'change_gold': round(float(value) - previous['holdings'].get(asset, 0), 4) if previous else None,
+            }
+            for asset, amount, price, source, value in zip(current['assets'], current['amounts'].tolist(),
+                                                           current['prices'], current['sources'],
+                                                           current['values'].tolist())
+            if amount
+        ]
+        breakdown.sort(key=lambda row: row['value_gold'], reverse=True)
+        item_prices = current['item_prices']
+        return {
+            'timestamp': current['timestamp'],
+            'total_gold': round(total_gold, 4),
+            'total_usd': round(total_gold * gold_usd, 4),
+            'gold_usd': gold_usd,
+            'assets': breakdown,
+            'equipment': {
+                'count': len(current['item_ids']),
+                'priced': int(np.count_nonzero(item_prices)),
+                'value_gold': round(float(item_prices.sum()), 4),
+                # Metadata ids with no item_prices entry yet
+                'unpriced_ids': sorted({i for i, p in zip(current['item_ids'], item_prices.tolist())
+                                        if not p and i is not None}),
+            },
+            'previous_timestamp': previous['timestamp'] if previous else None,
+            'change_gold': round(total_gold - previous['total_gold'], 4) if previous else None,
+        }
+
+    def set_item_prices(self, prices):
+        """Upsert equipment prices: dicts with itemMetadataId, price and an optional name"""
+        rows = []
+        for entry in prices:
+            price = float(entry['price'])
+            if price < 0:
+                raise ValueError('price must not be negative')
+            rows.append((int(entry['itemMetadataId']), entry.get('name'), price))
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(''' INSERT INTO item_prices (item_metadata_id, name, price) VALUES (?, ?, ?)
+                                     ON CONFLICT(item_metadata_id) DO UPDATE SET name = COALESCE(excluded.name, name),
+                                     price = excluded.price, updated_at = CURRENT_TIMESTAMP ''', rows)
+        finally:
+            conn.close()
+        return len(rows)
+
+
+portfolio = PortfolioValuation()
@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import threading
+import numpy as np
+from services.quest_analytics import DB_PATH
+
+BIRDEYE_BASE_URL = os.getenv('BIRDEYE_BASE_URL', 'https://public-api.birdeye.so')
+MAGIC_EDEN_BASE_URL = os.getenv('MAGIC_EDEN_BASE_URL', 'https://api-mainnet.magiceden.dev')
+GOLD_ADDRESS = 'GoLDDDNBPD72mSCYbC75GoFZ1e97Uczakp8yNi7JHrK4'
+SOL_ADDRESS = 'So11111111111111111111111111111111111111112'
+
+# Series name -> (token address, table holding its USD price points)
+PRICE_SERIES = {
+    'gold': (GOLD_ADDRESS, 'gold_price_history'),
+    'sol': (SOL_ADDRESS, 'sol_price_history'),
+}
+
+_series_cache = {}
+_series_lock = threading.Lock()
+
+
+def ensure_tables(conn):
+    for _, table in PRICE_SERIES.values():
+        conn.execute(f''' CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, price REAL NOT NULL) ''')
+        # One point per timestamp; databases from before schema v4 keep their plain index until migrated
+        conn.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_timestamp ON {table} (timestamp)')
+
+
+def load_series(conn, name):
+    """(datetime64[s] timestamps, float64 prices) for a series, sorted by time.
+
+    Arrays are cached until the table's latest row id or timestamp changes,
+    so a minute-level history is parsed once rather than per request.
+    """
+    table = PRICE_SERIES[name][1]
+    # Separate subqueries keep both lookups on the rowid / timestamp index
+    version = conn.execute(f'SELECT (SELECT MAX(id) FROM {table}), (SELECT MAX(timestamp) FROM {table})').fetchone()
+    with _series_lock:
+        cached = _series_cache.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+    rows = conn.execute(f'SELECT timestamp, price FROM {table} ORDER BY timestamp').fetchall()
+    timestamps = np.array([r[0] for r in rows], dtype='datetime64[s]')
+    prices = np.array([r[1] for r in rows], dtype=np.float64)
+    with _series_lock:
+        _series_cache[name] = (version, (timestamps, prices))
+    return timestamps, prices
+
+
+def as_of(timestamps, prices, when):
+    """Price in effect at each of ``when``: the last point at or before it.
+
+    NaN for times before the first point (and for an empty series), so
+    callers can tell unpriced days from priced ones. One searchsorted over
+    the sorted series, so years of daily dates join against minute-level
+    prices in a single pass.
+    """
+    index = np.searchsorted(timestamps, when, side='right') - 1
+    if len(timestamps) == 0:
+        return np.full(len(index), np.nan)
+    return np.where(index >= 0, prices[np.maximum(index, 0)], np.nan)
+
+
+def realized_roi(current_gold_usd, total_investment, db_path=DB_PATH, wallet_id=None):
+    """Earnings (one wallet's with ``wallet_id``) valued at the GOLD price of the day earned versus today's price"""
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_tables(conn)
+        if wallet_id:
+            rows = conn.execute('SELECT date, SUM(amount) FROM gold_earnings WHERE wallet_id = ? GROUP BY date ORDER BY date',
+                                (wallet_id,)).fetchall()
+        else:
+            rows = conn.execute('SELECT date, SUM(amount) FROM gold_earnings GROUP BY date ORDER BY date').fetchall()
+        gold_ts, gold_prices = load_series(conn, 'gold')
+        sol_ts, sol_prices = load_series(conn, 'sol')
+    finally:
+        conn.close()
+
+    # Value each day's earnings at that day's closing price
+    days = np.array([r[0][:10] for r in rows], dtype='datetime64[D]')
+    amounts = np.array([r[1] or 0 for r in rows], dtype=np.float64)
+    day_close = days.astype('datetime64[s]') + np.timedelta64(86399, 's')
+    gold_usd = as_of(gold_ts, gold_prices, day_close)
+    sol_usd = as_of(sol_ts, sol_prices, day_close)
+
+    total = float(amounts.sum())
+    unpriced = np.isnan(gold_usd)
+    realized_usd = float(np.nansum(amounts * gold_usd))
+    realized_sol = float(np.nansum(amounts * gold_usd / sol_usd)) if len(sol_ts) else None
+    current = current_gold_usd if isinstance(current_gold_usd, (int, float)) else 0
+    mark_to_market_usd = total * current
+
+    def roi(value):
+        return ((value - total_investment) / total_investment) * 100 if total_investment > 0 else 0
+
+    return {
+        'total_earnings': total,
+        'days': len(rows),
+        # Days earned before the first GOLD price point are left out of realized_usd
+        'priced_days': int(np.count_nonzero(~unpriced)),
+        'unpriced_gold': float(amounts[unpriced].sum()),
+        'price_points': {'gold': len(gold_ts), 'sol': len(sol_ts)},
+        'realized_usd': realized_usd,
+        'realized_sol': realized_sol,
+        'mark_to_market_usd': mark_to_market_usd,
+        'unrealized_usd': mark_to_market_usd - realized_usd,
+        'realized_roi_percentage': roi(realized_usd),
+        'mark_to_market_roi_percentage': roi(mark_to_market_usd),
+        'total_investment': total_investment,
+    }
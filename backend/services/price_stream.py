@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+# Seconds between refreshes of each price while anyone is subscribed
+PRICE_STREAM_INTERVAL = float(os.getenv('PRICE_STREAM_INTERVAL', 30))
+# Seconds of silence before a comment frame keeps idle connections open
+SSE_HEARTBEAT = float(os.getenv('SSE_HEARTBEAT', 15))
+# Events buffered per client before the oldest are dropped (slow readers)
+SSE_CLIENT_BUFFER = 64
+# Events kept for Last-Event-ID replay
+SSE_HISTORY = 256
+
+logger = logging.getLogger('price_stream')
+
+
+def _frame(event_id, event, data):
+    prefix = f'id: {event_id}\n' if event_id is not None else ''
+    return f'{prefix}event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+class _Client:
+    """One subscriber's bounded buffer"""
+
+    def __init__(self, size):
+        self.items = deque(maxlen=size)
+        self.dropped = 0
+        self._cond = threading.Condition()
+
+    def push(self, item):
+        with self._cond:
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+            self.items.append(item)
+            self._cond.notify()
+
+    def drain(self, timeout):
+        with self._cond:
+            if not self.items:
+                self._cond.wait(timeout)
+            items = list(self.items)
+            self.items.clear()
+            return items
+
+
+class Broadcaster:
+    """Fan-out of Server-Sent Events to many subscribers.
+
+    Each event is serialized once and pushed to every client's bounded
+    buffer, so a slow client loses its oldest events instead of holding up
+    the publisher. Recent events are kept for Last-Event-ID replay; a client
+    that reconnects after the replay window gets a fresh snapshot instead.
+    """
+
+    def __init__(self, history=SSE_HISTORY, client_buffer=SSE_CLIENT_BUFFER, heartbeat=SSE_HEARTBEAT):
+        self.history = deque(maxlen=history)
+        self.client_buffer = client_buffer
+        self.heartbeat = heartbeat
+        self._clients = set()
+        self._lock = threading.Lock()
+        # Seeded from the clock so ids keep increasing across restarts
+        self._last_id = int(time.time() * 1000)
+        self.published = 0
+
+    @property
+    def subscribers(self):
+        with self._lock:
+            return len(self._clients)
+
+    def publish(self, event, data, event_id=None):
+        """Send ``data`` to every subscriber; returns the event id"""
+        with self._lock:
+            event_id = event_id if event_id is not None else self._last_id + 1
+            self._last_id = max(self._last_id, event_id)
+            item = (event_id, data, _frame(event_id, event, data))
+            self.history.append(item)
+            self.published += 1
+            clients = list(self._clients)
+        for client in clients:
+            client.push(item)
+        return event_id
+
+    def since(self, last_id):
+        """Data of retained events after ``last_id``"""
+        with self._lock:
+            return [data for event_id, data, _ in self.history if event_id > last_id]
+
+    def subscribe(self, last_id=None, snapshot=None):
+        """Generator of SSE frames for one client.
+
+        With ``last_id`` the retained events after it are replayed first;
+        ``snapshot`` (a callable returning (event, data)) is sent to new
+        clients and to clients whose ``last_id`` fell out of the history.
+        """
+        def frames():
+            # Registered on first iteration so an unstarted generator never leaks a client
+            client = _Client(self.client_buffer)
+            with self._lock:
+                self._clients.add(client)
+                replay = [item for item in self.history if last_id is not None and item[0] > last_id]
+                gap = last_id is None or not self.history or self.history[0][0] > last_id + 1
+            sent = last_id or 0
+            try:
+                if snapshot is not None and gap:
+                    yield _frame(None, *snapshot())
+                for event_id, _, frame in replay:
+                    sent = event_id
+                    yield frame
+                while True:
+                    items = client.drain(self.heartbeat)
+                    if not items:
+                        yield ': heartbeat\n\n'
+                        continue
+                    for event_id, _, frame in items:
+                        # Events published while replaying arrive twice
+                        if event_id > sent:
+                            sent = event_id
+                            yield frame
+            finally:
+                with self._lock:
+                    self._clients.discard(client)
+
+        return frames()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._clients),
+                'published': self.published,
+                'dropped': sum(c.dropped for c in self._clients),
+            }
+
+
+class PriceStream:
+    """Pushes GOLD, SOL and NFT floor price changes to SSE subscribers.
+
+    One refresher thread polls the price sources every
+    PRICE_STREAM_INTERVAL seconds while at least one client is connected, and
+    stops once none are left. Prices are published only when they change,
+    whether they come from the refresher or from any other price lookup.
+    """
+
+    def __init__(self, interval=PRICE_STREAM_INTERVAL, broadcaster=None):
+        self.interval = interval
+        self.broadcaster = broadcaster or Broadcaster()
+        self.fetchers = {}
+        self.prices = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def configure(self, **fetchers):
+        """Set the callables that return each metric's current price"""
+        self.fetchers.update(fetchers)
+
+    def publish_price(self, metric, price):
+        if price is None:
+            return
+        with self._lock:
+            if self.prices.get(metric) == price:
+                return
+            self.prices[metric] = price
+        self.broadcaster.publish('price', {'metric': metric, 'price': price, 'timestamp': datetime.now().isoformat()})
+
+    def snapshot(self):
+        with self._lock:
+            return 'snapshot', {'prices': dict(self.prices), 'timestamp': datetime.now().isoformat()}
+
+    def subscribe(self, last_id=None):
+        self._ensure_refresher()
+        return self.broadcaster.subscribe(last_id, snapshot=self.snapshot)
+
+    def _ensure_refresher(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='price-refresher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        idle_rounds = 0
+        while idle_rounds < 2:
+            for metric, fetch in self.fetchers.items():
+                try:
+                    self.publish_price(metric, fetch())
+                except Exception as e:
+                    logger.error(f"Error refreshing {metric} price: {str(e)}")
+            time.sleep(self.interval)
+            idle_rounds = idle_rounds + 1 if self.broadcaster.subscribers == 0 else 0
+
+
+price_stream = PriceStream()
@@ -0,0 +1,314 @@
+import cProfile
+import functools
+import hmac
+import ipaddress
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from flask import request
+
+# Profile a fraction of requests/calls; off unless enabled or a token is sent
+PROFILE_ENABLED = os.getenv('PROFILE_ENABLED', '0') == '1'
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0.01))
+# Per-route / per-call overrides, longest prefix wins: "/roi/stats=1,calculator=0.1"
+PROFILE_RATES = os.getenv('PROFILE_RATES', '')
+# Requests carrying X-Profile-Token: <token> are always profiled (and kept)
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+PROFILE_HEADER = 'X-Profile-Token'
+PROFILE_INDEX_PATH = '/debug/profiles'
+# Sampled profiles faster than this are discarded
+PROFILE_SLOW_MS = float(os.getenv('PROFILE_SLOW_MS', 500))
+# 'collapsed' (stack sampler, flamegraph input) or 'pstats' (cProfile)
+PROFILE_FORMAT = os.getenv('PROFILE_FORMAT', 'collapsed')
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', 5))
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+# Newest profiles kept on disk; older ones are deleted
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', 50))
+
+# Active whenever something could ask for a profile; otherwise the hooks
+# and decorators are not installed at all
+PROFILING_ACTIVE = PROFILE_ENABLED or bool(PROFILE_TOKEN)
+
+FILENAME_RE = re.compile(r'^(?P<created>\d{8}T\d{6}\d{6})_(?P<name>.+)_(?P<ms>\d+)ms\.(?P<format>collapsed|pstats)$')
+
+_current = ContextVar('profile', default=None)
+
+
+def _parse_rates(spec):
+    rates = {}
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        prefix, _, rate = part.rpartition('=')
+        rates[prefix] = float(rate)
+    # Longest prefix first
+    return sorted(rates.items(), key=lambda item: -len(item[0]))
+
+
+_rates = _parse_rates(PROFILE_RATES)
+_rate_cache = {}
+
+
+def sample_rate(name):
+    """Sampling rate for a route path or call name"""
+    rate = _rate_cache.get(name)
+    if rate is None:
+        rate = next((r for prefix, r in _rates if name.startswith(prefix)), PROFILE_SAMPLE_RATE)
+        _rate_cache[name] = rate
+    return rate
+
+
+def token_valid(token):
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+def profiles_readable(token, remote_addr):
+    """Whether a client may list and download profiles.
+
+    They expose code paths and timings: with PROFILE_TOKEN set the token is
+    required, otherwise only loopback clients are served.
+    """
+    if PROFILE_TOKEN:
+        return token_valid(token)
+    try:
+        return ipaddress.ip_address(remote_addr or '').is_loopback
+    except ValueError:
+        return False
+
+
+class StackSampler:
+    """Samples the stacks of registered threads every PROFILE_INTERVAL_MS.
+
+    One daemon thread serves every active profile and exits when the last
+    one stops, so nothing runs while no profile is being taken.
+    """
+
+    def __init__(self, interval_ms=PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self._targets = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, key, thread_ids=None):
+        """Begin counting stacks for ``thread_ids`` (None: every thread but the sampler)"""
+        counts = Counter()
+        with self._lock:
+            self._targets[key] = (thread_ids, counts)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+        return counts
+
+    def stop(self, key):
+        with self._lock:
+            return self._targets.pop(key, (None, Counter()))[1]
+
+    @staticmethod
+    def _collapse(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._targets:
+                    self._thread = None
+                    return
+                targets = list(self._targets.values())
+            frames = sys._current_frames()
+            stacks = {}
+            for thread_ids, counts in targets:
+                for tid in (thread_ids if thread_ids is not None else frames):
+                    frame = frames.get(tid)
+                    if frame is None or tid == me:
+                        continue
+                    if tid not in stacks:
+                        stacks[tid] = self._collapse(frame)
+                    counts[stacks[tid]] += 1
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """Profile files in PROFILE_DIR, rotated to the newest PROFILE_KEEP"""
+
+    def __init__(self, directory=PROFILE_DIR, keep=PROFILE_KEEP):
+        self.directory = directory
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def write(self, name, elapsed_ms, fmt, writer):
+        os.makedirs(self.directory, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9.]+', '-', name).strip('-') or 'root'
+        filename = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}_{slug}_{int(elapsed_ms)}ms.{fmt}"
+        writer(os.path.join(self.directory, filename))
+        self._rotate()
+        return filename
+
+    def _rotate(self):
+        with self._lock:
+            files = sorted(f for f in os.listdir(self.directory) if FILENAME_RE.match(f))
+            for stale in files[:-self.keep] if self.keep > 0 else []:
+                try:
+                    os.remove(os.path.join(self.directory, stale))
+                except FileNotFoundError:
+                    pass
+
+    def index(self, min_ms=0, limit=50):
+        """Newest profiles first, parsed from their filenames"""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for filename in sorted(os.listdir(self.directory), reverse=True):
+            match = FILENAME_RE.match(filename)
+            if not match or int(match['ms']) < min_ms:
+                continue
+            entries.append({
+                'file': filename,
+                'name': match['name'],
+                'elapsed_ms': int(match['ms']),
+                'format': match['format'],
+                'created': datetime.strptime(match['created'], '%Y%m%dT%H%M%S%f').isoformat(),
+                'bytes': os.path.getsize(os.path.join(self.directory, filename)),
+            })
+            if len(entries) >= limit:
+                break
+        return entries
+
+
+sampler = StackSampler()
+profile_store = ProfileStore()
+
+
+class Profile:
+    """One profiling session around a request or call"""
+
+    def __init__(self, name, forced=False, fmt=PROFILE_FORMAT, all_threads=False):
+        self.name = name
+        self.forced = forced
+        self.fmt = fmt
+        self.all_threads = all_threads
+        self._profiler = None
+        self._counts = None
+        self.stopped = False
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        if self.fmt == 'pstats':
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._counts = sampler.start(id(self), None if self.all_threads else [threading.get_ident()])
+
+    def stop(self):
+        """Stop and write the profile if forced or slow; returns the filename or None"""
+        if self.stopped:
+            return None
+        self.stopped = True
+        if self._profiler is not None:
+            self._profiler.disable()
+        else:
+            sampler.stop(id(self))
+        elapsed_ms = (time.perf_counter() - self.start_time) * 1000
+        if not self.forced and elapsed_ms < PROFILE_SLOW_MS:
+            return None
+        if self._profiler is not None:
+            return profile_store.write(self.name, elapsed_ms, 'pstats', self._profiler.dump_stats)
+        # A forced profile shorter than one sample interval is written empty
+        if not self._counts and not self.forced:
+            return None
+        counts = self._counts
+
+        def write_collapsed(path):
+            with open(path, 'w') as f:
+                for stack, count in counts.most_common():
+                    f.write(f'{stack} {count}\n')
+
+        return profile_store.write(self.name, elapsed_ms, 'collapsed', write_collapsed)
+
+
+@contextmanager
+def profiled(name, forced=False, all_threads=False):
+    """Profile a block if sampled (or forced); nested blocks join the outer profile"""
+    if _current.get() is not None or not (forced or (PROFILE_ENABLED and random.random() < sample_rate(name))):
+        yield
+        return
+    profile = Profile(name, forced=forced, all_threads=all_threads)
+    token = _current.set(profile)
+    profile.start()
+    try:
+        yield
+    finally:
+        profile.stop()
+        _current.reset(token)
+
+
+def profile_calls(name, all_threads=False):
+    """Decorator sampling calls to a function under ``name``; a no-op when profiling is inactive"""
+    def decorate(func):
+        if not PROFILING_ACTIVE:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profiled(name, all_threads=all_threads):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def profile_methods(prefix):
+    """Class decorator applying profile_calls to each public method as '<prefix>.<method>'"""
+    def decorate(cls):
+        if not PROFILING_ACTIVE:
+            return cls
+        for attr, value in list(vars(cls).items()):
+            if callable(value) and not attr.startswith('_'):
+                setattr(cls, attr, profile_calls(f'{prefix}.{attr}')(value))
+        return cls
+    return decorate
+
+
+def init_profiling(app):
+    """Profile sampled requests to ``app``, and any request sending the profile token"""
+    if not PROFILING_ACTIVE:
+        return
+
+    @app.before_request
+    def _start_profile():
+        if request.path.startswith(PROFILE_INDEX_PATH):
+            return
+        forced = token_valid(request.headers.get(PROFILE_HEADER))
+        if not forced and not (PROFILE_ENABLED and random.random() < sample_rate(request.path)):
+            return
+        profile = Profile(f'{request.method} {request.path}', forced=forced)
+        request.profile_token = _current.set(profile)
+        profile.start()
+
+    @app.after_request
+    def _finish_profile(response):
+        profile = _current.get()
+        if getattr(request, 'profile_token', None) is None or profile is None:
+            return response
+        filename = profile.stop()
+        if filename and profile.forced:
+            response.headers['X-Profile-File'] = filename
+        return response
+
+    @app.teardown_request
+    def _reset_profile(exc=None):
+        token = getattr(request, 'profile_token', None)
+        if token is None:
+            return
+        # Still running when the view raised and after_request was skipped
+        _current.get().stop()
+        _current.reset(token)
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from services.game_api import freshness_for
+
+# Seconds a proxied GET may be answered from memory, for UI-only endpoints.
+# Endpoints shared with the fetchers use their FRESHNESS_RULES entry, so the
+# two caches have one TTL per path; anything else is never cached.
+PROXY_CACHE_TTLS = {
+    '/user/gold-stat/me': 15,
+    '/nft/info': 60,
+    '/inventory/items': 30,
+    '/loot-exchange/all-offers': 10,
+}
+
+PROXY_CACHE_MAX_BYTES = int(os.getenv('PROXY_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+# Bodies larger than this are passed through but never kept
+PROXY_CACHE_MAX_ENTRY_BYTES = int(os.getenv('PROXY_CACHE_MAX_ENTRY_BYTES', 4 * 1024 * 1024))
+# How long a coalesced request waits for the leader before fetching itself;
+# a leader that fails within it hands its error to every waiter
+COALESCE_TIMEOUT = 15
+
+
+class _Flight:
+    """An upstream call in progress that identical requests can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class ProxyCache:
+    """Size-bounded LRU of proxied game API responses with request coalescing.
+
+    Entries are keyed on path, query, wallet and a hash of the Authorization
+    header, so a response is only replayed to the credentials that fetched
+    it: a caller with a made-up token and another user's wallet misses and
+    goes upstream, where the token is checked. Concurrent misses for the same key share one upstream
+    call: the first caller fetches, the others wait for its result.
+    """
+
+    def __init__(self, max_bytes=PROXY_CACHE_MAX_BYTES, max_entry_bytes=PROXY_CACHE_MAX_ENTRY_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def ttl_for(path):
+        """Memory TTL for a path, or None when it must not be cached"""
+        ttl = PROXY_CACHE_TTLS.get(path.rstrip('/'))
+        return ttl if ttl is not None else freshness_for(path)
+
+    @staticmethod
+    def key(path, params, wallet, authorization):
+        query = tuple(sorted((k, tuple(v) if isinstance(v, list) else (v,)) for k, v in (params or {}).items()))
+        # Hashed so tokens are not held in memory alongside the responses
+        auth = hashlib.sha256(authorization.strip().encode()).hexdigest()
+        return (path, query, wallet.strip().lower(), auth)
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            _, (response, _) = self._entries.popitem(last=False)
+            self._size -= len(response.content)
+            self.evictions += 1
+
+    def _store(self, key, response, ttl):
+        size = len(response.content)
+        if response.status_code != 200 or size > self.max_entry_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[0].content)
+            self._entries[key] = (response, time.monotonic() + ttl)
+            self._size += size
+            self._evict()
+
+    def get_or_fetch(self, key, ttl, fetch):
+        """Return a fresh cached response for ``key`` or fetch it exactly once"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[key]
+                self._size -= len(entry[0].content)
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if flight.done.wait(COALESCE_TIMEOUT):
+                # Waiters share the leader's failure too, so an upstream error is not retried by each of them
+                if flight.error is not None:
+                    raise flight.error
+                if flight.response is not None:
+                    return flight.response
+            return fetch()
+
+        try:
+            flight.response = fetch()
+            self._store(key, flight.response, ttl)
+            return flight.response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            flight.done.set()
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'evictions': self.evictions,
+            }
+
+
+proxy_cache = ProxyCache()
@@ -1,33 +1,34 @@
 import requests
 from flask import Response, request
 import json
+import logging
 import os
+import time
 from dotenv import load_dotenv
+from services.game_api import game_api, GAME_API_BASE_URL
+from services.proxy_cache import proxy_cache
+from services.upstream_scheduler import INTERACTIVE, UpstreamBusy
+from services.tracing import current_trace
 
 # Load environment variables
 load_dotenv()
 
+STREAM_CHUNK_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
 class ProxyService:
-    BASE_URL = 'https://api-production.defidungeons.gg'
+    BASE_URL = GAME_API_BASE_URL
 
     @staticmethod
-    def forward_request(path, method='GET', headers=None, data=None):
+    def forward_request(path, method='GET', headers=None, data=None, params=None):
         try:
-            print("\n=== Incoming Request Details ===")
-            print(f"Path: {path}")
-            print(f"Method: {method}")
-            
             # Get required headers from the request
             auth_header = headers.get('Authorization') if headers else None
             wallet_header = headers.get('x-selected-wallet-address') if headers else None
 
-            print("Headers received:", {
-                'Authorization': '***' if auth_header else None,
-                'x-selected-wallet-address': '***' if wallet_header else None
-            })
-
             if not auth_header:
-                print("Missing Authorization header")
+                logger.debug(f"Rejected {method} {path}: missing Authorization header")
                 return Response(
                     json.dumps({
                         'error': 'Missing Authorization header',
@@ -38,7 +39,7 @@ class ProxyService:
                 )
 
             if not wallet_header:
-                print("Missing wallet address header")
+                logger.debug(f"Rejected {method} {path}: missing wallet address header")
                 return Response(
                     json.dumps({
                         'error': 'Missing wallet address header',
@@ -60,29 +61,47 @@ class ProxyService:
                 'Origin': 'https://dungeons.game',
                 'Referer': 'https://dungeons.game/',
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept-Encoding': 'gzip, deflate, br',
                 'Accept-Language': 'en-US,en;q=0.9',
                 'Connection': 'keep-alive'
             }
 
-            print("\n=== Forwarding Request ===")
-            print(f"URL: {ProxyService.BASE_URL}{path}")
-            print("Headers:", {k: '***' if k.lower() in ['authorization', 'x-selected-wallet-address'] else v 
-                             for k, v in request_headers.items()})
-
-            # Make the request to the target API
-            response = requests.request(
-                method=method,
-                url=f"{ProxyService.BASE_URL}{path}",
-                headers=request_headers,
-                json=data if data else None,
-                verify=True,
-                timeout=10
-            )
+            logger.debug(f"Forwarding {method} {ProxyService.BASE_URL}{path}")
+
+            # Cacheable GETs are answered from memory, with identical in-flight
+            # requests coalesced into one upstream call; everything else is
+            # streamed straight through. A memory miss always revalidates the
+            # disk copy upstream (freshness=0), so the memory TTL is the only
+            # staleness window and the token is checked by the game API
+            ttl = proxy_cache.ttl_for(path) if method == 'GET' else None
+            if ttl:
+                response = proxy_cache.get_or_fetch(
+                    proxy_cache.key(path, params, wallet_header, auth_header),
+                    ttl,
+                    lambda: game_api.request(
+                        method,
+                        path,
+                        params=params,
+                        headers=request_headers,
+                        timeout=10,
+                        freshness=0,
+                        priority=INTERACTIVE
+                    )
+                )
+                upstream = None
+            else:
+                upstream = game_api.stream(
+                    method,
+                    path,
+                    params=params,
+                    # Streamed bodies pass through undecoded, so ask only for encodings the client accepts.
+                    # The cached branch keeps requests' default, which it decodes before caching.
+                    headers={**request_headers, 'Accept-Encoding': headers.get('Accept-Encoding', 'identity')},
+                    json=data if data else None,
+                    timeout=10,
+                    priority=INTERACTIVE
+                )
+                response = upstream
 
-            print(f"\n=== Response Details ===")
-            print(f"Status: {response.status_code}")
-            
             if response.status_code != 200:
                 error_message = response.text
                 try:
@@ -90,11 +109,10 @@ class ProxyService:
                     error_message = error_json.get('message', error_json.get('error', response.text))
                 except:
                     pass
-                print(f"Error: {error_message}")
-
-                # Log the full response for debugging
-                print("Full response headers:", dict(response.headers))
-                print("Full response body:", response.text)
+                logger.warning(f"Upstream {response.status_code} for {method} {path}: {error_message}")
+                logger.debug(f"Upstream headers: {dict(response.headers)} body: {response.text}")
+                if upstream is not None:
+                    upstream.close()
 
                 return Response(
                     json.dumps({
@@ -106,19 +124,48 @@ class ProxyService:
                     mimetype='application/json'
                 )
 
-            # Forward the response
-            excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
-            headers = [(name, value) for (name, value) in response.raw.headers.items()
+            if upstream is None:
+                excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
+                headers = [(name, value) for (name, value) in response.headers.items()
+                          if name.lower() not in excluded_headers]
+                return Response(response.content, response.status_code, headers)
+
+            # Stream the still-encoded upstream body chunk by chunk; the client
+            # decodes gzip/br itself, so Content-Encoding and Content-Length stay valid
+            excluded_headers = ['transfer-encoding', 'connection']
+            headers = [(name, value) for (name, value) in upstream.raw.headers.items()
                       if name.lower() not in excluded_headers]
 
+            trace = current_trace()
+
+            def generate():
+                start = time.perf_counter()
+                try:
+                    for chunk in upstream.raw.stream(STREAM_CHUNK_SIZE, decode_content=False):
+                        yield chunk
+                finally:
+                    upstream.close()
+                    if trace is not None:
+                        trace.add('download', time.perf_counter() - start)
+
+            proxied = Response(generate(), upstream.status_code, headers)
+            # A body that is never iterated still hands back the connection and upstream slot
+            proxied.call_on_close(upstream.close)
+            return proxied
+
+        except UpstreamBusy as e:
+            logger.warning(f"Upstream busy for {method} {path}: {str(e)}")
             return Response(
-                response.content,
-                response.status_code,
-                headers
+                json.dumps({
+                    'error': 'Game server busy',
+                    'message': str(e)
+                }),
+                status=503,
+                mimetype='application/json',
+                headers={'Retry-After': '1'}
             )
-
         except requests.exceptions.RequestException as e:
-            print(f"Request error: {str(e)}")
+            logger.error(f"Request error for {method} {path}: {str(e)}")
             return Response(
                 json.dumps({
                     'error': 'Failed to connect to game server',
@@ -128,7 +175,7 @@ class ProxyService:
                 mimetype='application/json'
             )
         except Exception as e:
-            print(f"Unexpected error: {str(e)}")
+            logger.exception(f"Unexpected error for {method} {path}: {str(e)}")
             return Response(
                 json.dumps({
                     'error': 'Internal server error',
@@ -0,0 +1,178 @@
+import json
+import logging
+import os
+import sqlite3
+import numpy as np
+
+DB_PATH = 'defi_dungeons.db'
+DATA_DIR = 'data'
+
+# gold_earnings rows written from quest claims; manual entries keep their own source
+QUEST_SOURCE = 'Quest Claims'
+GOLD_ASSET = 'Gold'
+
+
+def load_feed(filename, data_dir=DATA_DIR):
+    """Load the 'data' list of a saved fetcher file, or [] if it is missing"""
+    try:
+        with open(os.path.join(data_dir, filename)) as f:
+            return json.load(f).get('data') or []
+    except (OSError, ValueError):
+        return []
+
+
+def gold_prices(balances):
+    """GOLD value of one unit of each fungible asset, from the balance offer prices"""
+    prices = {b['fungibleAssetId']: float(b.get('offerPrice') or 0) for b in balances if b.get('fungibleAssetId')}
+    prices[GOLD_ASSET] = 1.0
+    return prices
+
+
+def _timestamps(values):
+    # numpy parses ISO strings natively but warns on the trailing 'Z'; all feeds are UTC
+    return np.array([v.rstrip('Z') for v in values], dtype='datetime64[ms]')
+
+
+class QuestClaims:
+    """Columnar view of quest claims for vectorized yield analytics.
+
+    Each claim becomes one row of parallel arrays (start, claim time,
+    duration, NFT, combat level, GOLD value); rewards are flattened into
+    (claim index, asset code, amount) columns and valued in GOLD with the
+    balance offer prices.
+    """
+
+    def __init__(self, claims, prices=None):
+        prices = prices or {GOLD_ASSET: 1.0}
+        claims = [c for c in claims if c.get('startedAt') and c.get('claimedAt')]
+        self.count = len(claims)
+        self.started = _timestamps([c['startedAt'] for c in claims])
+        self.claimed = _timestamps([c['claimedAt'] for c in claims])
+        self.hours = (self.claimed - self.started).astype(np.float64) / 3.6e6
+        # Factorize NFT and asset ids through dicts: cheaper than np.unique on strings
+        nft_codes = {}
+        self.nft_index = np.array([nft_codes.setdefault(c.get('nftId') or '', len(nft_codes)) for c in claims],
+                                  dtype=np.int64)
+        self.nft_ids = list(nft_codes)
+        self.combat_levels = np.array([c.get('nftCombatLevel') or 0 for c in claims], dtype=np.int64)
+
+        asset_codes = {}
+        claim_index, asset_index, amounts = [], [], []
+        for i, claim in enumerate(claims):
+            for reward in claim.get('rewards') or ():
+                claim_index.append(i)
+                asset_index.append(asset_codes.setdefault(reward['fungibleAssetId'], len(asset_codes)))
+                amounts.append(reward['amount'])
+        self.assets = list(asset_codes)
+        self.reward_claim = np.array(claim_index, dtype=np.int64)
+        self.reward_asset = np.array(asset_index, dtype=np.int64)
+        self.reward_amount = np.array(amounts, dtype=np.float64)
+
+        asset_price = np.array([prices.get(a, 0.0) for a in self.assets], dtype=np.float64)
+        self.gold = np.bincount(self.reward_claim, weights=self.reward_amount * asset_price[self.reward_asset],
+                                minlength=self.count)
+
+    @classmethod
+    def from_files(cls, data_dir=DATA_DIR):
+        """Build from the fetcher's saved quest claims and balances"""
+        return cls(load_feed('recent_quest_claims.json', data_dir),
+                   gold_prices(load_feed('fungible_balances.json', data_dir)))
+
+    def _group(self, keys):
+        """Per-key claim count, quest hours, GOLD yield and GOLD/hour"""
+        labels, inverse = np.unique(keys, return_inverse=True)
+        size = len(labels)
+        claims = np.bincount(inverse, minlength=size)
+        gold = np.bincount(inverse, weights=self.gold, minlength=size)
+        hours = np.bincount(inverse, weights=self.hours, minlength=size)
+        per_hour = np.divide(gold, hours, out=np.zeros(size), where=hours > 0)
+        return labels, claims, gold, hours, per_hour
+
+    def _rows(self, name, keys, label=str):
+        labels, claims, gold, hours, per_hour = self._group(keys)
+        return [
+            {name: label(labels[i]), 'claims': int(claims[i]), 'gold': round(float(gold[i]), 4),
+             'hours': round(float(hours[i]), 3), 'gold_per_hour': round(float(per_hour[i]), 4)}
+            for i in range(len(labels))
+        ]
+
+    def daily_totals(self):
+        """(YYYY-MM-DD days, GOLD per day) keyed on the UTC claim date"""
+        days, _, gold, _, _ = self._group(self.claimed.astype('datetime64[D]'))
+        return [str(d) for d in days], gold
+
+    def per_day(self):
+        return self._rows('date', self.claimed.astype('datetime64[D]'))
+
+    def per_nft(self):
+        rows = self._rows('nft_id', self.nft_index, label=int)
+        for row in rows:
+            row['nft_id'] = self.nft_ids[row['nft_id']]
+        return rows
+
+    def per_combat_level(self):
+        return self._rows('combat_level', self.combat_levels, label=int)
+
+    def asset_totals(self):
+        """Total amount received per fungible asset"""
+        totals = np.bincount(self.reward_asset, weights=self.reward_amount, minlength=len(self.assets))
+        return {a: round(float(t), 4) for a, t in sorted(zip(self.assets, totals.tolist()))}
+
+    def summary(self):
+        hours = float(self.hours.sum())
+        gold = float(self.gold.sum())
+        return {
+            'claims': self.count,
+            'gold': round(gold, 4),
+            'hours': round(hours, 3),
+            'gold_per_hour': round(gold / hours, 4) if hours > 0 else 0,
+            'assets': self.asset_totals(),
+            'per_day': self.per_day(),
+            'per_nft': self.per_nft(),
+            'per_combat_level': self.per_combat_level(),
+        }
+
+
+def ensure_gold_earnings(conn, default_wallet=None):
+    """Create gold_earnings if needed and partition it by wallet_id.
+
+    Rows written before the column existed belong to ``default_wallet``,
+    by default the single NIGHTVALE_WALLET_ADDRESS this install used to track.
+    """
+    default_wallet = default_wallet or os.getenv('NIGHTVALE_WALLET_ADDRESS')
+    conn.execute(''' CREATE TABLE IF NOT EXISTS gold_earnings (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT NOT NULL, amount REAL NOT NULL, source TEXT DEFAULT 'Quest', timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP) ''')
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(gold_earnings)')}
+    if 'wallet_id' not in columns:
+        conn.execute('ALTER TABLE gold_earnings ADD COLUMN wallet_id TEXT')
+        if default_wallet:
+            conn.execute('UPDATE gold_earnings SET wallet_id = ? WHERE wallet_id IS NULL', (default_wallet,))
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_gold_earnings_wallet_date ON gold_earnings (wallet_id, date)')
+
+
+def sync_gold_earnings(quest_claims, db_path=DB_PATH, wallet_id=None):
+    """Upsert one QUEST_SOURCE row per claim day into ``wallet_id``'s gold_earnings.
+
+    The claims feed is a recent window, so its oldest day may be partial: a
+    day's stored total is only ever raised, never lowered. Returns the number
+    of days written.
+    """
+    days, gold = quest_claims.daily_totals()
+    if not days:
+        return 0
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            ensure_gold_earnings(conn)
+            window = (QUEST_SOURCE, wallet_id, days[0], days[-1])
+            totals = dict(conn.execute(
+                'SELECT date, MAX(amount) FROM gold_earnings WHERE source = ? AND wallet_id IS ? AND date BETWEEN ? AND ? GROUP BY date',
+                window))
+            for day, amount in zip(days, gold.tolist()):
+                totals[day] = max(round(amount, 4), totals.get(day, 0))
+            conn.execute('DELETE FROM gold_earnings WHERE source = ? AND wallet_id IS ? AND date BETWEEN ? AND ?', window)
+            conn.executemany('INSERT INTO gold_earnings (date, amount, source, wallet_id) VALUES (?, ?, ?, ?)',
+                             [(day, amount, QUEST_SOURCE, wallet_id) for day, amount in sorted(totals.items())])
+        logging.info(f"Synced {len(days)} days of quest earnings into gold_earnings" + (f" for {wallet_id}" if wallet_id else ''))
+        return len(days)
+    finally:
+        conn.close()
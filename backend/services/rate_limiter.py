@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+# Statuses that mean the game API wants us to slow down
+BACKOFF_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by everything that calls one upstream host.
+
+    ``acquire()`` blocks until a token is available. ``report()`` is called with
+    each response status; 429/5xx responses pause the whole bucket with an
+    exponential backoff (or the upstream ``Retry-After``), and the backoff
+    resets on the next successful response.
+
+    ``reserved`` tokens are kept for priority callers: others only take a
+    token while more than that many remain, so a priority request finds one
+    at once (or is first in line for the next refill) during a bulk sync.
+    """
+
+    def __init__(self, rate, capacity, max_backoff=300, reserved=0):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.max_backoff = max_backoff
+        self.reserved = min(float(reserved), self.capacity - 1)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._backoff = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def acquire(self, tokens=1, timeout=None, priority=False):
+        """Take ``tokens`` from the bucket, waiting up to ``timeout`` seconds; False on timeout.
+
+        Only ``priority`` callers may dip into the reserved tokens.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        needed = tokens if priority else tokens + self.reserved
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= needed:
+                    self._tokens -= tokens
+                    return True
+                wait = max(self._paused_until - now, (needed - self._tokens) / self.rate)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def backoff(self, seconds):
+        """Stop handing out tokens for ``seconds``"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def report(self, status_code, retry_after=None):
+        """Record an upstream response status, backing off on 429/5xx"""
+        if status_code not in BACKOFF_STATUSES:
+            with self._lock:
+                self._backoff = 0.0
+            return 0.0
+        with self._lock:
+            self._backoff = min(self.max_backoff, self._backoff * 2 if self._backoff else 1.0)
+            delay = self._backoff
+        try:
+            if retry_after is not None:
+                delay = min(self.max_backoff, float(retry_after))
+        except ValueError:
+            pass
+        self.backoff(delay)
+        return delay
+
+    @property
+    def paused_for(self):
+        """Seconds left in the current backoff pause"""
+        with self._lock:
+            return max(0.0, self._paused_until - time.monotonic())
+
+
+# Shared limiter for api-production.defidungeons.gg
+game_api_limiter = TokenBucket(
+    rate=float(os.getenv('GAME_API_RATE', 2)),
+    capacity=float(os.getenv('GAME_API_BURST', 5)),
+    # Tokens only interactive (proxy) requests may take
+    reserved=float(os.getenv('GAME_API_INTERACTIVE_TOKENS', 1))
+)
+
+# Shared limiter for public-api.birdeye.so (price lookups and history backfill)
+birdeye_limiter = TokenBucket(
+    rate=float(os.getenv('BIRDEYE_RATE', 1)),
+    capacity=float(os.getenv('BIRDEYE_BURST', 5))
+)
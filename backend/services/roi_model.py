@@ -0,0 +1,253 @@
+import sqlite3
+import numpy as np
+from services.fleet import WalletRegistry
+from services.price_history import load_series
+from services.quest_analytics import DB_PATH
+from services.schema import ensure_schema
+
+# Days averaged for the default daily yield, as DefiDungeonCalculator.predict_roi does
+YIELD_WINDOW_DAYS = 7
+DEFAULT_HORIZON_DAYS = 365
+# Price paths simulated when a scenario has volatility or replays history
+DEFAULT_PATHS = 200
+PRICE_PATHS = ('drift', 'history')
+
+
+def _daily_closes(timestamps, prices):
+    """Last price of each UTC day in a sorted series"""
+    if len(timestamps) == 0:
+        return prices
+    days = timestamps.astype('datetime64[D]')
+    return prices[np.flatnonzero(np.r_[days[1:] != days[:-1], True])]
+
+
+class Snapshot:
+    """Read-only earnings and price history for evaluating scenarios offline.
+
+    Loaded from SQLite once and held as plain numpy arrays, so it pickles
+    cheaply into worker processes and scenarios never query the database.
+    """
+
+    def __init__(self, daily_gold, gold_closes, gold_price, sol_price, nft_floor, nft_count=1):
+        self.daily_gold = np.asarray(daily_gold, dtype=np.float64)
+        self.gold_closes = np.asarray(gold_closes, dtype=np.float64)
+        self.gold_price = float(gold_price)
+        self.sol_price = float(sol_price)
+        self.nft_floor = float(nft_floor)
+        self.nft_count = nft_count
+        self.total_gold = float(self.daily_gold.sum())
+        recent = self.daily_gold[-YIELD_WINDOW_DAYS:]
+        self.daily_yield = float(recent.mean()) if len(recent) else 0.0
+        closes = self.gold_closes[self.gold_closes > 0]
+        # Daily log returns, resampled by 'history' price paths
+        self.log_returns = np.diff(np.log(closes)) if len(closes) > 1 else np.zeros(0)
+
+    @classmethod
+    def load(cls, db_path=DB_PATH):
+        ensure_schema(db_path)
+        # NFTs held by the registered wallets; the single-NFT setup counts as one
+        nft_count = max(sum(len(w['nfts']) for w in WalletRegistry(db_path).wallets()), 1)
+        conn = sqlite3.connect(db_path)
+        try:
+            daily = [row[0] or 0 for row in conn.execute('SELECT SUM(amount) FROM gold_earnings GROUP BY date ORDER BY date')]
+            gold_ts, gold_prices = load_series(conn, 'gold')
+            _, sol_prices = load_series(conn, 'sol')
+            try:
+                nft = conn.execute('SELECT price FROM nft_price_history ORDER BY timestamp DESC LIMIT 1').fetchone()
+            except sqlite3.OperationalError:
+                nft = None
+        finally:
+            conn.close()
+        return cls(
+            daily_gold=daily,
+            gold_closes=_daily_closes(gold_ts, gold_prices),
+            gold_price=gold_prices[-1] if len(gold_prices) else 0,
+            sol_price=sol_prices[-1] if len(sol_prices) else 0,
+            nft_floor=nft[0] if nft else 0,
+            nft_count=nft_count,
+        )
+
+    def summary(self):
+        return {
+            'days': len(self.daily_gold),
+            'total_gold': round(self.total_gold, 4),
+            'daily_yield': round(self.daily_yield, 4),
+            'gold_price': self.gold_price,
+            'sol_price': self.sol_price,
+            'nft_floor': self.nft_floor,
+            'nft_count': self.nft_count,
+            'price_days': len(self.gold_closes),
+        }
+
+
+def price_paths(start, days, paths=1, drift=0.0, volatility=0.0, log_returns=None, rng=None):
+    """(paths, days) GOLD prices; column t is the price t + 1 days from now.
+
+    Steps are either resampled from ``log_returns`` or drawn from a
+    geometric random walk with daily ``drift`` and ``volatility``.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    if log_returns is not None and len(log_returns):
+        steps = rng.choice(log_returns, size=(paths, days))
+    elif volatility > 0:
+        steps = np.log1p(drift) - 0.5 * volatility ** 2 + volatility * rng.standard_normal((paths, days))
+    else:
+        steps = np.full((paths, days), np.log1p(drift))
+    return start * np.exp(np.cumsum(steps, axis=1))
+
+
+def first_crossing(values, target):
+    """Per row, the first day (1-based column) ``values`` reaches ``target``; inf if never"""
+    hit = values >= target
+    days = hit.argmax(axis=1) + 1.0
+    days[~hit.any(axis=1)] = np.inf
+    return days
+
+
+def breakeven_days(investment, current_value, daily_usd):
+    """Days until current value plus daily USD earnings covers the investment.
+
+    The closed form DefiDungeonCalculator.predict_roi uses, broadcast over
+    array inputs: 0 once covered, inf when nothing is earned.
+    """
+    investment, current_value, daily_usd = np.broadcast_arrays(
+        np.asarray(investment, dtype=np.float64), np.asarray(current_value, dtype=np.float64),
+        np.asarray(daily_usd, dtype=np.float64))
+    remaining = np.maximum(investment - current_value, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days = np.where(daily_usd > 0, remaining / daily_usd, np.inf)
+    return np.where(remaining <= 0, 0.0, days)
+
+
+def apy(investment, daily_usd):
+    """Daily earnings over the investment, compounded over a year (percent)"""
+    investment = np.asarray(investment, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily_rate = np.where(investment > 0, np.asarray(daily_usd, dtype=np.float64) / investment, 0.0)
+    return ((1 + daily_rate) ** 365 - 1) * 100
+
+
+def _finite(value, digits=2):
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+def evaluate(snapshot, scenario, investment):
+    """Evaluate one parsed scenario against ``snapshot``.
+
+    Holdings are marked to market each day, as in predict_roi: GOLD already
+    earned (unless include_history is off) plus daily_yield per day, valued
+    at that day's simulated price, plus NFT floor x SOL price per NFT
+    (nft_count defaults to the snapshot's registered NFTs).
+    """
+    investment = scenario.get('investment', investment)
+    horizon = scenario.get('horizon_days', DEFAULT_HORIZON_DAYS)
+    gold_price = scenario.get('gold_price', snapshot.gold_price)
+    daily_yield = scenario.get('daily_yield', snapshot.daily_yield)
+    held_gold = snapshot.total_gold if scenario.get('include_history', True) else 0.0
+    nft_usd = (scenario.get('nft_count', snapshot.nft_count) * scenario.get('nft_floor', snapshot.nft_floor)
+               * scenario.get('sol_price', snapshot.sol_price))
+    path = scenario.get('price_path', 'drift')
+    if path == 'history' and not len(snapshot.log_returns):
+        raise ValueError('price_path history needs at least two days of GOLD price history')
+    volatility = scenario.get('gold_volatility', 0.0)
+    stochastic = path == 'history' or volatility > 0
+    paths = scenario.get('paths', DEFAULT_PATHS) if stochastic else 1
+
+    prices = price_paths(gold_price, horizon, paths=paths, drift=scenario.get('gold_drift', 0.0), volatility=volatility,
+                         log_returns=snapshot.log_returns if path == 'history' else None,
+                         rng=np.random.default_rng(scenario.get('seed', 0)))
+    gold = held_gold + daily_yield * np.arange(1, horizon + 1)
+    values = gold * prices + nft_usd
+    current_value = held_gold * gold_price + nft_usd
+    days = first_crossing(values, investment) if current_value < investment else np.zeros(paths)
+    final = values[:, -1]
+    result = {
+        'name': scenario.get('name'),
+        'investment': investment,
+        'horizon_days': horizon,
+        'paths': paths,
+        'current_value_usd': round(current_value, 4),
+        'breakeven_days': _finite(np.median(days)),
+        'breakeven_probability': round(float(np.isfinite(days).mean()), 4),
+        'final_value_usd': round(float(final.mean()), 4),
+        'roi_percentage': round(float(((final - investment) / investment * 100).mean()), 4) if investment > 0 else 0,
+        'apy': _finite(apy(investment, daily_yield * gold_price), 4),
+    }
+    if paths > 1:
+        result['breakeven_days_p10'] = _finite(np.percentile(days, 10))
+        result['breakeven_days_p90'] = _finite(np.percentile(days, 90))
+        result['final_value_usd_p10'] = round(float(np.percentile(final, 10)), 4)
+        result['final_value_usd_p90'] = round(float(np.percentile(final, 90)), 4)
+    return result
+
+
+# Inputs /roi/sensitivity perturbs, in the order roi_metrics takes them
+SENSITIVITY_INPUTS = ('investment', 'gold_price', 'daily_average', 'total_earnings', 'nft_floor', 'sol_price')
+
+
+def roi_metrics(investment, gold_price, daily_average, total_earnings, nft_floor, sol_price, nft_count=1):
+    """Days to breakeven and APY, broadcast over array inputs.
+
+    The /roi/stats figures, with NFT floor (SOL) x SOL price per NFT counted
+    toward the current value.
+    """
+    current_value = np.asarray(total_earnings) * gold_price + nft_count * np.asarray(nft_floor) * sol_price
+    daily_usd = np.asarray(daily_average) * gold_price
+    return breakeven_days(investment, current_value, daily_usd), apy(investment, daily_usd)
+
+
+def sensitivity(inputs, nft_count=1, spread=0.2, step=1e-4):
+    """Partial derivatives and tornado ranges of days-to-breakeven and APY.
+
+    Each input gets central differences at +/-``step`` (relative) and tornado
+    ends at +/-``spread``. Every perturbation is one row of a single batch,
+    so the model runs once for all inputs. Non-finite figures (no earnings,
+    so no breakeven) are reported as None.
+    """
+    base = np.array([float(inputs[name]) for name in SENSITIVITY_INPUTS])
+    k = len(base)
+    # Absolute step, so inputs at zero are still perturbed
+    h = np.where(base != 0, np.abs(base) * step, step)
+    batch = np.tile(base, (1 + 4 * k, 1))
+    for i in range(k):
+        rows = 1 + 4 * i
+        batch[rows, i] += h[i]
+        batch[rows + 1, i] -= h[i]
+        batch[rows + 2, i] *= 1 - spread
+        batch[rows + 3, i] *= 1 + spread
+    days, yearly = roi_metrics(*batch.T, nft_count=nft_count)
+
+    with np.errstate(invalid='ignore'):
+        d_days = (days[1::4] - days[2::4]) / (2 * h)
+        d_apy = (yearly[1::4] - yearly[2::4]) / (2 * h)
+        swing = np.abs(days[4::4] - days[3::4])
+    base_days, base_apy = days[0], yearly[0]
+
+    def elasticity(derivative, value, result):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return _finite(derivative * value / result, 4) if result else None
+
+    rows = []
+    for i, name in enumerate(SENSITIVITY_INPUTS):
+        low, high = 3 + 4 * i, 4 + 4 * i
+        rows.append({
+            'input': name,
+            'value': float(base[i]),
+            'd_days_to_breakeven': _finite(d_days[i], 6),
+            'd_apy': _finite(d_apy[i], 6),
+            'elasticity_days_to_breakeven': elasticity(d_days[i], base[i], base_days),
+            'elasticity_apy': elasticity(d_apy[i], base[i], base_apy),
+            'low': {'value': float(batch[low, i]), 'days_to_breakeven': _finite(days[low]), 'apy': _finite(yearly[low], 4)},
+            'high': {'value': float(batch[high, i]), 'days_to_breakeven': _finite(days[high]), 'apy': _finite(yearly[high], 4)},
+            'swing_days': _finite(swing[i]) if not np.isnan(swing[i]) else None,
+            '_order': swing[i] if not np.isnan(swing[i]) else np.inf,
+        })
+    # Tornado order: widest breakeven swing first
+    rows.sort(key=lambda row: -row.pop('_order'))
+    return {
+        'base': {'days_to_breakeven': _finite(base_days), 'apy': _finite(base_apy, 4), **{n: v for n, v in zip(SENSITIVITY_INPUTS, base.tolist())},
+                 'nft_count': nft_count},
+        'spread': spread,
+        'evaluations': len(batch),
+        'inputs': rows,
+    }
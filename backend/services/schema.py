@@ -0,0 +1,129 @@
+import logging
+import sqlite3
+import threading
+from services.price_history import PRICE_SERIES, ensure_tables
+from services.quest_analytics import DB_PATH, ensure_gold_earnings
+
+# Tables DefiDungeonCalculator used to create in its own, incompatible shape
+CALCULATOR_TABLES = ('gold_earnings', 'inventory', 'price_history')
+
+_migrated = set()
+_migrated_lock = threading.Lock()
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def _is_calculator_table(conn, table):
+    columns = _columns(conn, table)
+    if table == 'gold_earnings':
+        return 'gold_amount' in columns
+    if table == 'inventory':
+        return bool(columns) and 'source' not in columns
+    return 'gold_price' in columns
+
+
+def _base_schema(conn):
+    """v1: app.py's tables, converting any the calculator created first"""
+    legacy = [t for t in CALCULATOR_TABLES if _is_calculator_table(conn, t)]
+    for table in legacy:
+        conn.execute(f'ALTER TABLE {table} RENAME TO {table}_calculator')
+
+    conn.execute(''' CREATE TABLE IF NOT EXISTS inventory (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, quantity INTEGER NOT NULL, rarity TEXT NOT NULL, source TEXT NOT NULL, current_price REAL NOT NULL, weight REAL NOT NULL DEFAULT 1.0, tier INTEGER, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP) ''')
+    conn.execute(''' CREATE TABLE IF NOT EXISTS price_history (id INTEGER PRIMARY KEY AUTOINCREMENT, item_id INTEGER NOT NULL, price REAL NOT NULL, timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP, FOREIGN KEY (item_id) REFERENCES inventory(id)) ''')
+    conn.execute(''' CREATE TABLE IF NOT EXISTS base_loot_prices (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, source TEXT NOT NULL, rarity TEXT NOT NULL, base_price REAL NOT NULL, weight REAL NOT NULL, tier INTEGER, last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP, UNIQUE(name, source, rarity)) ''')
+    conn.execute(''' CREATE TABLE IF NOT EXISTS base_price_history (id INTEGER PRIMARY KEY AUTOINCREMENT, base_loot_id INTEGER NOT NULL, price REAL NOT NULL, timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP, FOREIGN KEY (base_loot_id) REFERENCES base_loot_prices(id)) ''')
+    conn.execute(''' CREATE TABLE IF NOT EXISTS gold_earnings (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT NOT NULL, amount REAL NOT NULL, source TEXT DEFAULT 'Quest', timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP) ''')
+    conn.execute(''' CREATE TABLE IF NOT EXISTS nft_price_history (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, price REAL NOT NULL) ''')
+    ensure_tables(conn)
+
+    if 'gold_earnings' in legacy:
+        conn.execute('INSERT INTO gold_earnings (date, amount, source) '
+                     'SELECT date, gold_amount, source FROM gold_earnings_calculator WHERE gold_amount IS NOT NULL')
+    if 'inventory' in legacy:
+        # The calculator only tiered dungeon loot
+        conn.execute("INSERT INTO inventory (name, quantity, rarity, source, current_price, tier) "
+                     "SELECT name, COALESCE(quantity, 0), COALESCE(rarity, ''), CASE WHEN tier THEN 'dungeon' ELSE 'quest' END, "
+                     "COALESCE(current_price, 0), tier FROM inventory_calculator")
+    if 'price_history' in legacy:
+        # Its snapshots become points in the per-token series (ISO timestamps, like app.py writes)
+        for column, table in (('gold_price', 'gold_price_history'), ('nft_price', 'nft_price_history')):
+            conn.execute(f"INSERT INTO {table} (timestamp, price) SELECT REPLACE(timestamp, ' ', 'T'), {column} "
+                         f"FROM price_history_calculator WHERE {column} IS NOT NULL ORDER BY timestamp")
+    for table in legacy:
+        conn.execute(f'DROP TABLE {table}_calculator')
+    if legacy:
+        logging.info(f"Converted calculator tables to the app schema: {', '.join(legacy)}")
+
+
+def _partition_gold_earnings(conn):
+    """v2: gold_earnings.wallet_id for fleet mode"""
+    ensure_gold_earnings(conn)
+
+
+def _portfolio_tables(conn):
+    """v3: portfolio_snapshots partitioned by wallet, and item_prices keyed by itemMetadataId"""
+    columns = _columns(conn, 'portfolio_snapshots')
+    legacy = bool(columns) and 'wallet_id' not in columns
+    if legacy:
+        conn.execute('ALTER TABLE portfolio_snapshots RENAME TO portfolio_snapshots_v2')
+    conn.execute(''' CREATE TABLE IF NOT EXISTS portfolio_snapshots (id INTEGER PRIMARY KEY AUTOINCREMENT, wallet_id TEXT NOT NULL DEFAULT '', source_timestamp TEXT NOT NULL, total_gold REAL NOT NULL, holdings TEXT NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, UNIQUE(wallet_id, source_timestamp)) ''')
+    conn.execute(''' CREATE TABLE IF NOT EXISTS item_prices (item_metadata_id INTEGER PRIMARY KEY, name TEXT, price REAL NOT NULL, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP) ''')
+    if legacy:
+        # Snapshots taken before fleet mode are the primary wallet's
+        conn.execute("INSERT INTO portfolio_snapshots (wallet_id, source_timestamp, total_gold, holdings, created_at) "
+                     "SELECT '', source_timestamp, total_gold, holdings, created_at FROM portfolio_snapshots_v2")
+        conn.execute('DROP TABLE portfolio_snapshots_v2')
+
+
+def _unique_price_points(conn):
+    """v4: one point per timestamp in the token price series, so overlapping backfills cannot duplicate rows"""
+    for _, table in PRICE_SERIES.values():
+        conn.execute(f'DELETE FROM {table} WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY timestamp)')
+        conn.execute(f'DROP INDEX IF EXISTS idx_{table}_timestamp')
+    ensure_tables(conn)
+
+
+# MIGRATIONS[n] takes the database from user_version n to n + 1
+MIGRATIONS = [_base_schema, _partition_gold_earnings, _portfolio_tables, _unique_price_points]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(conn):
+    """Apply pending migrations in one transaction; returns the version found.
+
+    BEGIN IMMEDIATE holds the write lock while the version is re-read, so
+    workers starting together migrate the file once.
+    """
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return version
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        for step in MIGRATIONS[version:]:
+            step(conn)
+        conn.execute(f'PRAGMA user_version = {max(version, SCHEMA_VERSION)}')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    if version < SCHEMA_VERSION:
+        logging.info(f"Migrated database schema from v{version} to v{SCHEMA_VERSION}")
+    return version
+
+
+def ensure_schema(db_path=DB_PATH):
+    """Migrate ``db_path`` the first time it is used in this process"""
+    if db_path in _migrated:
+        return
+    with _migrated_lock:
+        if db_path in _migrated:
+            return
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            migrate(conn)
+        finally:
+            conn.close()
+        _migrated.add(db_path)
@@ -0,0 +1,146 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Largest budget a table is built for; weights are 1-16 so this covers big inventories.
+# Budgets that fit every holding need no table; anything else above this is rejected.
+MAX_BUDGET = 20000
+# Solved tables kept for reuse; a table is tied to exact holdings and prices
+TABLE_CACHE_SIZE = 32
+# Total size of the cached tables' take bitmaps
+TABLE_CACHE_BYTES = 64 * 1024 * 1024
+BUDGET_TYPES = ('weight', 'slots')
+
+
+def _split(quantity):
+    """Binary split of a quantity into chunks 1, 2, 4, ..., remainder"""
+    chunks, size = [], 1
+    while quantity > 0:
+        take = min(size, quantity)
+        chunks.append(take)
+        quantity -= take
+        size *= 2
+    return chunks
+
+
+class _Table:
+    """Bounded knapsack solved for every budget up to ``capacity``.
+
+    Only the best-value row and one bit per (pseudo-item, budget) decision
+    are kept, packed eight budgets to a byte.
+    """
+
+    def __init__(self, holdings, budget_type, capacity):
+        self.holdings = holdings
+        # Each holding's quantity is binary-split into 0/1 pseudo-items
+        self.parts = [(i, chunk) for i, h in enumerate(holdings) for chunk in _split(h['quantity'])]
+        self.capacity = capacity
+        best = np.zeros(capacity + 1)
+        self.take = np.zeros((len(self.parts), capacity // 8 + 1), dtype=np.uint8)
+        improved = np.zeros(capacity + 1, dtype=bool)
+        for row, (i, chunk) in enumerate(self.parts):
+            cost = chunk * (1 if budget_type == 'slots' else holdings[i]['weight'])
+            if cost > capacity:
+                continue
+            candidate = best[:-cost] + chunk * holdings[i]['price']
+            improved[:cost] = False
+            np.greater(candidate, best[cost:], out=improved[cost:])
+            self.take[row] = np.packbits(improved)
+            best[cost:] = np.where(improved[cost:], candidate, best[cost:])
+        self.best = best
+        self.costs = [chunk * (1 if budget_type == 'slots' else holdings[i]['weight']) for i, chunk in self.parts]
+        self.nbytes = self.take.nbytes + best.nbytes
+
+    def solve(self, budget):
+        """Quantity to sell per holding for ``budget``, walking the take table backwards"""
+        sell = [0] * len(self.holdings)
+        remaining = min(budget, self.capacity)
+        for row in range(len(self.parts) - 1, -1, -1):
+            if self.take[row, remaining >> 3] >> (7 - (remaining & 7)) & 1:
+                i, chunk = self.parts[row]
+                sell[i] += chunk
+                remaining -= self.costs[row]
+        return sell
+
+
+class SellOptimizer:
+    """Chooses which loot to sell under a weight or slot budget to maximize GOLD.
+
+    Selling is a bounded knapsack over the small weight domain (1-16 per
+    item). Tables are solved for every budget at once and memoized on the
+    exact holdings and prices, so repeat requests with any budget only walk
+    the stored decisions; a price change produces a new key and a new table.
+    The cache is bounded by table count and by total bytes.
+    """
+
+    def __init__(self, max_budget=MAX_BUDGET, cache_size=TABLE_CACHE_SIZE, cache_bytes=TABLE_CACHE_BYTES):
+        self.max_budget = max_budget
+        self.cache_size = cache_size
+        self.cache_bytes = cache_bytes
+        self._bytes = 0
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _table(self, holdings, budget_type, capacity):
+        key = (budget_type, tuple((h['name'], h['quantity'], h['price'], h['weight']) for h in holdings))
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                self.hits += 1
+                return table
+            self.misses += 1
+        table = _Table(holdings, budget_type, capacity)
+        with self._lock:
+            if key not in self._tables:
+                self._tables[key] = table
+                self._bytes += table.nbytes
+            # The newest table stays even if it alone exceeds the byte bound
+            while len(self._tables) > 1 and (len(self._tables) > self.cache_size or self._bytes > self.cache_bytes):
+                self._bytes -= self._tables.popitem(last=False)[1].nbytes
+        return table
+
+    def optimize(self, holdings, budget, budget_type='weight'):
+        """Split holdings into sell and hold lists for ``budget``"""
+        if budget_type not in BUDGET_TYPES:
+            raise ValueError(f"budget_type must be one of {', '.join(BUDGET_TYPES)}")
+        holdings = sorted(
+            ({'name': h['name'], 'quantity': int(h['quantity']), 'price': float(h['price']),
+              'weight': max(1, int(h.get('weight') or 1))}
+             for h in holdings if int(h.get('quantity') or 0) > 0 and float(h.get('price') or 0) > 0),
+            key=lambda h: h['name'])
+        budget = max(0, int(budget))
+        total = sum(h['quantity'] * (1 if budget_type == 'slots' else h['weight']) for h in holdings)
+        if budget >= total:
+            # Everything fits
+            sell = [h['quantity'] for h in holdings]
+        elif budget > self.max_budget:
+            raise ValueError(f'budget must be at most {self.max_budget} unless it covers every holding ({total})')
+        else:
+            sell = self._table(holdings, budget_type, min(total, self.max_budget)).solve(budget)
+
+        sold, held, used = [], [], 0
+        for h, quantity in zip(holdings, sell):
+            cost = 1 if budget_type == 'slots' else h['weight']
+            if quantity:
+                sold.append({**h, 'quantity': quantity, 'proceeds': round(quantity * h['price'], 4)})
+                used += quantity * cost
+            if h['quantity'] > quantity:
+                held.append({**h, 'quantity': h['quantity'] - quantity})
+        return {
+            'budget': budget,
+            'budget_type': budget_type,
+            'budget_used': used,
+            'proceeds': round(sum(s['proceeds'] for s in sold), 4),
+            'sell': sold,
+            'hold': held,
+        }
+
+    def stats(self):
+        with self._lock:
+            return {'tables': len(self._tables), 'bytes': self._bytes, 'hits': self.hits, 'misses': self.misses}
+
+
+sell_optimizer = SellOptimizer()
@@ -0,0 +1,152 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import request
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Fraction of requests whose spans are logged; slow requests are always logged
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 0.01))
+TRACE_SLOW_MS = float(os.getenv('TRACE_SLOW_MS', 1000))
+TRACE_LOG_FILE = os.getenv('TRACE_LOG_FILE', 'traces.log')
+
+_current = ContextVar('trace', default=None)
+
+logger = logging.getLogger('tracing')
+logger.propagate = False
+
+
+def _start_log_listener():
+    """Send trace records through a queue so request threads never block on I/O"""
+    records = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    logger.setLevel(logging.INFO)
+    handler = logging.FileHandler(TRACE_LOG_FILE)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+    listener = logging.handlers.QueueListener(records, handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+
+class Trace:
+    """Timed spans for one request"""
+
+    def __init__(self, name):
+        self.name = name
+        self.start = time.perf_counter()
+        self.spans = []
+        self.sampled = random.random() < TRACE_SAMPLE_RATE
+
+    def add(self, name, seconds):
+        self.spans.append((name, seconds * 1000))
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    @property
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def server_timing(self):
+        """Spans formatted for the Server-Timing response header"""
+        return ', '.join(f'{name};dur={ms:.1f}' for name, ms in self.spans)
+
+    def emit(self, status=None):
+        """Log the spans if this trace is sampled or slow"""
+        total = self.elapsed_ms
+        if not self.sampled and total < TRACE_SLOW_MS:
+            return
+        spans = ' '.join(f'{name}={ms:.1f}ms' for name, ms in self.spans)
+        logger.info(f'{self.name} status={status} total={total:.1f}ms {spans}')
+
+
+def current_trace():
+    """Trace of the request being handled, or None outside a traced request"""
+    return _current.get()
+
+
+@contextmanager
+def span(name):
+    """Time a block as a span of the current trace (no-op when untraced)"""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    with trace.span(name):
+        yield
+
+
+class _TimedConnectMixin:
+    """Records DNS + TCP (+ TLS) setup as a 'connect' span; reused connections skip it"""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            trace = _current.get()
+            if trace is not None:
+                trace.add('connect', time.perf_counter() - start)
+
+
+class _TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+def instrument_adapter(adapter):
+    """Make a requests HTTPAdapter report connection setup time to the current trace"""
+    adapter.poolmanager.pool_classes_by_scheme = {
+        'http': _TimedHTTPConnectionPool,
+        'https': _TimedHTTPSConnectionPool,
+    }
+    return adapter
+
+
+def init_tracing(app):
+    """Trace every request to ``app`` and add a Server-Timing header"""
+    _start_log_listener()
+
+    @app.before_request
+    def _start_trace():
+        request.trace_token = _current.set(Trace(f'{request.method} {request.path}'))
+
+    @app.after_request
+    def _finish_trace(response):
+        trace = _current.get()
+        if trace is None:
+            return response
+        if trace.spans:
+            response.headers['Server-Timing'] = trace.server_timing()
+        # Streamed bodies add their download span later, so log once the
+        # response has been fully sent
+        response.call_on_close(lambda: trace.emit(response.status_code))
+        return response
+
+    @app.teardown_request
+    def _reset_trace(exc=None):
+        token = getattr(request, 'trace_token', None)
+        if token is not None:
+            _current.reset(token)
@@ -0,0 +1,232 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: slots are only coordinated within one process
+    fcntl = None
+
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+LANES = (INTERACTIVE, BACKGROUND)
+
+UPSTREAM_MAX_CONCURRENCY = int(os.getenv('UPSTREAM_MAX_CONCURRENCY', 4))
+# Slots background work may never take, so UI requests always find one free
+UPSTREAM_INTERACTIVE_RESERVED = int(os.getenv('UPSTREAM_INTERACTIVE_RESERVED', 1))
+# Background requests queued longer than this are shed
+UPSTREAM_BACKGROUND_MAX_WAIT = float(os.getenv('UPSTREAM_BACKGROUND_MAX_WAIT', 30))
+# Interactive requests give up with UpstreamBusy after waiting this long for a rate token or a slot
+UPSTREAM_INTERACTIVE_MAX_WAIT = float(os.getenv('UPSTREAM_INTERACTIVE_MAX_WAIT', 10))
+# Interactive queue depth at which queued background requests are shed at once
+UPSTREAM_SHED_BACKLOG = int(os.getenv('UPSTREAM_SHED_BACKLOG', 8))
+# Lock files that share the slots between the app and the fetcher processes;
+# empty keeps the pool process-local
+UPSTREAM_LOCK_DIR = os.getenv(
+    'UPSTREAM_LOCK_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cache', 'upstream')
+)
+# How often a request waiting on another process re-checks the slots
+UPSTREAM_POLL_SECONDS = 0.02
+
+
+class UpstreamBusy(Exception):
+    """Request shed: background yielding to interactive traffic, or interactive waiting too long"""
+
+
+class SharedSlots:
+    """Upstream slots shared by every process on the host through flock'd files.
+
+    Holding slot i is an exclusive lock on ``slot-i``; the kernel drops it if
+    the process dies, so a crashed fetcher never leaks a slot. Interactive
+    waiters hold a shared lock on ``interactive`` so background requests in
+    other processes see them queued and stand back.
+    """
+
+    def __init__(self, directory, max_concurrency, interactive_reserved):
+        self.directory = directory
+        self.max_concurrency = max_concurrency
+        self.interactive_reserved = interactive_reserved
+
+    def _open(self, name):
+        os.makedirs(self.directory, exist_ok=True)
+        return os.open(os.path.join(self.directory, name), os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _take(self, count):
+        for i in range(count):
+            fd = self._open(f'slot-{i}')
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def _interactive_waiting(self):
+        fd = self._open('interactive')
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return False
+        except BlockingIOError:
+            return True
+        finally:
+            os.close(fd)
+
+    def acquire(self, lane, deadline):
+        """Lock a free slot for ``lane`` and return its fd, giving up at ``deadline``"""
+        if lane == INTERACTIVE:
+            marker = self._open('interactive')
+            fcntl.flock(marker, fcntl.LOCK_SH)
+            try:
+                while True:
+                    fd = self._take(self.max_concurrency)
+                    if fd is not None:
+                        return fd
+                    if time.monotonic() >= deadline:
+                        raise UpstreamBusy('interactive request timed out: upstream slots busy in another process')
+                    time.sleep(UPSTREAM_POLL_SECONDS)
+            finally:
+                os.close(marker)
+        while True:
+            if not self._interactive_waiting():
+                fd = self._take(self.max_concurrency - self.interactive_reserved)
+                if fd is not None:
+                    return fd
+            if time.monotonic() >= deadline:
+                raise UpstreamBusy('background request shed: upstream slots busy in another process')
+            time.sleep(UPSTREAM_POLL_SECONDS)
+
+    @staticmethod
+    def release(fd):
+        os.close(fd)
+
+
+class UpstreamScheduler:
+    """Bounded concurrency pool for the game API with two priority lanes.
+
+    Interactive (proxy) requests are granted a slot whenever one is free,
+    and fail with UpstreamBusy after ``interactive_max_wait`` rather than
+    hang. Background (fetcher) requests wait while any interactive request is
+    queued, cannot use the reserved slots, and are shed with UpstreamBusy
+    when they wait too long or the interactive queue backs up.
+
+    Threads of one process queue on a condition; with ``lock_dir`` set, a
+    granted request then also takes one of the host-wide SharedSlots, so the
+    app's proxy and a separate fetcher process compete for the same pool.
+    ``acquire`` returns a lease that must be passed back to ``release``.
+    """
+
+    def __init__(self, max_concurrency=UPSTREAM_MAX_CONCURRENCY, interactive_reserved=UPSTREAM_INTERACTIVE_RESERVED,
+                 background_max_wait=UPSTREAM_BACKGROUND_MAX_WAIT, shed_backlog=UPSTREAM_SHED_BACKLOG,
+                 lock_dir=UPSTREAM_LOCK_DIR, interactive_max_wait=UPSTREAM_INTERACTIVE_MAX_WAIT):
+        self.max_concurrency = max_concurrency
+        self.interactive_reserved = min(interactive_reserved, max_concurrency - 1)
+        self.background_max_wait = background_max_wait
+        self.interactive_max_wait = interactive_max_wait
+        self.shed_backlog = shed_backlog
+        self.shared = SharedSlots(lock_dir, max_concurrency, self.interactive_reserved) if lock_dir and fcntl else None
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = {lane: 0 for lane in LANES}
+        self._granted = {lane: 0 for lane in LANES}
+        self._shed = 0
+        self._timed_out = 0
+        self._wait_total = {lane: 0.0 for lane in LANES}
+        self._wait_max = {lane: 0.0 for lane in LANES}
+        self._recent_waits = {lane: deque(maxlen=1000) for lane in LANES}
+
+    def _can_run(self, lane):
+        if lane == INTERACTIVE:
+            return self._active < self.max_concurrency
+        return (self._waiting[INTERACTIVE] == 0
+                and self._active < self.max_concurrency - self.interactive_reserved)
+
+    def acquire(self, lane=BACKGROUND):
+        """Block until ``lane`` may start an upstream request; returns the lease to release"""
+        start = time.monotonic()
+        deadline = start + (self.interactive_max_wait if lane == INTERACTIVE else self.background_max_wait)
+        with self._cond:
+            self._waiting[lane] += 1
+            try:
+                while not self._can_run(lane):
+                    waited = time.monotonic() - start
+                    if lane == BACKGROUND:
+                        if waited >= self.background_max_wait or self._waiting[INTERACTIVE] >= self.shed_backlog:
+                            self._shed += 1
+                            raise UpstreamBusy(f'background request shed after {waited:.1f}s')
+                    elif waited >= self.interactive_max_wait:
+                        self._timed_out += 1
+                        raise UpstreamBusy(f'interactive request timed out after {waited:.1f}s')
+                    self._cond.wait(deadline - start - waited)
+                self._active += 1
+            finally:
+                self._waiting[lane] -= 1
+                # Waking background waiters lets them re-check shedding
+                self._cond.notify_all()
+
+        lease = None
+        if self.shared is not None:
+            try:
+                lease = self.shared.acquire(lane, deadline)
+            except BaseException as e:
+                with self._cond:
+                    self._active -= 1
+                    if isinstance(e, UpstreamBusy):
+                        if lane == BACKGROUND:
+                            self._shed += 1
+                        else:
+                            self._timed_out += 1
+                    self._cond.notify_all()
+                raise
+
+        waited = time.monotonic() - start
+        with self._cond:
+            self._granted[lane] += 1
+            self._wait_total[lane] += waited
+            self._wait_max[lane] = max(self._wait_max[lane], waited)
+            self._recent_waits[lane].append(waited)
+        return lease
+
+    def release(self, lease=None):
+        if lease is not None:
+            self.shared.release(lease)
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, lane=BACKGROUND):
+        lease = self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release(lease)
+
+    def stats(self):
+        """Queue and wait-time metrics per lane"""
+        with self._cond:
+            lanes = {}
+            for lane in LANES:
+                recent = sorted(self._recent_waits[lane])
+                lanes[lane] = {
+                    'waiting': self._waiting[lane],
+                    'granted': self._granted[lane],
+                    'wait_seconds_total': round(self._wait_total[lane], 6),
+                    'wait_seconds_max': round(self._wait_max[lane], 6),
+                    'wait_seconds_p50': round(recent[len(recent) // 2], 6) if recent else 0.0,
+                    'wait_seconds_p95': round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 6) if recent else 0.0,
+                }
+            return {
+                'active': self._active,
+                'max_concurrency': self.max_concurrency,
+                'shared': self.shared is not None,
+                'background_shed': self._shed,
+                'interactive_timeouts': self._timed_out,
+                'lanes': lanes,
+            }
+
+
+# Shared scheduler for api-production.defidungeons.gg
+upstream_scheduler = UpstreamScheduler()
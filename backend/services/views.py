@@ -0,0 +1,170 @@
+import json
+import logging
+import os
+from datetime import datetime
+from services.exchange_ledger import ExchangeLedger
+from services.quest_analytics import DATA_DIR
+
+# Views are written to data/views/ and copied to frontend/public/data/views/
+VIEWS_DIR = 'views'
+RARITY_ORDER = {'Legendary': 0, 'Mythic': 1, 'Epic': 2, 'Rare': 3, 'Uncommon': 4, 'Common': 5}
+SLOTS = ('Weapon', 'Headpiece', 'Chest', 'Legs', 'Boots')
+
+
+def _load(filename, data_dir):
+    try:
+        with open(os.path.join(data_dir, filename)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _stat(metadata, stat_type):
+    effect = next((e for e in metadata.get('effects') or () if e.get('statType') == stat_type), None)
+    try:
+        return int(effect['value']) if effect else 0
+    except (TypeError, ValueError):
+        return 0
+
+
+def combat_score(metadata):
+    """Power + Vitality, the score DungeonCalculator auto-equips by"""
+    return _stat(metadata, 'Power') + _stat(metadata, 'Vitality')
+
+
+def _drop_sort_key(drop):
+    metadata = drop['itemMetadata']
+    return RARITY_ORDER.get(metadata.get('rarity'), len(RARITY_ORDER)), metadata.get('type') or '', metadata.get('name') or ''
+
+
+def dungeon_view(definitions, drop_chances):
+    """Dungeon definitions joined with their deduplicated, sorted drop tables.
+
+    Each item appears once per dungeon with its best chance over the NFT
+    classes and the classes that can drop it. An item listed with different
+    chances within one class table is reported in the dungeon's ``issues``.
+    """
+    tables = (drop_chances or {}).get('dungeon_specific', {})
+    view = []
+    for dungeon in definitions or []:
+        table = tables.get(dungeon.get('id'), {})
+        classes = table.get('classes') or {'': table.get('drops') or []}
+        drops = {}
+        issues = []
+        for nft_class, entries in classes.items():
+            seen = {}
+            for entry in entries:
+                metadata = entry.get('itemMetadata') or {}
+                item_id = metadata.get('id')
+                chance = entry.get('chance')
+                if item_id is None or not isinstance(chance, (int, float)):
+                    continue
+                if item_id in seen and seen[item_id] != chance:
+                    issues.append(f"Item {metadata.get('name')} has multiple different drop chances"
+                                  + (f' for {nft_class}' if nft_class else ''))
+                seen[item_id] = max(chance, seen.get(item_id, chance))
+                drop = drops.get(item_id)
+                if drop is None:
+                    drops[item_id] = drop = {
+                        'itemMetadata': {k: metadata.get(k) for k in ('id', 'name', 'image', 'type', 'rarity')},
+                        'chance': chance,
+                        'classes': [],
+                    }
+                drop['chance'] = max(drop['chance'], chance)
+                if nft_class and nft_class not in drop['classes']:
+                    drop['classes'].append(nft_class)
+        view.append({
+            'id': dungeon.get('id'),
+            'name': dungeon.get('name'),
+            'bossName': dungeon.get('bossName'),
+            'bossImage': dungeon.get('bossImage'),
+            'bossAttunement': dungeon.get('bossAttunement'),
+            'durationInSeconds': dungeon.get('durationInSeconds'),
+            'recommendedCombatLevel': dungeon.get('recommendedCombatLevel'),
+            'keyFungibleAssetId': dungeon.get('keyFungibleAssetId'),
+            'dungeonBossKillChance': dungeon.get('dungeonBossKillChance'),
+            'baseBossKillChance': float(dungeon.get('dungeonBossKillChance') or 0),
+            'drops': sorted(drops.values(), key=_drop_sort_key),
+            'issues': sorted(set(issues)),
+        })
+    return view
+
+
+def inventory_view(items):
+    """Owned items reduced to what the calculator renders, with the best item per slot"""
+    view = []
+    best = {}
+    for item in items or []:
+        metadata = item.get('itemMetadata')
+        if not metadata or item.get('isDeleted'):
+            continue
+        score = combat_score(metadata)
+        view.append({'id': item.get('id'), 'itemMetadata': metadata, 'combatScore': score})
+        slot = metadata.get('type')
+        if slot in SLOTS and (slot not in best or score > best[slot][0]):
+            best[slot] = (score, item.get('id'))
+    view.sort(key=lambda entry: -entry['combatScore'])
+    return {
+        'items': view,
+        'bestBySlot': {slot: best[slot][1] if slot in best else None for slot in SLOTS},
+    }
+
+
+def item_lookup(items, drop_chances):
+    """Every item metadata seen in the inventory or drop tables, keyed by id"""
+    lookup = {}
+    for item in items or []:
+        if item.get('itemMetadata'):
+            lookup[str(item['itemMetadata']['id'])] = item['itemMetadata']
+    for table in (drop_chances or {}).get('dungeon_specific', {}).values():
+        for entries in (table.get('classes') or {'': table.get('drops') or []}).values():
+            for entry in entries:
+                metadata = entry.get('itemMetadata')
+                if metadata and metadata.get('id') is not None:
+                    lookup.setdefault(str(metadata['id']), metadata)
+    return lookup
+
+
+def _write_view(directory, filename, data):
+    """Write a view unless its data is unchanged; returns True when written"""
+    path = os.path.join(directory, filename)
+    try:
+        with open(path) as f:
+            if json.load(f).get('data') == data:
+                return False
+    except (OSError, ValueError):
+        pass
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'timestamp': datetime.now().isoformat(), 'data': data}, f, separators=(',', ':'))
+    os.replace(tmp, path)
+    return True
+
+
+def build_views(data_dir=DATA_DIR):
+    """Precompute the frontend views from the raw fetcher files in ``data_dir``.
+
+    Runs after each sync; views whose content did not change are left
+    untouched. Returns the names of the views written.
+    """
+    directory = os.path.join(data_dir, VIEWS_DIR)
+    os.makedirs(directory, exist_ok=True)
+    definitions = (_load('dungeon_definitions.json', data_dir) or {}).get('data')
+    drop_chances = _load('drop_chances.json', data_dir)
+    items = (_load('inventory_items.json', data_dir) or {}).get('data')
+
+    views = {
+        'dungeons.json': dungeon_view(definitions, drop_chances),
+        'inventory.json': inventory_view(items),
+        'items.json': item_lookup(items, drop_chances),
+        'exchange_summary.json': ExchangeLedger(os.path.join(data_dir, 'recent_exchanges.json')).summary(),
+    }
+    written = []
+    for filename, data in views.items():
+        try:
+            if _write_view(directory, filename, data):
+                written.append(filename)
+        except OSError as e:
+            logging.error(f"Error writing view {filename}: {str(e)}")
+    logging.info(f"Built views ({', '.join(written) or 'all unchanged'})")
+    return written
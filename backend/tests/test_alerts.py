@@ -0,0 +1,62 @@
+import random
+import pytest
+from services.alerts import AlertEngine, ThresholdIndex
+
+
+class ListSink:
+    def __init__(self):
+        self.events = []
+
+    def send(self, event):
+        self.events.append(event)
+
+
+def test_threshold_index_matches_a_linear_scan():
+    rng = random.Random(3)
+    index = ThresholdIndex()
+    thresholds = [(rng.choice([0.5, 1.0, 1.5, 2.0, rng.uniform(0, 3)]), i) for i in range(200)]
+    for value, alert_id in thresholds:
+        index.add(value, alert_id)
+    for value, alert_id in thresholds[::4]:
+        index.remove(value, alert_id)
+    live = [t for i, t in enumerate(thresholds) if i % 4]
+    for _ in range(500):
+        old, new = rng.choice([1.0, 1.5, rng.uniform(-1, 4)]), rng.choice([1.0, 2.0, rng.uniform(-1, 4)])
+        assert sorted(index.crossed_up(old, new)) == sorted(i for v, i in live if old < v <= new)
+        assert sorted(index.crossed_down(old, new)) == sorted(i for v, i in live if new <= v < old)
+
+
+@pytest.fixture
+def alerts(tmp_path):
+    sink = ListSink()
+    return AlertEngine(db_path=str(tmp_path / 'alerts.db'), sinks=[sink]), sink
+
+
+def test_ticks_fire_on_crossing_by_direction(alerts):
+    engine, sink = alerts
+    above, below, cross = engine.register([
+        {'metric': 'gold', 'threshold': 0.05, 'direction': 'above'},
+        {'metric': 'gold', 'threshold': 0.03, 'direction': 'below'},
+        {'metric': 'gold', 'threshold': 0.04, 'direction': 'cross'},
+    ])
+    # The first value only sets the baseline
+    assert engine.update('gold', 0.035) == []
+    assert [e['alert_id'] for e in engine.update('gold', 0.05)] == [cross['id'], above['id']]
+    # An unchanged value fires nothing
+    assert engine.update('gold', 0.05) == []
+    down = engine.update('gold', 0.01)
+    assert [(e['alert_id'], e['direction']) for e in down] == [(below['id'], 'down'), (cross['id'], 'down')]
+    assert engine.update('sol', 500) == []
+    assert [e['id'] for e in sink.events] == sorted(e['id'] for e in sink.events)
+
+
+def test_once_alerts_retire_and_stay_retired(alerts, tmp_path):
+    engine, sink = alerts
+    alert, = engine.register([{'metric': 'roi', 'threshold': 10, 'direction': 'above', 'once': True}])
+    engine.update('roi', 0)
+    assert len(engine.update('roi', 20)) == 1
+    engine.update('roi', 0)
+    assert engine.update('roi', 20) == []
+    assert alert['id'] not in {a['id'] for a in engine.list()}
+    # Reloaded from the database, it is still inactive
+    assert AlertEngine(db_path=str(tmp_path / 'alerts.db'), sinks=[]).list() == []
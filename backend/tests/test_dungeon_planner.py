@@ -0,0 +1,59 @@
+import itertools
+import random
+import pytest
+from services.dungeon_planner import _Table
+
+
+def dungeon(key, slots, value, keys):
+    return {'id': key, 'key': key, 'slots': slots, 'value': value, 'keys': keys}
+
+
+def brute_force(table, budget):
+    """Best value over every mix of bundles and held-key runs that fits ``budget``"""
+    items = [(b[2], b[3], budget // b[2]) for b in table.bundles]
+    items += [(d['slots'], d['value'], min(d['keys'], budget // d['slots'])) for d in table.dungeons if d['value'] > 0]
+    best = 0.0
+    for counts in itertools.product(*(range(limit + 1) for _, _, limit in items)):
+        slots = sum(n * s for n, (s, _, _) in zip(counts, items))
+        if slots <= budget:
+            best = max(best, sum(n * v for n, (_, v, _) in zip(counts, items)))
+    return best
+
+
+def check_plan(table, budget):
+    value, held, bundles = table.solve(budget)
+    used = sum(b[2] for b in bundles) + sum(n * table.dungeons[d]['slots'] for d, n in held.items())
+    assert used <= budget
+    assert all(n <= table.dungeons[d]['keys'] for d, n in held.items())
+    # The reconstructed plan is worth what the table says
+    assert sum(b[3] for b in bundles) + sum(n * table.dungeons[d]['value'] for d, n in held.items()) == pytest.approx(value)
+    return value
+
+
+def test_quest_keys_and_held_keys_combine():
+    dungeons = [dungeon('A', 2, 10.0, 1), dungeon('B', 1, 3.0, 5)]
+    quests = [{'keys': {'A': 1}, 'slots': 3, 'gold': 1.0}]
+    table = _Table(dungeons, quests, 10)
+    # Held A plus five held B runs, or the quest's own A key on top
+    assert check_plan(table, 4) == 16.0
+    assert check_plan(table, 7) == 25.0
+    value, held, bundles = table.solve(10)
+    assert value == 30.0
+    assert held == {0: 1, 1: 3}
+    assert [(q, runs) for q, runs, _, _ in bundles] == [(0, ((0, 1),))]
+
+
+def test_solve_matches_brute_force():
+    rng = random.Random(11)
+    for _ in range(40):
+        dungeons = [dungeon(f'K{i}', rng.randint(1, 3), float(rng.randint(0, 12)), rng.randint(0, 2))
+                    for i in range(rng.randint(1, 3))]
+        quests = [{'keys': {f'K{rng.randrange(len(dungeons))}': rng.randint(1, 2)} if rng.random() < 0.7 else {},
+                   'slots': rng.randint(1, 4), 'gold': float(rng.randint(0, 5))}
+                  for _ in range(rng.randint(0, 2))]
+        capacity = rng.randint(1, 9)
+        table = _Table(dungeons, quests, capacity)
+        for budget in range(capacity + 1):
+            assert check_plan(table, budget) == pytest.approx(brute_force(table, budget))
+        # Budgets past the table's capacity are clamped to it
+        assert table.solve(capacity + 5)[0] == table.solve(capacity)[0]
@@ -0,0 +1,38 @@
+import random
+import pytest
+from services.exchange_ledger import RollingWindows
+
+
+def brute_force(records, head, window):
+    return sum(values[0] for day, values in records if 0 <= head - day < window)
+
+
+def test_window_sums_match_a_rescan_as_days_advance():
+    rng = random.Random(7)
+    windows = RollingWindows(1, windows=(1, 7, 30))
+    records = []
+    day = 19000
+    for _ in range(2000):
+        step = rng.choice([0, 0, 0, 1, 1, 2, 5, 40])
+        day += step
+        # Mostly today, sometimes a late record for an earlier day
+        record_day = day - rng.choice([0, 0, 0, 1, 3, 10, 31])
+        value = float(rng.randint(1, 9))
+        windows.add(record_day, [value])
+        records.append((record_day, [value]))
+        for w in (1, 7, 30):
+            assert windows.sums[w][0] == pytest.approx(brute_force(records, windows.head, w))
+
+
+def test_advance_past_the_ring_clears_every_window():
+    windows = RollingWindows(2, windows=(1, 7))
+    windows.add(100, [1.0, 2.0])
+    windows.add(103, [3.0, 4.0])
+    assert windows.sums == {1: [3.0, 4.0], 7: [4.0, 6.0]}
+    windows.advance(107)
+    assert windows.sums == {1: [0.0, 0.0], 7: [3.0, 4.0]}
+    windows.advance(200)
+    assert windows.sums == {1: [0.0, 0.0], 7: [0.0, 0.0]}
+    # Too old for the largest window: ignored
+    windows.add(150, [5.0, 5.0])
+    assert windows.sums[7] == [0.0, 0.0]
@@ -0,0 +1,87 @@
+import sqlite3
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+from benchmarks.stub_birdeye import start_stub, synthetic_price
+from price_backfill import PriceBackfill
+from services.price_history import GOLD_ADDRESS, as_of, realized_roi
+from services.rate_limiter import TokenBucket
+from services.schema import ensure_schema
+
+
+def test_as_of_takes_last_point_at_or_before():
+    timestamps = np.array(['2024-01-02T00:00:00', '2024-01-03T00:00:00', '2024-01-05T12:00:00'], dtype='datetime64[s]')
+    prices = np.array([1.0, 2.0, 3.0])
+    when = np.array(['2024-01-01T23:59:59', '2024-01-02T00:00:00', '2024-01-04T00:00:00', '2024-02-01T00:00:00'],
+                    dtype='datetime64[s]')
+    got = as_of(timestamps, prices, when)
+    assert np.isnan(got[0])
+    assert got[1:].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_as_of_empty_series_is_unpriced():
+    when = np.array(['2024-01-01'], dtype='datetime64[s]')
+    assert np.isnan(as_of(np.array([], dtype='datetime64[s]'), np.array([]), when)).all()
+
+
+@pytest.fixture
+def stub():
+    server, state, base_url = start_stub()
+    yield state, base_url
+    server.shutdown()
+
+
+def test_backfill_resumes_and_values_earnings_as_of_the_day(tmp_path, stub):
+    state, base_url = stub
+    db_path = str(tmp_path / 'prices.db')
+    ensure_schema(db_path)
+    backfill = PriceBackfill(db_path=db_path, base_url=base_url, api_key='test', limiter=TokenBucket(1000, 1000))
+
+    stored = backfill.backfill('gold', days=3, interval='1H')
+    assert 70 <= stored <= 73
+    # A rerun only asks for hours after the stored progress
+    assert backfill.backfill('gold', days=3, interval='1H') <= 1
+
+    today = datetime.now(timezone.utc).date()
+    yesterday, before = today - timedelta(days=1), today - timedelta(days=10)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany('INSERT INTO gold_earnings (date, amount, source) VALUES (?, ?, ?)',
+                         [(before.isoformat(), 5.0, 'Quest'), (yesterday.isoformat(), 10.0, 'Quest')])
+    conn.close()
+
+    result = realized_roi(0.1, 100, db_path=db_path)
+    # The day before the first price point is reported, not priced at the first price
+    assert result['days'] == 2
+    assert result['priced_days'] == 1
+    assert result['unpriced_gold'] == 5.0
+    # Yesterday's earnings are valued at the last hourly candle of that day
+    close = int(datetime(yesterday.year, yesterday.month, yesterday.day, 23, tzinfo=timezone.utc).timestamp())
+    assert result['realized_usd'] == pytest.approx(10.0 * synthetic_price(GOLD_ADDRESS, close))
+    assert result['mark_to_market_usd'] == pytest.approx(1.5)
+    assert state.snapshot()['requests']['/defi/history_price'] >= 1
+
+
+def test_longer_backfill_fills_the_older_gap_without_duplicates(tmp_path, stub):
+    _, base_url = stub
+    db_path = str(tmp_path / 'prices.db')
+    backfill = PriceBackfill(db_path=db_path, base_url=base_url, api_key='test', limiter=TokenBucket(1000, 1000))
+
+    assert 22 <= backfill.backfill('gold', days=1, interval='1H') <= 25
+    # Growing --days fetches the two older days rather than resuming after the newest point
+    assert 46 <= backfill.backfill('gold', days=3, interval='1H') <= 49
+    assert backfill.backfill('gold', days=3, interval='1H') <= 1
+
+    conn = sqlite3.connect(db_path)
+    try:
+        count, distinct, oldest = conn.execute(
+            'SELECT COUNT(*), COUNT(DISTINCT timestamp), MIN(timestamp) FROM gold_price_history').fetchone()
+        # Overlapping chunks cannot store a timestamp twice
+        with conn:
+            conn.execute('INSERT OR IGNORE INTO gold_price_history (timestamp, price) VALUES (?, 1.0)', (oldest,))
+        assert conn.execute('SELECT COUNT(*) FROM gold_price_history').fetchone()[0] == count
+    finally:
+        conn.close()
+    assert count == distinct
+    assert 70 <= count <= 73
+    assert datetime.fromisoformat(oldest).replace(tzinfo=timezone.utc) <= datetime.now(timezone.utc) - timedelta(days=3) + timedelta(hours=1)
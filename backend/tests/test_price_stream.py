@@ -0,0 +1,56 @@
+from services.price_stream import Broadcaster
+
+
+def frame_id(frame):
+    first = frame.split('\n', 1)[0]
+    return int(first[len('id: '):]) if first.startswith('id: ') else None
+
+
+def snapshot():
+    return 'snapshot', {'full': True}
+
+
+def take(frames, n):
+    return [next(frames) for _ in range(n)]
+
+
+def test_reconnect_inside_history_replays_only_missed_events():
+    broadcaster = Broadcaster(history=8, heartbeat=0.05)
+    ids = [broadcaster.publish('price', {'n': n}) for n in range(5)]
+    frames = broadcaster.subscribe(last_id=ids[1], snapshot=snapshot)
+    assert [frame_id(f) for f in take(frames, 3)] == ids[2:]
+    assert broadcaster.since(ids[3]) == [{'n': 4}]
+    frames.close()
+
+
+def test_reconnect_past_history_gets_a_snapshot_then_what_is_left():
+    broadcaster = Broadcaster(history=3, heartbeat=0.05)
+    ids = [broadcaster.publish('price', {'n': n}) for n in range(6)]
+    frames = broadcaster.subscribe(last_id=ids[0], snapshot=snapshot)
+    first, *replayed = take(frames, 4)
+    assert first.startswith('event: snapshot\n')
+    assert [frame_id(f) for f in replayed] == ids[3:]
+    frames.close()
+
+
+def test_new_client_gets_snapshot_then_live_events_once():
+    broadcaster = Broadcaster(heartbeat=0.05)
+    broadcaster.publish('price', {'n': 0})
+    frames = broadcaster.subscribe(snapshot=snapshot)
+    assert frame_id(next(frames)) is None
+    assert broadcaster.subscribers == 1
+    live = broadcaster.publish('price', {'n': 1})
+    assert frame_id(next(frames)) == live
+    assert next(frames) == ': heartbeat\n\n'
+    frames.close()
+    assert broadcaster.subscribers == 0
+
+
+def test_slow_client_drops_its_oldest_events():
+    broadcaster = Broadcaster(client_buffer=2, heartbeat=0.05)
+    frames = broadcaster.subscribe(snapshot=snapshot)
+    next(frames)
+    ids = [broadcaster.publish('price', {'n': n}) for n in range(5)]
+    assert broadcaster.stats()['dropped'] == 3
+    assert [frame_id(f) for f in take(frames, 2)] == ids[-2:]
+    frames.close()
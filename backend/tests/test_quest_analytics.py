@@ -0,0 +1,45 @@
+import pytest
+from services.quest_analytics import GOLD_ASSET, QuestClaims, gold_prices
+
+
+def claim(started, claimed, nft='nft-a', level=5, rewards=()):
+    return {'startedAt': started, 'claimedAt': claimed, 'nftId': nft, 'nftCombatLevel': level,
+            'rewards': [{'fungibleAssetId': asset, 'amount': amount} for asset, amount in rewards]}
+
+
+CLAIMS = [
+    # 2h quest: 10 GOLD plus 4 Bones at 0.5 GOLD each
+    claim('2024-03-01T08:00:00Z', '2024-03-01T10:00:00Z', rewards=[(GOLD_ASSET, 10), ('Bones', 4)]),
+    # 30 minute quest on another NFT, claimed the next UTC day
+    claim('2024-03-01T23:45:00Z', '2024-03-02T00:15:00Z', nft='nft-b', level=7, rewards=[(GOLD_ASSET, 3)]),
+    # Asset with no offer price is worth nothing
+    claim('2024-03-02T12:00:00Z', '2024-03-02T13:00:00Z', rewards=[('Unlisted', 100)]),
+    # Never claimed: dropped
+    claim('2024-03-02T12:00:00Z', None, rewards=[(GOLD_ASSET, 50)]),
+]
+PRICES = gold_prices([{'fungibleAssetId': 'Bones', 'offerPrice': '0.5'}, {'fungibleAssetId': 'Unlisted'}])
+
+
+def test_gold_per_hour_values_rewards_at_offer_prices():
+    summary = QuestClaims(CLAIMS, PRICES).summary()
+    assert summary['claims'] == 3
+    assert summary['gold'] == 15.0
+    assert summary['hours'] == 3.5
+    assert summary['gold_per_hour'] == pytest.approx(round(15 / 3.5, 4))
+    assert summary['assets'] == {'Bones': 4.0, GOLD_ASSET: 13.0, 'Unlisted': 100.0}
+
+
+def test_groups_by_claim_day_nft_and_combat_level():
+    quests = QuestClaims(CLAIMS, PRICES)
+    assert [(r['date'], r['gold'], r['gold_per_hour']) for r in quests.per_day()] == [
+        ('2024-03-01', 12.0, 6.0), ('2024-03-02', 3.0, 2.0)]
+    assert [(r['nft_id'], r['claims'], r['gold_per_hour']) for r in quests.per_nft()] == [
+        ('nft-a', 2, 4.0), ('nft-b', 1, 6.0)]
+    assert [r['combat_level'] for r in quests.per_combat_level()] == [5, 7]
+    days, gold = quests.daily_totals()
+    assert days == ['2024-03-01', '2024-03-02'] and gold.tolist() == [12.0, 3.0]
+
+
+def test_empty_feed():
+    summary = QuestClaims([]).summary()
+    assert summary['claims'] == 0 and summary['gold_per_hour'] == 0 and summary['per_day'] == []
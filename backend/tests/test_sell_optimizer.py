@@ -0,0 +1,85 @@
+import itertools
+import random
+import pytest
+from services.sell_optimizer import SellOptimizer, _Table
+
+
+def holding(name, quantity, price, weight):
+    return {'name': name, 'quantity': quantity, 'price': price, 'weight': weight}
+
+
+def brute_force(holdings, budget, budget_type):
+    """Best proceeds over every per-item quantity that fits ``budget``"""
+    costs = [1 if budget_type == 'slots' else h['weight'] for h in holdings]
+    best = 0.0
+    for counts in itertools.product(*(range(h['quantity'] + 1) for h in holdings)):
+        if sum(n * c for n, c in zip(counts, costs)) <= budget:
+            best = max(best, sum(n * h['price'] for n, h in zip(counts, holdings)))
+    return best
+
+
+def check_sell(holdings, sell, budget, budget_type):
+    costs = [1 if budget_type == 'slots' else h['weight'] for h in holdings]
+    assert sum(n * c for n, c in zip(sell, costs)) <= budget
+    assert all(0 <= n <= h['quantity'] for n, h in zip(sell, holdings))
+    return sum(n * h['price'] for n, h in zip(sell, holdings))
+
+
+def test_solve_matches_brute_force():
+    rng = random.Random(7)
+    for _ in range(40):
+        holdings = [holding(f'I{i}', rng.randint(1, 5), float(rng.randint(1, 20)), rng.randint(1, 6))
+                    for i in range(rng.randint(1, 4))]
+        budget_type = rng.choice(('weight', 'slots'))
+        capacity = rng.randint(1, 20)
+        table = _Table(holdings, budget_type, capacity)
+        for budget in range(capacity + 1):
+            value = check_sell(holdings, table.solve(budget), budget, budget_type)
+            assert value == pytest.approx(brute_force(holdings, budget, budget_type))
+            assert value == pytest.approx(table.best[budget])
+
+
+def test_optimize_respects_limits_and_splits_sell_and_hold():
+    optimizer = SellOptimizer()
+    holdings = [holding('Bone', 10, 1.0, 1), holding('Crown', 2, 9.0, 4), holding('Gem', 3, 5.0, 2), holding('Rag', 4, 0, 1)]
+    result = optimizer.optimize(holdings, 9)
+    # Greedy by GOLD per weight would sell all three Gems and then Bones for 18.0
+    assert result['proceeds'] == pytest.approx(20.0)
+    assert result['budget_used'] == 9
+    assert {s['name']: s['quantity'] for s in result['sell']} == {'Bone': 1, 'Crown': 1, 'Gem': 2}
+    # Held quantities are what was not sold; unpriced holdings are left out
+    assert {h['name']: h['quantity'] for h in result['hold']} == {'Bone': 9, 'Crown': 1, 'Gem': 1}
+
+
+def test_budget_covering_everything_sells_it_all():
+    optimizer = SellOptimizer(max_budget=10)
+    holdings = [holding('A', 5, 2.0, 3), holding('B', 4, 1.0, 2)]
+    result = optimizer.optimize(holdings, 1000)
+    assert result['hold'] == []
+    assert result['budget_used'] == 23
+    assert result['proceeds'] == pytest.approx(14.0)
+    # No table is needed when every holding fits
+    assert optimizer.stats()['misses'] == 0
+
+
+def test_budget_past_max_budget_is_rejected():
+    optimizer = SellOptimizer(max_budget=10)
+    holdings = [holding('A', 5, 2.0, 3), holding('B', 4, 1.0, 2)]
+    with pytest.raises(ValueError):
+        optimizer.optimize(holdings, 11)
+    assert optimizer.optimize(holdings, 10)['budget_used'] <= 10
+    with pytest.raises(ValueError):
+        optimizer.optimize(holdings, 5, budget_type='volume')
+
+
+def test_table_cache_is_bounded_by_bytes():
+    holdings = [holding('A', 50, 2.0, 3)]
+    size = _Table(holdings, 'weight', 150).nbytes
+    optimizer = SellOptimizer(cache_bytes=2 * size)
+    for price in (1.0, 2.0, 3.0):
+        optimizer.optimize([holding('A', 50, price, 3)], 100)
+    stats = optimizer.stats()
+    assert stats['tables'] == 2
+    assert stats['bytes'] == 2 * size
+    optimizer.optimize([holding('A', 50, 3.0, 3)], 40)
+    assert optimizer.stats()['hits'] == 1
@@ -48,7 +48,6 @@ import { ChevronDownIcon, ChevronRightIcon } from '@chakra-ui/icons';
 
 function DungeonCalculator() {
   const [dungeons, setDungeons] = useState([]);
-  const [dropChances, setDropChances] = useState([]);
   const [selectedDungeon, setSelectedDungeon] = useState(null);
   const [inventory, setInventory] = useState([]);
   const [baseStats, setBaseStats] = useState({
@@ -71,32 +70,28 @@ function DungeonCalculator() {
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [dungeonsRes, dropChancesRes, inventoryRes] = await Promise.all([
-          fetch('/data/dungeon_definitions.json'),
-          fetch('/data/drop_chances.json'),
-          fetch('/data/inventory_items.json')
+        // Views precomputed by the backend after each sync: dungeons come
+        // joined with their sorted, deduplicated drops, and inventory with
+        // each item's combat score and the best item per slot
+        const [dungeonsRes, inventoryRes] = await Promise.all([
+          fetch('/data/views/dungeons.json'),
+          fetch('/data/views/inventory.json')
         ]);
 
-        const [dungeonsData, dropChancesData, inventoryData] = await Promise.all([
+        const [dungeonsView, inventoryView] = await Promise.all([
           dungeonsRes.json(),
-          dropChancesRes.json(),
           inventoryRes.json()
         ]);
 
-        // Iterate over dungeons to ensure base chance is applied
-        const updatedDungeons = dungeonsData.data.map(dungeon => {
-          return {
-            ...dungeon,
-            baseBossKillChance: parseFloat(dungeon.dungeonBossKillChance)
-          };
-        });
-
-        setDungeons(updatedDungeons);
-        setDropChances(dropChancesData.data);
-        setInventory(inventoryData.data);
+        setDungeons(dungeonsView.data);
+        setInventory(inventoryView.data.items);
 
         // Auto-equip best items based on power + vitality
-        const bestItems = findBestItems(inventoryData.data);
+        const itemsById = new Map(inventoryView.data.items.map(item => [item.id, item]));
+        const bestItems = {};
+        Object.entries(inventoryView.data.bestBySlot).forEach(([slot, id]) => {
+          bestItems[slot] = itemsById.get(id) || null;
+        });
         setEquippedItems(bestItems);
       } catch (error) {
         toast({
@@ -112,28 +107,8 @@ function DungeonCalculator() {
     fetchData();
   }, [toast]);
 
-  const findBestItems = (items) => {
-    const bestBySlot = {};
-    const slots = ['Weapon', 'Headpiece', 'Chest', 'Legs', 'Boots'];
-
-    slots.forEach(slot => {
-      const slotItems = items.filter(item => item.itemMetadata.type === slot);
-      if (slotItems.length > 0) {
-        const bestItem = slotItems.reduce((best, current) => {
-          const currentScore = getItemCombatScore(current);
-          const bestScore = getItemCombatScore(best);
-          return currentScore > bestScore ? current : best;
-        }, slotItems[0]);
-        bestBySlot[slot] = bestItem;
-      } else {
-        bestBySlot[slot] = null;
-      }
-    });
-
-    return bestBySlot;
-  };
-
   const getItemCombatScore = (item) => {
+    if (item && item.combatScore !== undefined) return item.combatScore;
     if (!item || !item.itemMetadata.effects) return 0;
     const power = parseInt(item.itemMetadata.effects.find(e => e.statType === 'Power')?.value || 0);
     const vitality = parseInt(item.itemMetadata.effects.find(e => e.statType === 'Vitality')?.value || 0);
@@ -277,41 +252,8 @@ function DungeonCalculator() {
     return adjustedChance;
   };
 
-  // Filter drops based on dungeon
-  const getDungeonDrops = (dungeon) => {
-    if (!dungeon) return [];
-    
-    // This should be replaced with actual dungeon-specific drop data
-    // For now, we'll simulate different drops per dungeon
-    const dungeonDrops = dropChances.filter(drop => {
-      // Add logic to filter drops based on dungeon.id or other criteria
-      // For example:
-      if (dungeon.id === 'crimson_hall') {
-        return true; // Show all drops for Crimson Hall
-      }
-      // Add conditions for other dungeons
-      return false;
-    });
-
-    // Sort drops by rarity and type
-    return dungeonDrops.sort((a, b) => {
-      // Sort by rarity first
-      const rarityOrder = {
-        'Legendary': 0,
-        'Mythic': 1,
-        'Epic': 2,
-        'Rare': 3,
-        'Uncommon': 4,
-        'Common': 5
-      };
-      
-      const rarityDiff = rarityOrder[a.itemMetadata.rarity] - rarityOrder[b.itemMetadata.rarity];
-      if (rarityDiff !== 0) return rarityDiff;
-      
-      // Then sort by type
-      return a.itemMetadata.type.localeCompare(b.itemMetadata.type);
-    });
-  };
+  // Drops arrive deduplicated and sorted by rarity, then type
+  const getDungeonDrops = (dungeon) => (dungeon ? dungeon.drops || [] : []);
 
   return (
     <Box p={4}>
@@ -28,6 +28,7 @@ import {
   Spinner,
   StatArrow,
 } from '@chakra-ui/react';
+import { subscribePrices, nftPriceUsd } from '../services/priceStream';
 
 const API_BASE_URL = 'http://localhost:5000';
 
@@ -52,33 +53,15 @@ function GoldTracker() {
   const [nftPrice, setNftPrice] = useState(null);
   const toast = useToast();
 
-  const calculateDailyEarnings = (exchanges, achievementStats) => {
-    const earnings = {};
-    
-    // Process exchanges
-    exchanges.forEach(exchange => {
-      const date = new Date(exchange.createdAt).toLocaleDateString();
-      if (!earnings[date]) {
-        earnings[date] = {
-          earned: 0,
-          offerCount: 0
-        };
-      }
-      
-      const earned = parseFloat(exchange.totalEarned) || 0;
-      earnings[date].earned += earned;
-      earnings[date].offerCount += exchange.offerCount || 0;
-    });
-
-    // Sort dates in descending order
-    const sortedEarnings = Object.entries(earnings)
-      .sort(([dateA], [dateB]) => new Date(dateB) - new Date(dateA))
-      .reduce((acc, [date, data]) => {
-        acc[date] = data;
-        return acc;
-      }, {});
-
-    return sortedEarnings;
+  // The backend exchange ledger already buckets exchanges by (UTC) day, newest first
+  const toDailyEarnings = (summary) => {
+    return (summary.daily || []).reduce((acc, day) => {
+      acc[day.date] = {
+        earned: day.earned,
+        offerCount: day.offer_count
+      };
+      return acc;
+    }, {});
   };
 
   const calculateTotals = (earnings) => {
@@ -90,40 +73,6 @@ function GoldTracker() {
     }, { totalItemsSold: 0, totalGoldEarned: 0 });
   };
 
-  const fetchGoldPrice = async () => {
-    try {
-      const response = await fetch(`${API_BASE_URL}/gold/price`);
-      console.log("Gold Price API Response Status:", response.status);
-      if (!response.ok) throw new Error(`Failed to fetch gold price - Status: ${response.status}`);
-      const data = await response.json();
-      console.log("Fetched Gold Price Data:", data);
-      const price = (typeof data.price === 'number') ? data.price : null;
-      setGoldPrice(price);
-      return price;
-    } catch (error) {
-      console.error('Error fetching gold price:', error);
-      setGoldPrice(null);
-      return null;
-    }
-  };
-
-  const fetchNftPrice = async () => {
-    try {
-      const response = await fetch(`${API_BASE_URL}/nft/price`);
-      console.log("NFT Price API Response Status:", response.status);
-      if (!response.ok) throw new Error(`Failed to fetch NFT price - Status: ${response.status}`);
-      const data = await response.json();
-      console.log("Fetched NFT Price Data:", data);
-      const price = (typeof data.price === 'number') ? data.price : null;
-      setNftPrice(price);
-      return price;
-    } catch (error) {
-      console.error('Error fetching NFT price:', error);
-      setNftPrice(null);
-      return null;
-    }
-  };
-
   const calculateRoiStats = (earnings, currentGoldPrice) => {
     const priceMultiplier = (typeof currentGoldPrice === 'number' && currentGoldPrice > 0) ? currentGoldPrice : 0;
     console.log("Calculating ROI with Earnings:", earnings, "and Gold Price Multiplier:", priceMultiplier);
@@ -162,29 +111,20 @@ function GoldTracker() {
     setError(null);
     try {
       const [exchangesRes, statsRes] = await Promise.all([
-        fetch('/data/recent_exchanges.json'),
+        fetch(`${API_BASE_URL}/exchanges/summary`),
         fetch('/data/achievement_stats.json')
       ]);
+      if (!exchangesRes.ok) throw new Error(`Failed to fetch exchange summary - Status: ${exchangesRes.status}`);
 
-      const [exchangesData, statsData] = await Promise.all([
+      const [exchangesSummary, statsData] = await Promise.all([
         exchangesRes.json(),
         statsRes.json()
       ]);
 
       setStats(statsData.data);
-      const dailyEarningsData = calculateDailyEarnings(
-        exchangesData.data,
-        statsData.data
-      );
+      const dailyEarningsData = toDailyEarnings(exchangesSummary);
       setDailyEarnings(dailyEarningsData);
 
-      const [currentGoldPrice, currentNftPrice] = await Promise.all([
-        fetchGoldPrice(),
-        fetchNftPrice()
-      ]);
-
-      calculateRoiStats(dailyEarningsData, currentGoldPrice);
-
     } catch (error) {
       console.error('Error fetching data:', error);
       setError(error.message || 'Failed to fetch data');
@@ -204,6 +144,16 @@ function GoldTracker() {
     fetchData();
   }, [fetchData]);
 
+  // Prices are pushed by the backend whenever they change
+  useEffect(() => subscribePrices((prices) => {
+    setGoldPrice(typeof prices.gold === 'number' ? prices.gold : null);
+    setNftPrice(nftPriceUsd(prices));
+  }), []);
+
+  useEffect(() => {
+    calculateRoiStats(dailyEarnings, goldPrice);
+  }, [dailyEarnings, goldPrice]);
+
   if (loading) {
     return (
       <Box p={4}>
@@ -24,6 +24,7 @@ import {
   Alert,
   AlertIcon,
 } from '@chakra-ui/react';
+import { subscribePrices } from '../services/priceStream';
 
 const API_BASE_URL = 'http://localhost:5000';
 
@@ -51,13 +52,17 @@ const MarketAnalyzer = () => {
     return () => clearInterval(interval);
   }, []);
 
+  // GOLD price is pushed by the backend whenever it changes
+  useEffect(() => subscribePrices((prices) => {
+    if (typeof prices.gold === 'number') setGoldPrice(prices.gold);
+  }), []);
+
   const fetchData = async () => {
     try {
       setIsLoading(true);
       await Promise.all([
         fetchMarketData(),
-        fetchInventory(),
-        fetchGoldPrice()
+        fetchInventory()
       ]);
     } finally {
       setIsLoading(false);
@@ -83,17 +88,6 @@ const MarketAnalyzer = () => {
     }
   };
 
-  const fetchGoldPrice = async () => {
-    try {
-      const response = await fetch(`${API_BASE_URL}/gold/price`);
-      if (!response.ok) throw new Error('Failed to fetch gold price');
-      const data = await response.json();
-      setGoldPrice(data.price);
-    } catch (error) {
-      console.error('Error fetching gold price:', error);
-    }
-  };
-
   const fetchInventory = async () => {
     try {
       const response = await fetch(`${API_BASE_URL}/inventory`);
@@ -0,0 +1,53 @@
+// Live GOLD / SOL / NFT floor prices pushed by the backend over Server-Sent Events.
+// One EventSource is shared by every component on the page; the browser
+// reconnects on its own and resumes from the last event id it saw.
+const PRICE_STREAM_URL = 'http://localhost:5000/prices/stream';
+
+const listeners = new Set();
+const prices = {};
+let source = null;
+
+const notify = () => {
+  const snapshot = { ...prices };
+  listeners.forEach((listener) => listener(snapshot));
+};
+
+const open = () => {
+  source = new EventSource(PRICE_STREAM_URL);
+
+  source.addEventListener('snapshot', (event) => {
+    Object.assign(prices, JSON.parse(event.data).prices);
+    notify();
+  });
+
+  source.addEventListener('price', (event) => {
+    const { metric, price } = JSON.parse(event.data);
+    prices[metric] = price;
+    notify();
+  });
+
+  source.onerror = (error) => {
+    console.error('Price stream error:', error);
+  };
+};
+
+// Calls listener with {gold, sol, nft} (USD, USD, SOL) on every change;
+// returns the unsubscribe function for useEffect cleanup
+export const subscribePrices = (listener) => {
+  listeners.add(listener);
+  if (!source) open();
+  if (Object.keys(prices).length) listener({ ...prices });
+
+  return () => {
+    listeners.delete(listener);
+    if (!listeners.size && source) {
+      source.close();
+      source = null;
+    }
+  };
+};
+
+// NFT floor price in USD, or null until both prices have arrived
+export const nftPriceUsd = (current) => (
+  typeof current.nft === 'number' && typeof current.sol === 'number' ? current.nft * current.sol : null
+);
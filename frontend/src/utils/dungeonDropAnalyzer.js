@@ -9,6 +9,14 @@ export const analyzeDungeonDrops = (dungeons, dropChances) => {
     possibleIssues: []
   };
 
+  // Distinct chances per item id, so duplicate checks are one lookup per drop
+  const chancesById = new Map();
+  dropChances.forEach(drop => {
+    const id = drop.itemMetadata.id;
+    if (!chancesById.has(id)) chancesById.set(id, new Set());
+    chancesById.get(id).add(drop.chance);
+  });
+
   // Analyze all available items
   dropChances.forEach(drop => {
     // Count by type
@@ -24,11 +32,7 @@ export const analyzeDungeonDrops = (dungeons, dropChances) => {
     analysis.itemsByRarity[drop.itemMetadata.rarity].push(drop.itemMetadata.name);
 
     // Check for duplicate chances
-    const duplicates = dropChances.filter(d => 
-      d.itemMetadata.id === drop.itemMetadata.id && 
-      d.chance !== drop.chance
-    );
-    if (duplicates.length > 0) {
+    if (chancesById.get(drop.itemMetadata.id).size > 1) {
       analysis.possibleIssues.push(`Item ${drop.itemMetadata.name} has multiple different drop chances`);
     }
   });
@@ -89,6 +93,14 @@ export const validateDropData = (dungeons, dropChances) => {
     validation.isValid = false;
   }
 
+  // Entries per item id, counted once up front
+  const countsById = new Map();
+  dropChances.forEach(drop => {
+    if (!drop.itemMetadata) return;
+    const id = drop.itemMetadata.id;
+    countsById.set(id, (countsById.get(id) || 0) + 1);
+  });
+
   // Validate drop chances
   dropChances.forEach(drop => {
     // Check for required fields
@@ -105,11 +117,7 @@ export const validateDropData = (dungeons, dropChances) => {
     }
 
     // Check for duplicate entries
-    const duplicates = dropChances.filter(d => 
-      d.itemMetadata.id === drop.itemMetadata.id &&
-      d !== drop
-    );
-    if (duplicates.length > 0) {
+    if (countsById.get(drop.itemMetadata.id) > 1) {
       validation.warnings.push(`Duplicate entries found for item ${drop.itemMetadata.name}`);
     }
   });